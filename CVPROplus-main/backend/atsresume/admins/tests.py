@@ -144,18 +144,26 @@ class AdminDeleteUserViewTests(TestCase):
         self.invalid_id = 'invalid-id'
         self.nonexistent_id = '000000000000000000000000'
 
+    @patch('admins.views.remove_similar_safely')
+    @patch('admins.views.remove_resume_safely')
+    @patch('admins.views.resume_collection.find')
     @patch('admins.views.resume_collection.delete_many')
     @patch('admins.views.user_collection.delete_one')
     @patch('admins.views.user_collection.find_one')
-    def test_delete_user_success(self, mock_find, mock_user_delete, mock_resume_delete):
+    def test_delete_user_success(self, mock_find, mock_user_delete, mock_resume_delete, mock_resume_find, mock_unindex,
+                                 mock_unsimilar):
         mock_find.return_value = {'_id': ObjectId(self.valid_id)}
         mock_user_delete.return_value = MagicMock(deleted_count=1)
         mock_resume_delete.return_value = MagicMock(deleted_count=2)
+        mock_resume_find.return_value = [{'_id': 'r1'}, {'_id': 'r2'}]
 
         response = self.client.delete(f'/admins/deleteusers/{self.valid_id}/')
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('message', response.data)
+        # The user's resumes leave the candidate search index and similarity matrix too
+        self.assertEqual([call.args for call in mock_unindex.call_args_list], [('r1',), ('r2',)])
+        self.assertEqual([call.args for call in mock_unsimilar.call_args_list], [('r1',), ('r2',)])
 
     @patch('admins.views.user_collection.find_one')
     def test_delete_nonexistent_user(self, mock_find):
@@ -317,4 +325,100 @@ class AdminRegisterViewTests(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertIn('admin_username', response.data)
-        self.assertTrue(response.data['admin_username'].startswith('testuser'))
\ No newline at end of file
+        self.assertTrue(response.data['admin_username'].startswith('testuser'))
+class AdminListingPaginationTests(TestCase):
+    @patch('admins.views.login_log_collection.find')
+    def test_login_logs_page_newest_first(self, mock_find):
+        limit = mock_find.return_value.sort.return_value.limit
+        limit.return_value = [
+            {"_id": ObjectId(), "user_id": "u1", "timestamp": f"2024-05-0{i}", "login_successful": True}
+            for i in (3, 2, 1)
+        ]
+
+        response = APIClient().get('/admins/login-logs/', {"limit": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["login_logs"]), 2)
+        self.assertIsNotNone(response.data["next_cursor"])
+        mock_find.return_value.sort.assert_called_once_with([("timestamp", -1), ("_id", -1)])
+        limit.assert_called_once_with(3)
+
+    @patch('admins.views.resume_collection.count_documents', return_value=0)
+    @patch('admins.views.user_collection.find')
+    def test_user_list_continues_from_cursor(self, mock_find, mock_count):
+        from pagination import encode_cursor
+        last_id = ObjectId()
+        mock_find.return_value.sort.return_value.limit.return_value = [{"_id": ObjectId(), "email": "b@example.com"}]
+
+        response = APIClient().get('/admins/users/', {"cursor": encode_cursor([last_id])})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["next_cursor"])
+        query = mock_find.call_args[0][0]
+        self.assertEqual(query["$and"], [{"role": {"$ne": "admin"}}, {"$or": [{"_id": {"$gt": last_id}}]}])
+
+    def test_invalid_cursor(self):
+        response = APIClient().get('/admins/resumes/', {"cursor": "garbage"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AdminResumeSearchViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = '/admins/resumes/search/'
+
+    @patch('admins.views.resume_collection.find')
+    @patch('admins.views.get_search_index')
+    def test_search_returns_ranked_resumes(self, mock_index, mock_find):
+        """Test the top matches come back best first with their owners"""
+        mock_index.return_value.search.return_value = [("r2", 3.5), ("r1", 1.25)]
+        mock_find.return_value = [
+            {'_id': 'r1', 'user_id': 'u1', 'title': 'Data', 'resume_details': {'personal': {'name': 'Ann'}}},
+            {'_id': 'r2', 'user_id': 'u2', 'title': 'Backend', 'resume_details': {'personal': {'name': 'Bob'}}},
+        ]
+
+        response = self.client.get(self.url, {'q': 'python django', 'limit': 5})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in response.data['results']], ['r2', 'r1'])
+        self.assertEqual(response.data['results'][0]['name'], 'Bob')
+        mock_index.return_value.sync.assert_called_once()
+        mock_index.return_value.search.assert_called_once_with('python django', 5)
+
+    @patch('admins.views.resume_collection.find', return_value=[])
+    @patch('admins.views.get_search_index')
+    def test_search_accepts_job_description_body(self, mock_index, mock_find):
+        mock_index.return_value.search.return_value = []
+
+        response = self.client.post(self.url, {'query': 'Senior Python engineer', 'limit': 1000}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_index.return_value.search.assert_called_once_with('Senior Python engineer', 100)
+
+    def test_search_requires_query(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('error', response.data)
+
+class AdminDuplicateResumesViewTests(TestCase):
+    @patch('admins.views.duplicate_clusters')
+    def test_lists_duplicate_clusters(self, mock_clusters):
+        """Test duplicate clusters are listed with each resume's owner"""
+        mock_clusters.return_value = [[
+            ("r1", {"user_id": "u1", "title": "Backend"}),
+            ("r2", {"user_id": "u1", "title": "Backend copy"}),
+        ]]
+
+        response = APIClient().get('/admins/resumes/duplicates/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["clusters"][0]["size"], 2)
+        self.assertEqual(response.data["clusters"][0]["resumes"][1], {"id": "r2", "user_id": "u1", "title": "Backend copy"})
+
+    @patch('admins.views.duplicate_clusters', side_effect=Exception("aggregate failed"))
+    def test_database_error(self, mock_clusters):
+        response = APIClient().get('/admins/resumes/duplicates/')
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
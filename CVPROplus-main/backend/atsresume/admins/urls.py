@@ -1,6 +1,6 @@
 # urls.py
 from django.urls import path
-from .views import AdminLoginLogsView,AdminLoginView,AdminRegisterView,AdminUserListView,AdminAllResumesView,AdminDeleteUserView
+from .views import AdminLoginLogsView,AdminLoginView,AdminRegisterView,AdminUserListView,AdminAllResumesView,AdminDeleteUserView,AdminResumeSearchView,AdminDuplicateResumesView
 from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
 
 from rest_framework_simplejwt.views import (
@@ -14,6 +14,8 @@ urlpatterns = [
     path('register/',AdminRegisterView.as_view(), name='login_user'),
     path('users/', AdminUserListView.as_view(), name='admin-users'),
     path('resumes/', AdminAllResumesView.as_view(), name='admin-resumes'),
+    path('resumes/search/', AdminResumeSearchView.as_view(), name='admin-resume-search'),
+    path('resumes/duplicates/', AdminDuplicateResumesView.as_view(), name='admin-resume-duplicates'),
     path('login-logs/', AdminLoginLogsView.as_view(), name='admin-login-logs'),
     path('deleteusers/<str:user_id>/', AdminDeleteUserView.as_view(), name='admin-delete-user'),
 ]
\ No newline at end of file
@@ -15,6 +15,11 @@ from .models import (
     resume_collection,
     login_log_collection
 )
+from django.conf import settings
+from resume.search import get_search_index, remove_resume_safely
+from resume.dedup import duplicate_clusters
+from resume.similar import remove_similar_safely
+from pagination import InvalidPage, fetch_page, is_paged, page_params
 import random
 import string
 import logging
@@ -129,9 +134,34 @@ class AdminLoginView(APIView):
         )
 
 
+def _page_or_all(request, collection, query, sort, projection=None):
+    """
+    The documents of a listing: one page (after `cursor`, up to `limit`)
+    when either parameter is given, else all of them. Returns the
+    documents and the next page's cursor, which is None on the last page
+    or when not paging.
+    """
+    if not is_paged(request.query_params):
+        return collection.find(query, projection), None
+    limit, cursor = page_params(request.query_params)
+    return fetch_page(collection, query, projection, sort, limit, cursor)
+
+
+def _listing_response(key, items, next_cursor, request):
+    body = {key: items}
+    if is_paged(request.query_params):
+        body["next_cursor"] = next_cursor
+    return Response(body, status=status.HTTP_200_OK)
+
+
 class AdminUserListView(APIView):
+    """
+    List non-admin users with their resume counts, oldest first. With
+    `limit` and/or `cursor` the list is paged and includes `next_cursor`.
+    """
     def get(self, request):
         try:
+            page, next_cursor = _page_or_all(request, user_collection, {"role": {"$ne": "admin"}}, [("_id", 1)])
             users = [
                 {
                     "id": str(user['_id']),
@@ -144,9 +174,11 @@ class AdminUserListView(APIView):
                     "location": user.get("location"),
                     "created_at": user.get("created_at"),
                 }
-                for user in user_collection.find({"role": {"$ne": "admin"}})
+                for user in page
             ]
-            return Response({"users": users}, status=status.HTTP_200_OK)
+            return _listing_response("users", users, next_cursor, request)
+        except InvalidPage as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Error fetching users: {str(e)}")
             return Response(
@@ -156,12 +188,17 @@ class AdminUserListView(APIView):
 
 
 class AdminAllResumesView(APIView):
+    """
+    List every resume, oldest first. With `limit` and/or `cursor` the list
+    is paged and includes `next_cursor`.
+    """
     renderer_classes = [JSONRenderer]
     
     def get(self, request):
         try:
+            page, next_cursor = _page_or_all(request, resume_collection, {}, [("_id", 1)], {"minhash": 0, "lsh_bands": 0})
             resumes = []
-            for resume in resume_collection.find():
+            for resume in page:
                 resume_details = resume.get("resume_details", {})
                 resumes.append({
                     "id": str(resume['_id']),
@@ -186,10 +223,9 @@ class AdminAllResumesView(APIView):
                         "updated_at": resume.get("updated_at", "")
                     }
                 })
-            return Response(
-                {"resumes": resumes},
-                status=status.HTTP_200_OK
-            )
+            return _listing_response("resumes", resumes, next_cursor, request)
+        except InvalidPage as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Error fetching resumes: {str(e)}")
             return Response(
@@ -198,9 +234,96 @@ class AdminAllResumesView(APIView):
             )
 
 
+class AdminResumeSearchView(APIView):
+    """
+    Rank all resumes against a free-text query or job description with
+    BM25 and return the top matches: GET with `q`, or POST with `query`
+    for long job descriptions. `limit` defaults to 20.
+    """
+    renderer_classes = [JSONRenderer]
+
+    def get(self, request):
+        return self._search(request.query_params.get("q"), request.query_params.get("limit"))
+
+    def post(self, request):
+        return self._search(request.data.get("query"), request.data.get("limit"))
+
+    def _search(self, query, limit):
+        if not query or not query.strip():
+            return Response({"error": "Please provide a search query."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(limit or 20)
+        except (TypeError, ValueError):
+            return Response({"error": "limit must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, getattr(settings, "RESUME_SEARCH_MAX_RESULTS", 100)))
+
+        try:
+            index = get_search_index()
+            index.sync()
+            matches = index.search(query, limit)
+            resumes = {
+                resume["_id"]: resume
+                for resume in resume_collection.find(
+                    {"_id": {"$in": [resume_id for resume_id, _ in matches]}},
+                    {"user_id": 1, "title": 1, "resume_details.personal.name": 1},
+                )
+            }
+        except Exception as e:
+            logger.error(f"Error searching resumes: {str(e)}")
+            return Response(
+                {"error": "Failed to search resumes"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        results = []
+        for resume_id, score in matches:
+            resume = resumes.get(resume_id, {})
+            results.append({
+                "id": resume_id,
+                "score": round(score, 4),
+                "user_id": resume.get("user_id"),
+                "title": resume.get("title", ""),
+                "name": (resume.get("resume_details") or {}).get("personal", {}).get("name", ""),
+            })
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class AdminDuplicateResumesView(APIView):
+    """
+    List clusters of near-duplicate resumes (MinHash similarity at or above
+    RESUME_DUPLICATE_THRESHOLD), largest first.
+    """
+    renderer_classes = [JSONRenderer]
+
+    def get(self, request):
+        try:
+            clusters = [
+                {
+                    "size": len(cluster),
+                    "resumes": [
+                        {"id": resume_id, "user_id": resume.get("user_id"), "title": resume.get("title", "")}
+                        for resume_id, resume in cluster
+                    ],
+                }
+                for cluster in duplicate_clusters(resume_collection)
+            ]
+            return Response({"clusters": clusters}, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error(f"Error finding duplicate resumes: {str(e)}")
+            return Response(
+                {"error": "Failed to find duplicate resumes"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 class AdminLoginLogsView(APIView):
+    """
+    List login attempts, most recent first. With `limit` and/or `cursor`
+    the list is paged and includes `next_cursor`.
+    """
     def get(self, request):
         try:
+            page, next_cursor = _page_or_all(request, login_log_collection, {}, [("timestamp", -1), ("_id", -1)])
             logs = [
                 {
                     "id": str(log['_id']),
@@ -209,9 +332,11 @@ class AdminLoginLogsView(APIView):
                     "ip_address": log.get("ip_address"),
                     "login_successful": log.get("login_successful"),
                 }
-                for log in login_log_collection.find()
+                for log in page
             ]
-            return Response({"login_logs": logs}, status=status.HTTP_200_OK)
+            return _listing_response("login_logs", logs, next_cursor, request)
+        except InvalidPage as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Error fetching login logs: {str(e)}")
             return Response(
@@ -239,7 +364,11 @@ class AdminDeleteUserView(APIView):
                 )
 
             user_collection.delete_one({'_id': ObjectId(user_id)})
+            resume_ids = [resume['_id'] for resume in resume_collection.find({'user_id': user_id}, {'_id': 1})]
             resume_collection.delete_many({'user_id': user_id})
+            for resume_id in resume_ids:
+                remove_resume_safely(str(resume_id))
+                remove_similar_safely(str(resume_id))
             
             return Response(
                 {"message": "User and resumes deleted successfully."},
@@ -69,7 +69,7 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
-    'resume',
+    'resume.apps.ResumeConfig',
     "admins",
 ]
 
@@ -211,3 +211,85 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')  # ✅ Ensure STATIC_ROOT is set
 
+
+# Resume parsing
+RESUME_PARSE_CACHE_SIZE = int(os.getenv("RESUME_PARSE_CACHE_SIZE", 256))  # Entries kept in each worker's LRU
+RESUME_PARSE_CACHE_TTL = int(os.getenv("RESUME_PARSE_CACHE_TTL", 7 * 24 * 3600))  # Seconds before a cached parse expires
+RESUME_EXTRACT_DEFAULT_MODE = os.getenv("RESUME_EXTRACT_DEFAULT_MODE", "sync")  # "sync" or "async" when the client sends no mode
+RESUME_EXTRACTION_WORKERS = int(os.getenv("RESUME_EXTRACTION_WORKERS", 2))  # Background extraction threads per process
+RESUME_EXTRACTION_JOB_LEASE = int(os.getenv("RESUME_EXTRACTION_JOB_LEASE", 300))  # Seconds before a stalled job is retried
+RESUME_EXTRACTION_JOB_MAX_ATTEMPTS = int(os.getenv("RESUME_EXTRACTION_JOB_MAX_ATTEMPTS", 3))
+RESUME_EXTRACTION_JOB_TTL = int(os.getenv("RESUME_EXTRACTION_JOB_TTL", 24 * 3600))  # Seconds finished jobs are kept
+# Start the extraction workers when a server process starts, so jobs queued before a restart resume
+RESUME_EXTRACTION_AUTOSTART = os.getenv("RESUME_EXTRACTION_AUTOSTART", "true").lower() == "true"
+RESUME_PDF_PARALLEL_MIN_PAGES = int(os.getenv("RESUME_PDF_PARALLEL_MIN_PAGES", 8))  # Page count at which PDF pages are extracted in a process pool
+# Every web worker process (WEB_CONCURRENCY, which gunicorn also reads) starts its own PDF pool,
+# so the default splits the CPUs between them; a pool of 1 extracts in-process instead.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+RESUME_PDF_WORKERS = int(os.getenv("RESUME_PDF_WORKERS", 0)) or max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)  # Process pool size per web worker
+
+# Uploads up to this size are parsed straight from memory; larger ones are spooled to disk by Django
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv("FILE_UPLOAD_MAX_MEMORY_SIZE", 5 * 1024 * 1024))
+
+# Bulk resume import
+RESUME_BULK_MAX_FILES = int(os.getenv("RESUME_BULK_MAX_FILES", 500))
+RESUME_BULK_MAX_FILE_BYTES = int(os.getenv("RESUME_BULK_MAX_FILE_BYTES", 10 * 1024 * 1024))
+RESUME_BULK_EXTRACT_CONCURRENCY = int(os.getenv("RESUME_BULK_EXTRACT_CONCURRENCY", 4))  # Files extracted at once
+RESUME_BULK_LLM_CONCURRENCY = int(os.getenv("RESUME_BULK_LLM_CONCURRENCY", 2))  # Gemini calls at once
+RESUME_BULK_INSERT_BATCH_SIZE = int(os.getenv("RESUME_BULK_INSERT_BATCH_SIZE", 50))
+RESUME_BULK_LOCAL_BATCH_SIZE = int(os.getenv("RESUME_BULK_LOCAL_BATCH_SIZE", 32))  # Resumes per local-parse NER batch
+
+# Resume parse strategy: "llm" always calls Gemini, "tiered" tries the local parser first
+RESUME_PARSE_STRATEGY = os.getenv("RESUME_PARSE_STRATEGY", "llm")
+# Per-field minimum confidence before escalating to Gemini, e.g. {"experience": 0.8}
+RESUME_TIERED_THRESHOLDS = {}
+RESUME_PARSE_LEASES = os.getenv("RESUME_PARSE_LEASES", "false").lower() == "true"  # Coordinate identical parses across worker processes
+RESUME_PARSE_LEASE_WAIT = int(os.getenv("RESUME_PARSE_LEASE_WAIT", 60))  # Seconds to wait for another process's parse
+
+# Gemini prompt size
+RESUME_PROMPT_TOKEN_BUDGET = int(os.getenv("RESUME_PROMPT_TOKEN_BUDGET", 6000))  # Max estimated tokens of resume text per prompt
+
+# LLM backend used for resume parsing: "gemini", or "fake" for offline load tests
+RESUME_LLM_BACKEND = os.getenv("RESUME_LLM_BACKEND", "gemini")
+RESUME_LLM_TIMEOUT = int(os.getenv("RESUME_LLM_TIMEOUT", 20))  # Seconds per attempt
+RESUME_LLM_DEADLINE = int(os.getenv("RESUME_LLM_DEADLINE", 45))  # Seconds for all attempts together
+RESUME_LLM_MAX_ATTEMPTS = int(os.getenv("RESUME_LLM_MAX_ATTEMPTS", 3))
+RESUME_LLM_BACKOFF_BASE = float(os.getenv("RESUME_LLM_BACKOFF_BASE", 0.5))  # Seconds; doubled per retry, with jitter
+RESUME_LLM_BACKOFF_MAX = float(os.getenv("RESUME_LLM_BACKOFF_MAX", 4))
+RESUME_LLM_BREAKER_FAILURES = int(os.getenv("RESUME_LLM_BREAKER_FAILURES", 5))  # Consecutive failures that open the circuit
+RESUME_LLM_BREAKER_RESET = int(os.getenv("RESUME_LLM_BREAKER_RESET", 30))  # Seconds before a trial call is let through
+RESUME_FAKE_LLM_LATENCY = float(os.getenv("RESUME_FAKE_LLM_LATENCY", 0.5))
+RESUME_FAKE_LLM_JITTER = float(os.getenv("RESUME_FAKE_LLM_JITTER", 0.2))
+RESUME_FAKE_LLM_FAILURE_RATE = float(os.getenv("RESUME_FAKE_LLM_FAILURE_RATE", 0.0))
+
+# Region used to read phone numbers written without a country code
+RESUME_PHONE_REGION = os.getenv("RESUME_PHONE_REGION", "US")
+
+# PDF text engine: "auto" (PyPDF2, with pdfplumber for pages that read poorly), "pypdf" or "pdfplumber"
+RESUME_PDF_ENGINE = os.getenv("RESUME_PDF_ENGINE", "auto")
+
+# Upload admission, checked before a resume is parsed
+RESUME_UPLOAD_MAX_BYTES = int(os.getenv("RESUME_UPLOAD_MAX_BYTES", 10 * 1024 * 1024))
+RESUME_UPLOAD_MAX_PDF_PAGES = int(os.getenv("RESUME_UPLOAD_MAX_PDF_PAGES", 50))
+
+# ATS match scoring against a pasted job description
+RESUME_SCORE_MAX_JD_CHARS = int(os.getenv("RESUME_SCORE_MAX_JD_CHARS", 20000))
+
+# BM25 candidate search for admins
+RESUME_SEARCH_SYNC_INTERVAL = float(os.getenv("RESUME_SEARCH_SYNC_INTERVAL", 2))  # Seconds between catch-ups with other processes' writes
+RESUME_SEARCH_MAX_RESULTS = int(os.getenv("RESUME_SEARCH_MAX_RESULTS", 100))
+
+# Near-duplicate resume detection
+RESUME_DUPLICATE_THRESHOLD = float(os.getenv("RESUME_DUPLICATE_THRESHOLD", 0.8))  # Estimated Jaccard similarity of word 3-grams
+
+# "More like this": hashed n-gram vectors in a memory-mapped matrix shared by all workers
+RESUME_SIMILAR_DIR = os.getenv("RESUME_SIMILAR_DIR", os.path.join(BASE_DIR, "var", "similar"))
+RESUME_SIMILAR_DIM = int(os.getenv("RESUME_SIMILAR_DIM", 512))  # Changing it needs rebuild_similar_index
+RESUME_SIMILAR_MAX_RESULTS = int(os.getenv("RESUME_SIMILAR_MAX_RESULTS", 50))
+
+# Cursor pagination of resume, user and login-log listings (with ?limit= or ?cursor=)
+PAGINATION_DEFAULT_LIMIT = int(os.getenv("PAGINATION_DEFAULT_LIMIT", 20))
+PAGINATION_MAX_LIMIT = int(os.getenv("PAGINATION_MAX_LIMIT", 100))
+
+# JSON Patch edits of resume_details (PATCH /resume/update/<id>/)
+RESUME_PATCH_MAX_OPERATIONS = int(os.getenv("RESUME_PATCH_MAX_OPERATIONS", 100))
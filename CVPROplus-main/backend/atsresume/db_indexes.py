@@ -0,0 +1,76 @@
+# db_indexes.py
+"""
+The MongoDB indexes used by the resume, admins and authentication apps.
+
+`index_plan()` lists every index by collection, including the TTL indexes
+that the parse cache, extraction jobs and parse leases also create
+lazily, and `ensure_indexes(db)` creates whichever are missing. Index
+keys and names are the same as those created elsewhere, so running it
+against an existing database is a no-op. Run it with
+`python manage.py ensure_indexes` (the container does on startup).
+"""
+import logging
+
+from django.conf import settings
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+def index_plan():
+    """{collection name: [(keys, options), ...]} for every index the apps query through."""
+    return {
+        "resumes": [
+            # Dashboard listings: a user's (or email's) resumes, most recently updated first
+            ([("user_id", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)], {}),
+            ([("email", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)], {}),
+            ([("lsh_bands", ASCENDING)], {}),
+        ],
+        "users": [
+            ([("email", ASCENDING)], {}),
+            ([("username", ASCENDING)], {}),
+        ],
+        "admins": [
+            ([("email", ASCENDING)], {}),
+        ],
+        "login_logs": [
+            ([("timestamp", DESCENDING), ("_id", DESCENDING)], {}),
+        ],
+        "search_terms": [
+            ([("seq", ASCENDING)], {}),
+        ],
+        "parse_cache": [
+            ([("created_at", ASCENDING)],
+             {"expireAfterSeconds": getattr(settings, "RESUME_PARSE_CACHE_TTL", 7 * 24 * 3600)}),
+        ],
+        "parse_leases": [
+            ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+        ],
+        "extraction_jobs": [
+            ([("status", ASCENDING), ("created_at", ASCENDING)], {}),
+            ([("finished_at", ASCENDING)],
+             {"expireAfterSeconds": getattr(settings, "RESUME_EXTRACTION_JOB_TTL", 24 * 3600)}),
+        ],
+    }
+
+
+def ensure_indexes(db, plan=None):
+    """
+    Create the indexes of `plan` (default `index_plan()`) in `db`. An index
+    that cannot be created, e.g. because one with the same keys and other
+    options exists, is logged and skipped. Returns one (collection, index
+    name, error message or None) per index.
+    """
+    results = []
+    for collection_name, indexes in (plan or index_plan()).items():
+        collection = db[collection_name]
+        for keys, options in indexes:
+            try:
+                name = collection.create_index(keys, **options)
+                results.append((collection_name, name, None))
+            except PyMongoError as e:
+                name = "_".join(f"{field}_{direction}" for field, direction in keys)
+                logger.error(f"Could not create index {name} on {collection_name}: {str(e)}")
+                results.append((collection_name, name, str(e)))
+    return results
@@ -0,0 +1,106 @@
+# pagination.py
+"""
+Keyset (cursor) pagination for MongoDB listings.
+
+A page is read as `find(query).sort(sort).limit(limit + 1)`, starting
+just after the sort key of the previous page's last document, so every
+page is a bounded range scan over the sort index however deep the client
+has paged. The cursor handed to the client is that sort key, JSON-encoded
+with BSON types (ObjectId, datetime) preserved and base64url-wrapped; it
+is opaque to the client and only valid with the listing that produced it.
+
+`sort` must end with `_id`, so every document has a unique position.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from bson import ObjectId, json_util
+from django.conf import settings
+
+SORT_VALUE_TYPES = (str, int, float, datetime, ObjectId)
+
+
+class InvalidPage(ValueError):
+    """A `limit` or `cursor` query parameter that cannot be used."""
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json_util.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        values = json_util.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidPage("Invalid cursor")
+    # Only plain sort values, so a crafted cursor cannot smuggle query operators in
+    if not isinstance(values, list) or not all(isinstance(value, SORT_VALUE_TYPES) or value is None for value in values):
+        raise InvalidPage("Invalid cursor")
+    return values
+
+
+def is_paged(params):
+    """Whether a request asked for a page; listings without `limit` or `cursor` keep returning everything."""
+    return "limit" in params or "cursor" in params
+
+
+def page_params(params):
+    """
+    Read `limit` (default PAGINATION_DEFAULT_LIMIT, at most
+    PAGINATION_MAX_LIMIT) and the decoded `cursor` from query parameters.
+    """
+    try:
+        limit = int(params.get("limit") or getattr(settings, "PAGINATION_DEFAULT_LIMIT", 20))
+    except ValueError:
+        raise InvalidPage("limit must be a number")
+    if limit < 1:
+        raise InvalidPage("limit must be positive")
+    limit = min(limit, getattr(settings, "PAGINATION_MAX_LIMIT", 100))
+    cursor = params.get("cursor")
+    return limit, decode_cursor(cursor) if cursor else None
+
+
+def after(sort, values):
+    """
+    The filter for documents that come after the key `values` in `sort`
+    order. Missing fields and nulls sort before every value, so they come
+    last in a descending sort and first in an ascending one (`_id` is
+    never null).
+    """
+    if len(values) != len(sort):
+        raise InvalidPage("Invalid cursor")
+    clauses = []
+    for i, ((field, direction), value) in enumerate(zip(sort, values)):
+        equal = {prefix_field: prefix_value for (prefix_field, _), prefix_value in zip(sort[:i], values[:i])}
+        if value is None:
+            if direction == 1:
+                clauses.append(dict(equal, **{field: {"$ne": None}}))
+        elif direction == 1:
+            clauses.append(dict(equal, **{field: {"$gt": value}}))
+        else:
+            clauses.append(dict(equal, **{field: {"$lt": value}}))
+            if field != "_id":
+                clauses.append(dict(equal, **{field: None}))
+    return {"$or": clauses} if clauses else {"_id": {"$exists": False}}
+
+
+def _sort_value(document, field):
+    for part in field.split("."):
+        document = document.get(part) if isinstance(document, dict) else None
+    return document
+
+
+def fetch_page(collection, query, projection, sort, limit, cursor=None):
+    """
+    One page of `collection.find(query, projection)` in `sort` order,
+    after `cursor` (decoded values, or None for the first page). Returns
+    the documents and the cursor of the next page, None on the last page.
+    """
+    if cursor is not None:
+        query = {"$and": [query, after(sort, cursor)]} if query else after(sort, cursor)
+    documents = list(collection.find(query, projection).sort(sort).limit(limit + 1))
+    if len(documents) <= limit:
+        return documents, None
+    documents = documents[:limit]
+    return documents, encode_cursor([_sort_value(documents[-1], field) for field, _ in sort])
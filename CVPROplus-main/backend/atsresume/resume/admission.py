@@ -0,0 +1,130 @@
+"""
+Upload admission control.
+
+Cheap checks that run before an uploaded resume is parsed: the request
+size, the file type read from its first bytes rather than its name, the
+file size, and the page count of PDFs. Anything that fails is rejected
+with a specific 4xx status, so oversized or mislabeled files never reach
+the PDF/DOCX extractors.
+"""
+import zipfile
+
+import PyPDF2
+from django.conf import settings
+
+from .metrics import counters
+
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+# PDF headers may follow a few bytes of junk; readers search the first KiB
+SNIFF_BYTES = 1024
+DOCX_DOCUMENT_PART = "word/document.xml"
+# Room for the multipart boundaries and form fields around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+SUPPORTED_EXTENSIONS = ("pdf", "doc", "docx")
+
+
+class UploadRejected(Exception):
+    """An upload that failed admission. `reason` names the counter it is recorded under."""
+
+    def __init__(self, message, status, reason):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+
+
+def _reject(message, status, reason):
+    counters.incr(f"upload.rejected.{reason}")
+    return UploadRejected(message, status, reason)
+
+
+def _max_bytes():
+    return getattr(settings, "RESUME_UPLOAD_MAX_BYTES", 10 * 1024 * 1024)
+
+
+def check_request_size(request):
+    """
+    Reject a request whose declared body is too large to hold an admissible
+    file. Call before touching `request.FILES`, so the body is never read.
+    """
+    try:
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        length = 0
+    if length > _max_bytes() + MULTIPART_OVERHEAD:
+        raise _reject("File is too large", 413, "too_large")
+
+
+def sniff_format(head):
+    """Return "pdf", "zip", "ole" or None for the first bytes of a file."""
+    if PDF_MAGIC in head[:SNIFF_BYTES]:
+        return "pdf"
+    if head.startswith(ZIP_MAGIC):
+        return "zip"
+    if head.startswith(OLE_MAGIC):
+        return "ole"
+    return None
+
+
+def _pdf_page_count(stream):
+    try:
+        return len(PyPDF2.PdfReader(stream).pages)
+    except Exception:
+        raise _reject("PDF file is damaged or unreadable", 422, "unreadable")
+
+
+def _is_docx(stream):
+    # Only the ZIP central directory is read, not the compressed parts
+    try:
+        with zipfile.ZipFile(stream) as archive:
+            return DOCX_DOCUMENT_PART in archive.namelist()
+    except zipfile.BadZipFile:
+        return False
+
+
+def admit_content(stream):
+    """
+    Return the format, "pdf" or "docx", of the resume in the seekable
+    `stream`, as read from its content. Raises UploadRejected: 400 for
+    files that are not PDF or DOCX, 422 for PDFs that cannot be read or
+    have more than RESUME_UPLOAD_MAX_PDF_PAGES pages.
+    """
+    stream.seek(0)
+    kind = sniff_format(stream.read(SNIFF_BYTES))
+    stream.seek(0)
+    try:
+        if kind == "pdf":
+            max_pages = getattr(settings, "RESUME_UPLOAD_MAX_PDF_PAGES", 50)
+            page_count = _pdf_page_count(stream)
+            if page_count > max_pages:
+                raise _reject(f"PDF has {page_count} pages; the limit is {max_pages}", 422, "too_many_pages")
+            file_format = "pdf"
+        elif kind == "zip" and _is_docx(stream):
+            file_format = "docx"
+        elif kind == "ole":
+            raise _reject("Legacy .doc files are not supported; upload a PDF or DOCX", 400, "legacy_doc")
+        else:
+            raise _reject("Unsupported file format", 400, "unsupported")
+    finally:
+        stream.seek(0)
+    return file_format
+
+
+def admit_upload(uploaded_file):
+    """
+    Check an uploaded resume and return its format, "pdf" or "docx", as
+    read from its content. Raises UploadRejected with the HTTP status to
+    answer with: 400 for an unsupported file name, 413 above
+    RESUME_UPLOAD_MAX_BYTES, and as admit_content for the content itself.
+    """
+    extension = uploaded_file.name.rsplit(".", 1)[-1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise _reject("Unsupported file format", 400, "unsupported")
+    if uploaded_file.size > _max_bytes():
+        raise _reject("File is too large", 413, "too_large")
+
+    file_format = admit_content(uploaded_file.file)
+    counters.incr(f"upload.admitted.{file_format}")
+    return file_format
@@ -1,5 +1,27 @@
+import os
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
+
+
+def serves_requests():
+    """
+    Whether this process serves requests, as opposed to running a
+    management command such as migrate or test, which must not claim jobs.
+    Under `runserver` only the autoreloader's child process serves.
+    """
+    if os.path.basename(sys.argv[0]) != "manage.py":
+        return True
+    if sys.argv[1:2] != ["runserver"]:
+        return False
+    return os.environ.get("RUN_MAIN") == "true" or "--noreload" in sys.argv
 
 
 class ResumeConfig(AppConfig):
     name = 'resume'
+
+    def ready(self):
+        if getattr(settings, "RESUME_EXTRACTION_AUTOSTART", True) and serves_requests():
+            from .views import extraction_jobs
+            extraction_jobs.start()
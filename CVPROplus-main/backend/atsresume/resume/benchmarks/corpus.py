@@ -0,0 +1,221 @@
+"""
+Reproducible synthetic resumes for the extraction and search benchmarks.
+
+Everything is generated from a seed with the standard library, so the same
+arguments always produce byte-identical files.
+"""
+import io
+import random
+import textwrap
+import zipfile
+
+import docx
+
+from ..scoring import SKILL_LEXICON
+
+FIRST_NAMES = ["John", "Priya", "Wei", "Maria", "Ahmed", "Olivia", "Carlos", "Aisha", "Liam", "Sofia"]
+LAST_NAMES = ["Doe", "Patel", "Chen", "Garcia", "Hassan", "Smith", "Silva", "Khan", "Brown", "Rossi"]
+COMPANIES = ["XYZ Corp", "Acme Analytics", "Northwind", "Globex", "Initech", "Umbrella Labs", "Hooli"]
+TITLES = ["Software Engineer", "Data Analyst", "Backend Developer", "ML Engineer", "DevOps Engineer"]
+SKILLS = [
+    "Python", "Django", "React", "MongoDB", "Docker", "Kubernetes", "AWS", "SQL", "Pandas",
+    "NumPy", "TensorFlow", "Git", "Linux", "REST APIs", "JavaScript", "TypeScript", "Redis",
+]
+VERBS = ["Developed", "Optimized", "Designed", "Led", "Automated", "Migrated", "Maintained", "Built"]
+OBJECTS = [
+    "backend services", "data pipelines", "CI/CD workflows", "REST APIs", "dashboards",
+    "ML models", "search features", "payment integrations", "monitoring alerts",
+]
+
+
+def resume_lines(rng, line_count):
+    """Resume-shaped text lines: a header, then repeating experience/skills/project blocks."""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [
+        name,
+        f"{name.lower().replace(' ', '.')}@example.com | +1 416 555 {rng.randint(1000, 9999)}",
+        "Summary",
+        "Engineer with experience building reliable software for growing teams.",
+    ]
+    while len(lines) < line_count:
+        lines.append("Experience")
+        lines.append(
+            f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)} "
+            f"({rng.randint(1, 12):02d}/{rng.randint(2012, 2020)} - {rng.randint(1, 12):02d}/{rng.randint(2021, 2024)})"
+        )
+        for _ in range(rng.randint(2, 4)):
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} for {rng.randint(2, 40)} clients")
+        lines.append("Skills")
+        lines.append(", ".join(rng.sample(SKILLS, 6)))
+        lines.append("Projects")
+        lines.append(f"{rng.choice(OBJECTS).title()} Platform - {', '.join(rng.sample(SKILLS, 3))}")
+    return lines[:line_count]
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_stream(lines, columns):
+    """PDF content stream drawing `lines` in one or more columns of Helvetica text."""
+    commands = []
+    per_column = -(-len(lines) // columns)
+    column_width = 512 // columns
+    for column in range(columns):
+        chunk = lines[column * per_column:(column + 1) * per_column]
+        if columns > 1:
+            # Keep each column inside its own width, as real layouts do
+            chunk = [wrapped for line in chunk for wrapped in textwrap.wrap(line, column_width // 5 - 4)]
+        commands.append(f"BT /F1 10 Tf 14 TL {50 + column * column_width} 750 Td")
+        for line in chunk:
+            commands.append(f"({_escape(line)}) Tj T*")
+        commands.append("ET")
+    return "\n".join(commands).encode("latin-1", "replace")
+
+
+def build_pdf(pages, columns=1):
+    """Assemble a minimal, valid PDF with one text page per entry of `pages`."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_numbers = []
+    for lines in pages:
+        stream = _page_stream(lines, columns)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_number = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_number
+        )
+        page_numbers.append(len(objects))
+    kids = " ".join(f"{number} 0 R" for number in page_numbers)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_numbers)} >>".encode()
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(output)
+
+
+def synthetic_pdf(page_count, seed=0, lines_per_page=50, columns=1):
+    """A resume PDF with `page_count` pages of generated text."""
+    rng = random.Random(f"pdf-{seed}-{page_count}-{columns}")
+    pages = [resume_lines(rng, lines_per_page) for _ in range(page_count)]
+    return build_pdf(pages, columns=columns)
+
+
+def _normalize_zip(data):
+    """Rewrite a ZIP with fixed timestamps so the same content gives the same bytes."""
+    output = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(data)) as source, \
+            zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as target:
+        for info in source.infolist():
+            fixed = zipfile.ZipInfo(info.filename, date_time=(2020, 1, 1, 0, 0, 0))
+            fixed.compress_type = zipfile.ZIP_DEFLATED
+            target.writestr(fixed, source.read(info))
+    return output.getvalue()
+
+
+def synthetic_docx(page_count, seed=0, lines_per_page=50, tables=False):
+    """
+    A resume DOCX with roughly `page_count` pages of generated text. With
+    `tables`, skills are laid out in a table and the contact line sits in a
+    page header, as many templates do.
+    """
+    rng = random.Random(f"docx-{seed}-{page_count}-{tables}")
+    document = docx.Document()
+    lines = resume_lines(rng, lines_per_page * page_count)
+    if tables:
+        document.sections[0].header.paragraphs[0].text = lines[1]
+        lines = lines[:1] + lines[2:]
+
+    for line in lines:
+        if tables and "," in line and not line.startswith("-") and "(" not in line:
+            items = [item.strip() for item in line.split(",")]
+            table = document.add_table(rows=2, cols=3)
+            for index, item in enumerate(items[:6]):
+                table.cell(index // 3, index % 3).text = item
+        elif line in ("Summary", "Experience", "Skills", "Projects"):
+            document.add_heading(line, level=2)
+        else:
+            document.add_paragraph(line)
+
+    output = io.BytesIO()
+    document.save(output)
+    return _normalize_zip(output.getvalue())
+
+
+COURSES = ["Computer Science", "Software Engineering", "Data Science", "Information Systems", "Mathematics"]
+SCHOOLS = ["State University", "Tech Institute", "City College", "Polytechnic University"]
+
+
+def synthetic_resume_details(count, seed=0):
+    """
+    `count` stored-resume documents (`_id` and `resume_details`), shaped like
+    the ones the resume builder saves, for the search benchmarks.
+    """
+    rng = random.Random(f"details-{seed}-{count}")
+    skills = list(SKILL_LEXICON)
+    resumes = []
+    for number in range(count):
+        resumes.append({
+            "_id": f"resume-{number}",
+            "resume_details": {
+                "personal": {"name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                             "summary": f"{rng.choice(TITLES)} building {rng.choice(OBJECTS)}."},
+                "skills": rng.sample(skills, rng.randint(5, 15)),
+                "experience": [
+                    {
+                        "jobTitle": rng.choice(TITLES),
+                        "company": rng.choice(COMPANIES),
+                        "tasks": [
+                            f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(skills)}"
+                            for _ in range(rng.randint(2, 5))
+                        ],
+                    }
+                    for _ in range(rng.randint(1, 4))
+                ],
+                "projects": [
+                    {"name": f"{rng.choice(OBJECTS).title()} Platform", "technologies": rng.sample(skills, 3)}
+                    for _ in range(rng.randint(0, 3))
+                ],
+                "education": [{"course": rng.choice(COURSES), "institution": rng.choice(SCHOOLS)}],
+            },
+        })
+    return resumes
+
+
+class CorpusDocument:
+    def __init__(self, name, extension, layout, pages, data):
+        self.name = name
+        self.extension = extension
+        self.layout = layout
+        self.pages = pages
+        self.data = data
+
+
+def build_corpus(page_counts=(1, 2, 5, 10), seed=0):
+    """
+    One document per page count and layout: single- and two-column PDFs,
+    and DOCX files with plain paragraphs or tables and page headers.
+    """
+    documents = []
+    for pages in page_counts:
+        for layout, extension, data in (
+            ("single-column", "pdf", synthetic_pdf(pages, seed=seed)),
+            ("two-column", "pdf", synthetic_pdf(pages, seed=seed, columns=2)),
+            ("paragraphs", "docx", synthetic_docx(pages, seed=seed)),
+            ("tables", "docx", synthetic_docx(pages, seed=seed, tables=True)),
+        ):
+            name = f"{layout}-{pages}p.{extension}"
+            documents.append(CorpusDocument(name, extension, layout, pages, data))
+    return documents
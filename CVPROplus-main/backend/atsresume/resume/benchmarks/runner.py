@@ -0,0 +1,112 @@
+"""
+Stage-by-stage timing of the resume extraction pipeline.
+
+Each document of the corpus goes through the same steps as an upload:
+multipart parsing by Django, text extraction, section splitting, spaCy
+name extraction, the single-pass field extractor and LLM parsing. Every
+step is timed on its own so regressions can be traced to a stage.
+"""
+import io
+import resource
+import sys
+import time
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import load_handler
+from django.http.multipartparser import MultiPartParser
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+
+from resume import utils
+from resume.views import upload_source
+
+STAGES = (
+    "upload", "extract_pdf", "extract_docx", "extract_sections", "extract_name", "extract_fields", "llm_parse", "total",
+)
+
+
+def percentile(values, fraction):
+    """Linear-interpolated percentile of `values`, with `fraction` between 0 and 1."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _upload(document):
+    """Parse a multipart request body holding the document, as Django does for /resume/extract/."""
+    body = encode_multipart(BOUNDARY, {"file": SimpleUploadedFile(document.name, document.data)})
+    meta = {"CONTENT_TYPE": MULTIPART_CONTENT, "CONTENT_LENGTH": len(body)}
+    handlers = [load_handler(handler) for handler in settings.FILE_UPLOAD_HANDLERS]
+    _, files = MultiPartParser(meta, io.BytesIO(body), handlers).parse()
+    return upload_source(files["file"])
+
+
+def run_document(document, timings):
+    """Run one document through every stage, appending seconds to `timings[stage]`."""
+    started = time.perf_counter()
+
+    def timed(stage, fn, *args):
+        stage_started = time.perf_counter()
+        result = fn(*args)
+        timings[stage].append(time.perf_counter() - stage_started)
+        return result
+
+    uploaded_file = timed("upload", _upload, document)
+    if document.extension == "pdf":
+        text = timed("extract_pdf", utils.extract_text_from_pdf, uploaded_file)
+    else:
+        text = timed("extract_docx", utils.extract_text_from_docx, uploaded_file)
+    timed("extract_sections", utils.extract_sections, text)
+    timed("extract_name", utils.extract_name, text)
+    timed("extract_fields", utils.extract_fields, text)
+    timed("llm_parse", utils.parse_resume_with_gemini, text)
+    timings["total"].append(time.perf_counter() - started)
+
+
+def summarize(values):
+    total = sum(values)
+    return {
+        "count": len(values),
+        "total_seconds": total,
+        "throughput_per_second": len(values) / total if total else 0.0,
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "max_ms": max(values) * 1000 if values else 0.0,
+    }
+
+
+def run_benchmark(documents, repeat=3, warmup=True):
+    """
+    Time every stage over `repeat` passes of `documents`. Returns a dict with
+    per-stage summaries, per-layout totals and the peak RSS.
+    """
+    if warmup and documents:
+        # Load spaCy and open the PDF libraries outside the measurements
+        run_document(documents[0], {stage: [] for stage in STAGES})
+
+    timings = {stage: [] for stage in STAGES}
+    by_layout = {}
+    for _ in range(repeat):
+        for document in documents:
+            run_document(document, timings)
+            by_layout.setdefault(document.layout, []).append(timings["total"][-1])
+
+    return {
+        "documents": len(documents),
+        "repeat": repeat,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {stage: summarize(values) for stage, values in timings.items() if values},
+        "layouts": {layout: summarize(values) for layout, values in by_layout.items()},
+    }
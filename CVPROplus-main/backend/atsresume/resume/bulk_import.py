@@ -0,0 +1,248 @@
+import io
+import logging
+import os
+import zipfile
+from datetime import datetime, timezone
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from .admission import SUPPORTED_EXTENSIONS, UploadRejected, admit_content
+from .dedup import duplicates_among, flag_duplicates, signature_fields
+from .metrics import counters
+
+logger = logging.getLogger(__name__)
+
+
+class BulkImportError(Exception):
+    """Raised when an archive cannot be read at all."""
+
+
+def _extension(name):
+    return name.rsplit(".", 1)[-1].lower() if "." in name else ""
+
+
+def _admitted(name, extension, data):
+    """
+    The `(name, extension, data, error)` entry for a file's bytes, after the
+    same content checks as a single upload; `extension` becomes the format
+    read from the content.
+    """
+    try:
+        return name, admit_content(io.BytesIO(data)), data, None
+    except UploadRejected as e:
+        return name, extension, None, str(e)
+
+
+def iter_archive_entries(archive_file, max_files, max_entry_bytes):
+    """
+    Yield `(name, extension, data, error)` for each file in a ZIP archive.
+
+    Entries are decompressed one at a time as the caller asks for them, so
+    only the entries currently being processed are held in memory. `data`
+    is None and `error` is set for entries that are skipped, including
+    those that fail the upload content checks (see admission.py).
+    """
+    try:
+        archive = zipfile.ZipFile(archive_file)
+    except zipfile.BadZipFile:
+        raise BulkImportError("Uploaded archive is not a valid ZIP file")
+
+    with archive:
+        count = 0
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or os.path.basename(name).startswith(".") or name.startswith("__MACOSX/"):
+                continue
+
+            count += 1
+            if count > max_files:
+                yield name, None, None, f"Archive has more than {max_files} files"
+                return
+
+            extension = _extension(name)
+            if extension not in SUPPORTED_EXTENSIONS:
+                yield name, extension, None, "Unsupported file format"
+                continue
+            if info.file_size > max_entry_bytes:
+                yield name, extension, None, "File is too large"
+                continue
+
+            with archive.open(info) as entry:
+                # The declared size can lie, so never read past the limit
+                data = entry.read(max_entry_bytes + 1)
+            if len(data) > max_entry_bytes:
+                yield name, extension, None, "File is too large"
+                continue
+            yield _admitted(name, extension, data)
+
+
+def iter_uploaded_files(files, max_files, max_entry_bytes):
+    """Yield `(name, extension, data, error)` for individually uploaded files."""
+    for count, uploaded_file in enumerate(files, start=1):
+        name = uploaded_file.name
+        if count > max_files:
+            yield name, None, None, f"Upload has more than {max_files} files"
+            return
+
+        extension = _extension(name)
+        if extension not in SUPPORTED_EXTENSIONS:
+            yield name, extension, None, "Unsupported file format"
+        elif uploaded_file.size > max_entry_bytes:
+            yield name, extension, None, "File is too large"
+        else:
+            yield _admitted(name, extension, uploaded_file.read())
+
+
+class BulkImporter:
+    """
+    Extract and parse many resumes with bounded concurrency.
+
+    Text extraction runs on `extract_concurrency` threads and LLM parsing on
+    a separate, usually smaller, pool of `llm_concurrency` threads. Parsed
+    resumes are written with `insert_many` in batches of `batch_size`.
+    `run()` yields one result per file as soon as that file is decided,
+    successes once their batch is stored. `on_inserted(resume_id,
+    resume_details)`, if given, is called for each stored resume, e.g. to
+    add it to the search indexes.
+
+    With `prepare_batch_fn`, extracted texts are first grouped by
+    `prepare_batch_size` and `prepare_batch_fn(texts)` returns one value
+    per text (e.g. a local parse batched through nlp.pipe), which is passed
+    on as `parse_fn(text, prepared)`.
+    """
+
+    def __init__(self, collection, extract_fn, parse_fn, extract_concurrency=4,
+                 llm_concurrency=2, batch_size=50, on_inserted=None,
+                 prepare_batch_fn=None, prepare_batch_size=32):
+        self._collection = collection
+        self._extract_fn = extract_fn
+        self._parse_fn = parse_fn
+        self._on_inserted = on_inserted
+        self._prepare_batch_fn = prepare_batch_fn
+        self.prepare_batch_size = prepare_batch_size
+        self.extract_concurrency = extract_concurrency
+        self.llm_concurrency = llm_concurrency
+        self.batch_size = batch_size
+
+    def _extract(self, extension, data):
+        return self._extract_fn(io.BytesIO(data), extension)
+
+    def run(self, entries, user_id=None, email=""):
+        extract_pool = ThreadPoolExecutor(self.extract_concurrency, thread_name_prefix="bulk-extract")
+        llm_pool = ThreadPoolExecutor(self.llm_concurrency, thread_name_prefix="bulk-llm")
+        # Bound the files held in memory: each in-flight file is one entry
+        window = self.extract_concurrency + self.llm_concurrency
+        pending = {}
+        # Extracted (name, text) pairs waiting for a prepare batch
+        extracted = []
+        batch = []
+        summary = {"imported": 0, "failed": 0}
+
+        def failed(name, error):
+            summary["failed"] += 1
+            counters.incr("bulk_import.failed")
+            return {"file": name, "status": "error", "error": error}
+
+        def flush():
+            documents = [document for _, document in batch]
+            rejected = set()
+            try:
+                self._collection.insert_many(documents, ordered=False)
+            except BulkWriteError as e:
+                logger.error(f"Bulk import insert partially failed: {str(e)}")
+                rejected = {error["index"] for error in e.details.get("writeErrors", [])}
+            except PyMongoError as e:
+                logger.error(f"Bulk import insert failed: {str(e)}")
+                rejected = set(range(len(batch)))
+
+            results = []
+            for index, (name, document) in enumerate(batch):
+                if index in rejected:
+                    results.append(failed(name, "Could not save resume"))
+                    continue
+                summary["imported"] += 1
+                counters.incr("bulk_import.imported")
+                if self._on_inserted:
+                    self._on_inserted(document["_id"], document["resume_details"])
+                result = {"file": name, "status": "ok", "resume_id": document["_id"]}
+                if document["duplicate_of"]:
+                    result["possible_duplicates"] = document["duplicate_of"]
+                results.append(result)
+            batch.clear()
+            return results
+
+        def prepare():
+            texts = list(extracted)
+            extracted.clear()
+            pending[extract_pool.submit(self._prepare_batch_fn, [text for _, text in texts])] = ("prepare", texts)
+
+        def drain():
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            results = []
+            for future in done:
+                stage, name = pending.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    if stage == "prepare":
+                        results.extend(failed(file_name, str(e)) for file_name, _ in name)
+                    else:
+                        results.append(failed(name, str(e)))
+                    continue
+
+                if stage == "extract" and self._prepare_batch_fn:
+                    extracted.append((name, value))
+                    if len(extracted) >= self.prepare_batch_size:
+                        prepare()
+                elif stage == "extract":
+                    pending[llm_pool.submit(self._parse_fn, value)] = ("parse", name)
+                elif stage == "prepare":
+                    for (file_name, text), prepared in zip(name, value):
+                        pending[llm_pool.submit(self._parse_fn, text, prepared)] = ("parse", file_name)
+                elif value is None:
+                    results.append(failed(name, "Could not parse resume"))
+                else:
+                    now = datetime.now(timezone.utc)
+                    document = {
+                        "_id": str(ObjectId()),
+                        "user_id": user_id,
+                        "title": os.path.splitext(os.path.basename(name))[0],
+                        "resume_details": value,
+                        "email": email,
+                        "image_id": None,
+                        "created_at": now,
+                        "updated_at": now,
+                        "version": 1,
+                        **signature_fields(value),
+                    }
+                    # Resumes still waiting in the batch are not in Mongo yet, so check them too
+                    document["duplicate_of"] = flag_duplicates(self._collection, document) + duplicates_among(
+                        [pending_document for _, pending_document in batch], document
+                    )
+                    batch.append((name, document))
+                    if len(batch) >= self.batch_size:
+                        results.extend(flush())
+            return results
+
+        try:
+            for name, extension, data, error in entries:
+                if error:
+                    yield failed(name, error)
+                    continue
+                while len(pending) >= window:
+                    yield from drain()
+                pending[extract_pool.submit(self._extract, extension, data)] = ("extract", name)
+
+            while pending or extracted:
+                # No more texts can join a partial batch once every file is extracted
+                if extracted and not any(stage == "extract" for stage, _ in pending.values()):
+                    prepare()
+                yield from drain()
+            if batch:
+                yield from flush()
+            yield {"status": "complete", **summary}
+        finally:
+            extract_pool.shutdown(wait=False, cancel_futures=True)
+            llm_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,195 @@
+"""
+Near-duplicate resume detection with MinHash and LSH.
+
+A resume's text (`resume_details` without contact details or dates) is
+cut into overlapping word 3-grams. Its MinHash signature, NUM_PERM
+minimums of the shingle hashes under random linear permutations, is
+stored on the resume document as `minhash`; the share of equal entries
+between two signatures estimates the Jaccard similarity of their
+shingles.
+
+For sub-linear lookup the signature is split into BANDS bands of ROWS
+values, and each band is hashed into a key stored in `lsh_bands` (a
+multikey index in Mongo). Resumes sharing any band key are candidates,
+which are then checked against DUPLICATE_THRESHOLD on the full
+signature. With 16 bands of 8 rows, pairs at 0.8 similarity share a band
+about 95% of the time, pairs at 0.5 about 6%.
+"""
+import hashlib
+import logging
+import zlib
+
+import numpy as np
+from django.conf import settings
+from pymongo.errors import PyMongoError
+
+from .metrics import counters
+from .scoring import resume_text, tokenize
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+# Fewer shingles than this (an empty draft) gives no signature
+MIN_SHINGLES = 5
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+# Candidates checked per lookup, so a popular template cannot make it linear
+MAX_CANDIDATES = 200
+
+# Fixed permutations: signatures stored in Mongo must stay comparable.
+# a < 2**31 and x < 2**32 keep a * x + b inside 64 bits.
+_rng = np.random.RandomState(20240519)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+
+def _threshold():
+    return getattr(settings, "RESUME_DUPLICATE_THRESHOLD", 0.8)
+
+
+def shingle_hashes(text):
+    """32-bit hashes of the distinct word 3-grams of `text`."""
+    tokens = tokenize(text)
+    shingles = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(shingle.encode()) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+
+
+def minhash(details):
+    """The MinHash signature of `resume_details`, or None when it has too little text."""
+    hashes = shingle_hashes(resume_text(details or {}))
+    if len(hashes) < MIN_SHINGLES:
+        return None
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % MERSENNE_PRIME & MAX_HASH
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def band_keys(signature):
+    """One LSH key per band; equal keys mean an identical band."""
+    rows = np.asarray(signature, dtype=np.uint32).reshape(BANDS, ROWS)
+    return [f"{band}:{hashlib.blake2b(row.tobytes(), digest_size=8).hexdigest()}" for band, row in enumerate(rows)]
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(np.asarray(first, dtype=np.uint32) == np.asarray(second, dtype=np.uint32)))
+
+
+def signature_fields(details):
+    """The fields stored on a resume document for duplicate detection."""
+    signature = minhash(details)
+    if signature is None:
+        return {"minhash": None, "lsh_bands": []}
+    return {"minhash": signature.tolist(), "lsh_bands": band_keys(signature)}
+
+
+def find_duplicates(collection, fields, exclude_id=None, threshold=None):
+    """
+    Resumes in `collection` whose signature is within `threshold` of
+    `fields` (from `signature_fields`), as (resume id, similarity) pairs,
+    most similar first. Only resumes sharing an LSH band are read.
+    """
+    if not fields.get("lsh_bands"):
+        return []
+    threshold = _threshold() if threshold is None else threshold
+    query = {"lsh_bands": {"$in": fields["lsh_bands"]}}
+    if exclude_id is not None:
+        query["_id"] = {"$ne": exclude_id}
+
+    matches = []
+    for candidate in collection.find(query, {"minhash": 1}).limit(MAX_CANDIDATES):
+        score = similarity(fields["minhash"], candidate["minhash"])
+        if score >= threshold:
+            matches.append((str(candidate["_id"]), round(score, 3)))
+    matches.sort(key=lambda match: match[1], reverse=True)
+    return matches
+
+
+def duplicates_among(documents, fields, threshold=None):
+    """
+    Ids of the documents in `documents` (not yet stored, so not in the
+    collection's index) whose signature is within `threshold` of `fields`.
+    """
+    if not fields.get("lsh_bands"):
+        return []
+    threshold = _threshold() if threshold is None else threshold
+    bands = set(fields["lsh_bands"])
+    return [
+        document["_id"] for document in documents
+        if bands.intersection(document.get("lsh_bands") or [])
+        and similarity(fields["minhash"], document["minhash"]) >= threshold
+    ]
+
+
+def flag_duplicates(collection, fields, exclude_id=None):
+    """
+    `find_duplicates` for a request handler: returns the ids of likely
+    duplicates, or an empty list if the lookup fails.
+    """
+    try:
+        duplicates = [resume_id for resume_id, _ in find_duplicates(collection, fields, exclude_id)]
+    except PyMongoError as e:
+        logger.warning(f"Duplicate lookup failed: {str(e)}")
+        counters.incr("dedup.lookup_errors")
+        return []
+    if duplicates:
+        counters.incr("dedup.flagged")
+    return duplicates
+
+
+def duplicate_clusters(collection, threshold=None):
+    """
+    Group all resumes into clusters of near-duplicates. Band keys are
+    grouped in Mongo, so only resumes that share a band with another are
+    read; candidate pairs are then checked on their full signatures and
+    joined transitively. Returns lists of (resume id, resume) sorted
+    largest cluster first, where each resume holds `user_id` and `title`.
+    """
+    threshold = _threshold() if threshold is None else threshold
+    buckets = collection.aggregate([
+        {"$match": {"lsh_bands.0": {"$exists": True}}},
+        {"$unwind": "$lsh_bands"},
+        {"$group": {"_id": "$lsh_bands", "ids": {"$push": "$_id"}}},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ], allowDiskUse=True)
+
+    # Each bucket member is checked against the bucket's first member rather
+    # than every other member, so a template copied a thousand times stays
+    # linear; members linked through another band still end up joined.
+    pairs = set()
+    for bucket in buckets:
+        first, *others = sorted(bucket["ids"], key=str)
+        pairs.update((first, other) for other in others)
+    if not pairs:
+        return []
+
+    members = {resume_id for pair in pairs for resume_id in pair}
+    resumes = {
+        resume["_id"]: resume
+        for resume in collection.find({"_id": {"$in": list(members)}}, {"minhash": 1, "user_id": 1, "title": 1})
+    }
+
+    parent = {}
+
+    def root(resume_id):
+        while parent.get(resume_id, resume_id) != resume_id:
+            resume_id = parent[resume_id]
+        return resume_id
+
+    for first, second in pairs:
+        if first not in resumes or second not in resumes:
+            continue
+        if similarity(resumes[first]["minhash"], resumes[second]["minhash"]) >= threshold:
+            parent[root(second)] = root(first)
+
+    clusters = {}
+    for resume_id in parent:
+        clusters.setdefault(root(resume_id), set()).add(resume_id)
+    for cluster_root in list(clusters):
+        clusters[cluster_root].add(cluster_root)
+    return sorted(
+        ([(str(resume_id), resumes[resume_id]) for resume_id in sorted(cluster, key=str)] for cluster in clusters.values()),
+        key=len, reverse=True,
+    )
@@ -0,0 +1,211 @@
+import io
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+import gridfs
+
+from .metrics import counters
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class ExtractionJobQueue:
+    """
+    Mongo-backed queue of resume extraction jobs served by a bounded pool of
+    background threads.
+
+    The uploaded file is kept in GridFS until the job finishes. Workers claim
+    jobs with a lease, so a job whose worker died is picked up again once its
+    lease expires, after a restart or by another process. `handler` is called
+    as `handler(file_obj, file_extension)` and its return value is stored as
+    the job result.
+    """
+
+    def __init__(self, collection, fs, handler, workers=2, lease_seconds=300,
+                 max_attempts=3, ttl_seconds=24 * 3600, poll_interval=2.0):
+        self._collection = collection
+        self._fs = fs
+        self._handler = handler
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.ttl_seconds = ttl_seconds
+        self.poll_interval = poll_interval
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._index_ready = False
+
+    def _ensure_indexes(self):
+        if self._index_ready:
+            return
+        self._collection.create_index([("status", 1), ("created_at", 1)])
+        self._collection.create_index("finished_at", expireAfterSeconds=self.ttl_seconds)
+        self._index_ready = True
+
+    def start(self):
+        """
+        Start the worker threads once per process. Called when the app is
+        ready (see apps.py), so jobs queued before a restart are picked up
+        without waiting for a request.
+        """
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker_loop, name=f"resume-extract-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, data, filename, file_extension):
+        """Store the upload and queue it. Returns the job id."""
+        self._ensure_indexes()
+        now = datetime.now(timezone.utc)
+        file_id = self._fs.put(data, filename=filename)
+        job_id = str(ObjectId())
+        self._collection.insert_one({
+            "_id": job_id,
+            "status": QUEUED,
+            "filename": filename,
+            "file_extension": file_extension,
+            "file_id": file_id,
+            "attempts": 0,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        })
+        counters.incr("extraction_jobs.submitted")
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        """Return the public view of a job, or None if it does not exist."""
+        self.start()
+        job = self._collection.find_one({"_id": job_id})
+        if not job:
+            return None
+
+        # A worker died while running the last allowed attempt
+        lease_expires_at = job.get("lease_expires_at")
+        if (job["status"] == RUNNING and lease_expires_at
+                and job.get("attempts", 0) >= self.max_attempts
+                and _as_utc(lease_expires_at) < datetime.now(timezone.utc)):
+            error = "Worker stopped while processing the file"
+            self._finish(job_id, job.get("file_id"), FAILED, error=error)
+            job.update(status=FAILED, error=error)
+
+        return {
+            "job_id": job["_id"],
+            "status": job["status"],
+            "result": job.get("result"),
+            "error": job.get("error"),
+            "created_at": job.get("created_at"),
+            "updated_at": job.get("updated_at"),
+        }
+
+    def _claim(self):
+        now = datetime.now(timezone.utc)
+        return self._collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": QUEUED},
+                    {"status": RUNNING, "lease_expires_at": {"$lt": now}},
+                ],
+                "attempts": {"$lt": self.max_attempts},
+            },
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def _finish(self, job_id, file_id, status, result=None, error=None):
+        now = datetime.now(timezone.utc)
+        self._collection.update_one(
+            {"_id": job_id},
+            {"$set": {
+                "status": status,
+                "result": result,
+                "error": error,
+                "updated_at": now,
+                "finished_at": now,
+            }},
+        )
+        if file_id is not None:
+            try:
+                self._fs.delete(file_id)
+            except gridfs.errors.NoFile:
+                pass
+
+    def run_job(self, job):
+        """Run one claimed job and record its outcome."""
+        try:
+            data = self._fs.get(ObjectId(job["file_id"])).read()
+            result = self._handler(io.BytesIO(data), job["file_extension"])
+        except Exception as e:
+            logger.error(f"Extraction job {job['_id']} failed: {str(e)}")
+            if job.get("attempts", 0) >= self.max_attempts:
+                self._finish(job["_id"], job["file_id"], FAILED, error=str(e))
+                counters.incr("extraction_jobs.failed")
+            else:
+                self._collection.update_one(
+                    {"_id": job["_id"]},
+                    {"$set": {"status": QUEUED, "error": str(e),
+                              "updated_at": datetime.now(timezone.utc)}},
+                )
+                counters.incr("extraction_jobs.retried")
+            return
+
+        self._finish(job["_id"], job["file_id"], DONE, result=result)
+        counters.incr("extraction_jobs.completed")
+
+    def work_once(self):
+        """
+        Claim and run one job. Returns whether there was one. Errors are
+        logged, never raised, so a worker thread outlives any single job.
+        """
+        try:
+            job = self._claim()
+        except Exception as e:
+            logger.warning(f"Could not claim extraction job: {str(e)}")
+            return False
+        if not job:
+            return False
+
+        try:
+            self.run_job(job)
+        except PyMongoError as e:
+            # The lease expires and another worker retries the job
+            logger.warning(f"Could not record extraction job {job['_id']}: {str(e)}")
+        except Exception as e:
+            logger.error(f"Extraction job {job['_id']} could not be finished: {str(e)}")
+        return True
+
+    def _worker_loop(self):
+        while True:
+            if not self.work_once():
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+
+def _as_utc(value):
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
@@ -0,0 +1,361 @@
+"""
+LLM backends for resume parsing.
+
+Callers go through `get_llm_client()`, which wraps the configured backend
+(RESUME_LLM_BACKEND) with per-attempt timeouts, an overall deadline,
+jittered exponential backoff and a circuit breaker. `FakeBackend` answers
+locally with simulated latency so the pipeline can be load-tested offline.
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+import google.generativeai as genai
+from django.conf import settings
+from google.api_core import exceptions as google_exceptions
+
+from .metrics import counters
+from .prompts import RESUME_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+GEMINI_MODEL_NAME = "gemini-2.0-flash"
+
+# Errors worth retrying; bad keys or requests fail the same way every time
+GEMINI_TRANSIENT_ERRORS = (
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.TooManyRequests,
+    google_exceptions.InternalServerError,
+    TimeoutError,
+    ConnectionError,
+)
+
+
+class LLMError(Exception):
+    """Raised when the LLM gave no usable answer within its retries and deadline."""
+
+
+class CircuitOpenError(LLMError):
+    """Raised without calling the backend while the circuit breaker is open."""
+
+
+class LLMBackend:
+    """
+    Interface for text generation backends. `generate` sends one ResumePrompt
+    and returns the raw response text, raising on failure or timeout;
+    `stream` yields the same text in chunks as it is generated.
+    """
+
+    name = ""
+
+    def generate(self, prompt, timeout):
+        raise NotImplementedError
+
+    def stream(self, prompt, timeout):
+        """Yield the response text in chunks. Backends without streaming send it whole."""
+        yield self.generate(prompt, timeout)
+
+    def is_retryable(self, error):
+        return True
+
+
+class GeminiBackend(LLMBackend):
+    """Gemini through google.generativeai, with one model per system instruction."""
+
+    name = "gemini"
+
+    def __init__(self, model_name, api_key=None):
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _model(self, system_instruction):
+        with self._lock:
+            model = self._models.get(system_instruction)
+            if model is None:
+                model = self._models[system_instruction] = genai.GenerativeModel(
+                    self.model_name, system_instruction=system_instruction
+                )
+            return model
+
+    def generate(self, prompt, timeout):
+        response = self._model(prompt.system_instruction).generate_content(
+            prompt.text, request_options={"timeout": timeout}
+        )
+        return response.text
+
+    def stream(self, prompt, timeout):
+        response = self._model(prompt.system_instruction).generate_content(
+            prompt.text, stream=True, request_options={"timeout": timeout}
+        )
+        for chunk in response:
+            yield chunk.text
+
+    def is_retryable(self, error):
+        return isinstance(error, GEMINI_TRANSIENT_ERRORS)
+
+
+def _empty_value(schema):
+    if isinstance(schema, dict):
+        return {key: _empty_value(value) for key, value in schema.items()}
+    if isinstance(schema, list):
+        return []
+    return ""
+
+
+class FakeBackend(LLMBackend):
+    """
+    Offline stand-in for load tests. Sleeps for `latency` seconds (plus up to
+    `jitter`), fails a `failure_rate` fraction of calls, and returns an empty
+    but schema-valid JSON object for the requested sections. `sleep` is
+    injectable so tests do not wait.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency=0.5, jitter=0.2, failure_rate=0.0, sleep=time.sleep):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._sleep = sleep
+
+    def _response(self, prompt):
+        return json.dumps({section: _empty_value(RESUME_SCHEMA[section]) for section in prompt.sections})
+
+    def _delay(self, timeout):
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay > timeout:
+            self._sleep(timeout)
+            raise TimeoutError("Fake LLM call timed out")
+        return delay
+
+    def _maybe_fail(self):
+        if random.random() < self.failure_rate:
+            raise ConnectionError("Simulated LLM failure")
+
+    def generate(self, prompt, timeout):
+        self._sleep(self._delay(timeout))
+        self._maybe_fail()
+        return self._response(prompt)
+
+    def stream(self, prompt, timeout, chunks=8):
+        delay = self._delay(timeout)
+        self._maybe_fail()
+        response = self._response(prompt)
+        size = -(-len(response) // chunks)
+        for start in range(0, len(response), size):
+            self._sleep(delay / chunks)
+            yield response[start:start + size]
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failed calls and rejects
+    calls for `reset_timeout` seconds. After that one trial call is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(f"LLM circuit opened after {self._failures} consecutive failures")
+                    counters.incr("llm.circuit_trips")
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+    def release(self):
+        """End a call with no outcome, e.g. a stream its reader closed; a half-open circuit takes another trial."""
+        with self._lock:
+            self._trial_running = False
+
+
+class LLMClient:
+    """
+    Calls a backend with a per-attempt `timeout`, retrying retryable errors
+    with full-jitter exponential backoff until `max_attempts` or the overall
+    `deadline` (seconds) is reached. `sleep` waits out the backoff and is
+    injectable for tests.
+    """
+
+    def __init__(self, backend, timeout=20, deadline=45, max_attempts=3, backoff_base=0.5,
+                 backoff_max=4, breaker=None, sleep=time.sleep):
+        self.backend = backend
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self._sleep = sleep
+
+    def _check_breaker(self):
+        if not self.breaker.allow():
+            counters.incr("llm.rejected")
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+    def _retry_after(self, error, attempt, deadline):
+        """Log a failed attempt and sleep before the next one. False means give up."""
+        counters.incr("llm.errors")
+        logger.warning(f"{self.backend.name} call failed (attempt {attempt}/{self.max_attempts}): {str(error)}")
+        if not self.backend.is_retryable(error):
+            return False
+
+        backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        if attempt == self.max_attempts or time.monotonic() + backoff >= deadline:
+            return False
+        counters.incr("llm.retries")
+        self._sleep(backoff)
+        return True
+
+    def _attempts(self):
+        """Yield `(attempt, timeout, deadline)` while the overall deadline allows another attempt."""
+        deadline = time.monotonic() + self.deadline
+        for attempt in range(1, self.max_attempts + 1):
+            timeout = min(self.timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                return
+            counters.incr("llm.attempts")
+            yield attempt, timeout, deadline
+
+    def _give_up(self, error):
+        self.breaker.record_failure()
+        raise LLMError(f"{self.backend.name} call failed: {str(error)}") from error
+
+    def complete(self, prompt):
+        self._check_breaker()
+        last_error = TimeoutError("deadline reached")
+        for attempt, timeout, deadline in self._attempts():
+            try:
+                text = self.backend.generate(prompt, timeout)
+                self.breaker.record_success()
+                return text
+            except Exception as e:
+                last_error = e
+                if not self._retry_after(e, attempt, deadline):
+                    break
+        self._give_up(last_error)
+
+    def stream(self, prompt):
+        """
+        Yield response text chunks as the backend produces them. Failures are
+        only retried before the first chunk; after that the partial answer
+        cannot be taken back, so the error is raised as LLMError.
+        """
+        self._check_breaker()
+        settled = False
+        try:
+            last_error = TimeoutError("deadline reached")
+            for attempt, timeout, deadline in self._attempts():
+                started = False
+                try:
+                    for chunk in self.backend.stream(prompt, timeout):
+                        started = True
+                        yield chunk
+                    settled = True
+                    self.breaker.record_success()
+                    return
+                except Exception as e:
+                    last_error = e
+                    if started or not self._retry_after(e, attempt, deadline):
+                        break
+            settled = True
+            self._give_up(last_error)
+        finally:
+            if not settled:
+                # Closed early (GeneratorExit is not an Exception): free the trial slot
+                self.breaker.release()
+
+    def stats(self):
+        return {"backend": self.backend.name, "circuit": self.breaker.state}
+
+
+BACKENDS = {
+    "gemini": lambda: GeminiBackend(
+        GEMINI_MODEL_NAME,
+        api_key=os.getenv("REACT_APP_GEMINI_API_KEY"),
+    ),
+    "fake": lambda: FakeBackend(
+        latency=getattr(settings, "RESUME_FAKE_LLM_LATENCY", 0.5),
+        jitter=getattr(settings, "RESUME_FAKE_LLM_JITTER", 0.2),
+        failure_rate=getattr(settings, "RESUME_FAKE_LLM_FAILURE_RATE", 0.0),
+    ),
+}
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """The process-wide LLMClient for RESUME_LLM_BACKEND, created on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                backend = BACKENDS[getattr(settings, "RESUME_LLM_BACKEND", "gemini")]()
+                _client = LLMClient(
+                    backend,
+                    timeout=getattr(settings, "RESUME_LLM_TIMEOUT", 20),
+                    deadline=getattr(settings, "RESUME_LLM_DEADLINE", 45),
+                    max_attempts=getattr(settings, "RESUME_LLM_MAX_ATTEMPTS", 3),
+                    backoff_base=getattr(settings, "RESUME_LLM_BACKOFF_BASE", 0.5),
+                    backoff_max=getattr(settings, "RESUME_LLM_BACKOFF_MAX", 4),
+                    breaker=CircuitBreaker(
+                        failure_threshold=getattr(settings, "RESUME_LLM_BREAKER_FAILURES", 5),
+                        reset_timeout=getattr(settings, "RESUME_LLM_BREAKER_RESET", 30),
+                    ),
+                )
+    return _client
+
+
+def reset_llm_client():
+    """Drop the process-wide client so the next call rebuilds it from settings."""
+    global _client
+    with _client_lock:
+        _client = None
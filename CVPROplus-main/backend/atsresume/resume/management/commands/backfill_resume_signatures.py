@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+
+from resume.dedup import signature_fields
+from resume.views import resume_collection
+
+
+class Command(BaseCommand):
+    help = "Compute MinHash signatures and LSH band keys for resumes stored without them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--all", action="store_true", help="Recompute signatures that already exist")
+
+    def handle(self, *args, **options):
+        resume_collection.create_index("lsh_bands")
+        query = {} if options["all"] else {"minhash": {"$exists": False}}
+        updates = []
+        count = 0
+        for resume in resume_collection.find(query, {"resume_details": 1}):
+            updates.append(UpdateOne({"_id": resume["_id"]}, {"$set": signature_fields(resume.get("resume_details"))}))
+            if len(updates) >= options["batch_size"]:
+                resume_collection.bulk_write(updates, ordered=False)
+                count += len(updates)
+                updates = []
+        if updates:
+            resume_collection.bulk_write(updates, ordered=False)
+            count += len(updates)
+        self.stdout.write(self.style.SUCCESS(f"Updated signatures of {count} resumes"))
@@ -0,0 +1,51 @@
+import io
+import time
+import tracemalloc
+
+import docx
+from django.core.management.base import BaseCommand
+
+from resume.benchmarks.corpus import synthetic_docx
+from resume.docx_text import extract_docx_text
+
+
+def python_docx_text(data):
+    """The previous extractor: body paragraphs through the python-docx object model."""
+    document = docx.Document(io.BytesIO(data))
+    return "\n".join(paragraph.text for paragraph in document.paragraphs).strip()
+
+
+class Command(BaseCommand):
+    help = "Compare python-docx and streaming XML text extraction on synthetic DOCX resumes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 20, 50])
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per extractor; the best run is reported")
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'pages':>6} {'layout':<11} {'extractor':<11} {'best ms':>9} {'peak KiB':>9} {'chars':>8}"
+        )
+        for page_count in options["pages"]:
+            for tables in (False, True):
+                data = synthetic_docx(page_count, tables=tables)
+                for label, extract in (("python-docx", python_docx_text), ("streaming", extract_docx_text)):
+                    best, peak, chars = self._measure(extract, data, options["repeat"])
+                    self.stdout.write(
+                        f"{page_count:>6} {'tables' if tables else 'paragraphs':<11} {label:<11} "
+                        f"{best * 1000:>9.1f} {peak / 1024:>9.0f} {chars:>8}"
+                    )
+
+    def _measure(self, extract, data, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            text = extract(data)
+            timings.append(time.perf_counter() - started)
+
+        # Measured on a separate run: tracing allocations slows extraction down
+        tracemalloc.start()
+        extract(data)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return min(timings), peak, len(text)
@@ -0,0 +1,69 @@
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from resume.benchmarks.corpus import build_corpus
+from resume.benchmarks.runner import run_benchmark
+from resume.llm import reset_llm_client
+
+
+class Command(BaseCommand):
+    help = (
+        "Time each stage of resume extraction (upload, PDF/DOCX text, sections, spaCy, LLM) "
+        "on a synthetic corpus, using the fake LLM backend."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, nargs="+", default=[1, 2, 5, 10])
+        parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus")
+        parser.add_argument("--seed", type=int, default=0, help="Corpus seed; the same seed gives the same files")
+        parser.add_argument("--llm-latency", type=float, default=0.0,
+                            help="Seconds the fake LLM takes per call (default: measure overhead only)")
+        parser.add_argument("--output", default="bench-extraction.json", help="Where to write the JSON results")
+
+    def handle(self, *args, **options):
+        # Never spend real LLM calls on a benchmark
+        settings.RESUME_LLM_BACKEND = "fake"
+        settings.RESUME_FAKE_LLM_LATENCY = options["llm_latency"]
+        settings.RESUME_FAKE_LLM_JITTER = 0.0
+        reset_llm_client()
+
+        documents = build_corpus(options["pages"], seed=options["seed"])
+        results = run_benchmark(documents, repeat=options["repeat"])
+        results["run"] = {
+            "commit": self._commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "pages": options["pages"],
+            "seed": options["seed"],
+            "llm_latency": options["llm_latency"],
+        }
+
+        self.stdout.write(f"{'stage':<18} {'count':>6} {'docs/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for stage, summary in results["stages"].items():
+            self.stdout.write(
+                f"{stage:<18} {summary['count']:>6} {summary['throughput_per_second']:>9.1f} "
+                f"{summary['p50_ms']:>9.1f} {summary['p95_ms']:>9.1f} {summary['p99_ms']:>9.1f}"
+            )
+        self.stdout.write("")
+        for layout, summary in results["layouts"].items():
+            self.stdout.write(f"{layout:<18} total p50 {summary['p50_ms']:.1f} ms, p95 {summary['p95_ms']:.1f} ms")
+        self.stdout.write(f"peak RSS: {results['peak_rss_mb']:.1f} MiB")
+
+        with open(options["output"], "w") as output:
+            json.dump(results, output, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,41 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand
+
+from resume.benchmarks.corpus import synthetic_pdf
+from resume.metrics import counters
+from resume.utils import extract_pdf_pages
+
+
+class Command(BaseCommand):
+    help = "Compare the pdfplumber and auto (PyPDF2 with pdfplumber fallback) PDF engines on synthetic resumes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, nargs="+", default=[1, 2, 5, 10, 20])
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per engine; the best run is reported")
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'pages':>6} {'columns':>8} {'pdfplumber p/s':>15} {'auto p/s':>9} {'speedup':>8} {'fallback':>9}"
+        )
+        for page_count in options["pages"]:
+            for columns in (1, 2):
+                data = synthetic_pdf(page_count, columns=columns)
+                plumber = self._best(data, "pdfplumber", options["repeat"])
+                fallback_before = counters.get("pdf.pdfplumber_pages")
+                auto = self._best(data, "auto", options["repeat"])
+                fallback = (counters.get("pdf.pdfplumber_pages") - fallback_before) // options["repeat"]
+                self.stdout.write(
+                    f"{page_count:>6} {columns:>8} {page_count / plumber:>15.1f} {page_count / auto:>9.1f} "
+                    f"{plumber / auto:>7.1f}x {fallback:>4}/{page_count:<4}"
+                )
+
+    def _best(self, data, engine, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            # Serial on both sides, so only the engines are compared
+            extract_pdf_pages(io.BytesIO(data), parallel_min_pages=0, engine=engine)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
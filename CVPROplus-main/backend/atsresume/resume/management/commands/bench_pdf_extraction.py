@@ -0,0 +1,45 @@
+import io
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from resume.benchmarks.corpus import synthetic_pdf
+from resume.utils import extract_pdf_pages
+
+
+class Command(BaseCommand):
+    help = "Compare serial and parallel pdfplumber text extraction on synthetic multi-page resumes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, nargs="+", default=[1, 2, 5, 10, 20, 40])
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per mode; the best run is reported")
+        parser.add_argument("--workers", type=int, help="Override RESUME_PDF_WORKERS for this run")
+
+    def handle(self, *args, **options):
+        if options["workers"]:
+            settings.RESUME_PDF_WORKERS = options["workers"]
+
+        self.stdout.write(f"{'pages':>6} {'serial s':>10} {'parallel s':>11} {'pages/s serial':>15} {'pages/s parallel':>17} {'speedup':>8}")
+
+        # Start the process pool before timing so its start-up cost is not
+        # charged to the first measurement.
+        extract_pdf_pages(io.BytesIO(synthetic_pdf(2)), parallel_min_pages=1, engine="pdfplumber")
+
+        for page_count in options["pages"]:
+            data = synthetic_pdf(page_count)
+            serial = self._best(data, 0, options["repeat"])
+            parallel = self._best(data, 1, options["repeat"])
+            self.stdout.write(
+                f"{page_count:>6} {serial:>10.3f} {parallel:>11.3f} "
+                f"{page_count / serial:>15.1f} {page_count / parallel:>17.1f} {serial / parallel:>7.2f}x"
+            )
+
+    def _best(self, data, parallel_min_pages, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            pages = extract_pdf_pages(io.BytesIO(data), parallel_min_pages=parallel_min_pages, engine="pdfplumber")
+            timings.append(time.perf_counter() - started)
+            assert all(pages), "synthetic pages should all contain text"
+        return min(timings)
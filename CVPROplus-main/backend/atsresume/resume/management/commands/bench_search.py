@@ -0,0 +1,51 @@
+import time
+from unittest.mock import MagicMock
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from resume.benchmarks.corpus import synthetic_resume_details
+from resume.search import SearchIndex, resume_terms
+
+QUERIES = [
+    "python django postgresql",
+    "Senior backend engineer with Python, Django REST Framework, PostgreSQL, Redis, Docker and Kubernetes",
+    "machine learning engineer tensorflow pytorch pandas numpy",
+    "react typescript frontend developer",
+    "devops aws terraform k8s ci/cd pipelines",
+    "data analyst sql tableau power bi excel statistics",
+]
+
+
+class Command(BaseCommand):
+    help = "Measure BM25 candidate search latency on synthetic resumes, in memory (no Mongo)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--resumes", type=int, default=100000)
+        parser.add_argument("--repeat", type=int, default=20, help="Runs of each query")
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        documents = []
+        for seq, resume in enumerate(synthetic_resume_details(options["resumes"], seed=options["seed"]), start=1):
+            terms = resume_terms(resume["resume_details"])
+            documents.append({"_id": resume["_id"], "seq": seq, "terms": terms,
+                              "length": sum(count for _, count in terms), "deleted": False})
+        self.stdout.write(f"terms for {len(documents)} resumes: {time.perf_counter() - started:.1f}s")
+
+        index = SearchIndex(MagicMock(), MagicMock())
+        started = time.perf_counter()
+        index.load_documents(documents)
+        self.stdout.write(f"index build: {time.perf_counter() - started:.2f}s, {index.stats()}")
+
+        self.stdout.write(f"{'query':<60} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for query in QUERIES:
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                index.search(query, options["limit"])
+                timings.append((time.perf_counter() - started) * 1000)
+            p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+            self.stdout.write(f"{query[:60]:<60} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from db_connection import get_mongo_connection
+from db_indexes import ensure_indexes
+
+
+class Command(BaseCommand):
+    help = "Create the MongoDB indexes used by the resume, admins and authentication apps."
+
+    def handle(self, *args, **options):
+        results = ensure_indexes(get_mongo_connection())
+        failed = [(collection, name, error) for collection, name, error in results if error]
+        for collection, name, error in failed:
+            self.stderr.write(f"{collection}.{name}: {error}")
+        if failed:
+            raise CommandError(f"{len(failed)} of {len(results)} indexes could not be created")
+        self.stdout.write(self.style.SUCCESS(f"Ensured {len(results)} indexes"))
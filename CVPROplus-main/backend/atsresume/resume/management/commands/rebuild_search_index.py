@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from resume.search import get_search_index
+from resume.views import resume_collection
+
+
+class Command(BaseCommand):
+    help = "Recompute the BM25 search terms of every resume and rebuild the candidate search index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Term documents written per bulk write")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = get_search_index().rebuild(resume_collection, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {count} resumes in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from resume.similar import get_similarity_matrix
+from resume.views import resume_collection
+
+
+class Command(BaseCommand):
+    help = "Recompute every resume's similarity vector and write a compact similarity matrix."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Resumes read from Mongo per batch")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        resumes = (
+            (resume["_id"], resume.get("resume_details"))
+            for resume in resume_collection.find({}, {"resume_details": 1}).batch_size(options["batch_size"])
+        )
+        count = get_similarity_matrix().rebuild(resumes)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {count} resume vectors in {time.perf_counter() - started:.1f}s"
+        ))
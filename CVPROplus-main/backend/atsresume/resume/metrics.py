@@ -0,0 +1,39 @@
+import threading
+from collections import defaultdict
+
+
+class Counters:
+    """
+    Thread-safe, process-local counters for the resume pipeline.
+    Names are dotted strings such as "parse_cache.misses".
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = defaultdict(int)
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._values[name] += amount
+
+    def get(self, name):
+        with self._lock:
+            return self._values.get(name, 0)
+
+    def snapshot(self):
+        """Return the counters grouped by their first dotted component."""
+        with self._lock:
+            values = dict(self._values)
+
+        grouped = {}
+        for name, value in sorted(values.items()):
+            group, _, key = name.partition(".")
+            grouped.setdefault(group, {})[key or group] = value
+        return grouped
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+counters = Counters()
@@ -0,0 +1,174 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from pymongo.errors import PyMongoError
+
+from .llm import GEMINI_MODEL_NAME
+from .metrics import counters
+from .singleflight import SingleFlight
+from .utils import PROMPT_VERSION, normalize_spaces
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(text, variant=""):
+    """
+    Hash of the normalized resume text plus the backend, model and prompt
+    version. `variant` separates parses of the same text with different prompts.
+    """
+    backend = getattr(settings, "RESUME_LLM_BACKEND", "gemini")
+    payload = f"{backend}:{GEMINI_MODEL_NAME}\0{PROMPT_VERSION}\0{variant}\0{normalize_spaces(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ParseCache:
+    """
+    Two-tier cache for structured resume parses.
+
+    The first tier is an in-process LRU capped at `max_entries`. The second
+    tier is a Mongo collection whose documents expire through a TTL index on
+    `created_at`, so a parse done by one worker is reused by the others.
+    Mongo failures are logged and treated as misses; the cache never fails
+    a request.
+
+    Concurrent misses for the same key in one process share a single parse.
+    With `leases` (a MongoLease), processes also coordinate: one parses and
+    the others wait up to `lease_wait` seconds for its result.
+    """
+
+    def __init__(self, collection, max_entries=256, ttl_seconds=7 * 24 * 3600,
+                 leases=None, lease_wait=60, lease_poll_interval=0.5):
+        self._collection = collection
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._flights = SingleFlight()
+        self._leases = leases
+        self.lease_wait = lease_wait
+        self.lease_poll_interval = lease_poll_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._index_ready = False
+
+    def _ensure_ttl_index(self):
+        if self._index_ready:
+            return
+        self._collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+        self._index_ready = True
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                counters.incr("parse_cache.memory_hits")
+                return self._entries[key]
+
+        result = self._get_from_mongo(key)
+        if result is not None:
+            counters.incr("parse_cache.mongo_hits")
+            return result
+
+        counters.incr("parse_cache.misses")
+        return None
+
+    def _get_from_mongo(self, key):
+        try:
+            document = self._collection.find_one({"_id": key}, {"result": 1, "created_at": 1})
+        except PyMongoError as e:
+            logger.warning(f"Parse cache lookup failed: {str(e)}")
+            document = None
+
+        # The TTL monitor only runs once a minute, so check expiry ourselves.
+        if document and document.get("created_at"):
+            created_at = document["created_at"]
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            if created_at + timedelta(seconds=self.ttl_seconds) > datetime.now(timezone.utc):
+                self._remember(key, document["result"])
+                return document["result"]
+        return None
+
+    def set(self, key, value):
+        self._remember(key, value)
+        try:
+            self._ensure_ttl_index()
+            self._collection.replace_one(
+                {"_id": key},
+                {"_id": key, "result": value, "created_at": datetime.now(timezone.utc)},
+                upsert=True,
+            )
+        except PyMongoError as e:
+            logger.warning(f"Parse cache write failed: {str(e)}")
+
+    def get_or_parse(self, text, parse_fn, variant=""):
+        """
+        Return the cached parse for `text`, calling `parse_fn(text)` on a miss.
+        Empty text and failed parses (None) are never cached.
+        """
+        if not text or not text.strip():
+            return parse_fn(text)
+
+        key = make_cache_key(text, variant)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        # Identical requests already in flight in this process share one call
+        return self._flights.do(key, lambda: self._parse(key, text, parse_fn))
+
+    def _parse(self, key, text, parse_fn):
+        if self._leases is None:
+            return self._parse_and_store(key, text, parse_fn)
+
+        # Another process may be parsing the same text: wait for its result
+        # to reach the Mongo tier instead of paying for a second LLM call.
+        deadline = time.monotonic() + self.lease_wait
+        while not self._leases.acquire(key):
+            counters.incr("parse_cache.lease_waits")
+            time.sleep(self.lease_poll_interval)
+            result = self._get_from_mongo(key)
+            if result is not None:
+                return result
+            if time.monotonic() >= deadline:
+                return self._parse_and_store(key, text, parse_fn)
+
+        try:
+            return self._parse_and_store(key, text, parse_fn)
+        finally:
+            self._leases.release(key)
+
+    def _parse_and_store(self, key, text, parse_fn):
+        result = parse_fn(text)
+        if result is not None:
+            self.set(key, result)
+        return result
+
+    def clear(self):
+        """Drop the in-process tier. The Mongo tier expires on its own."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "memory_entries": size,
+            "max_entries": self.max_entries,
+            "memory_hits": counters.get("parse_cache.memory_hits"),
+            "mongo_hits": counters.get("parse_cache.mongo_hits"),
+            "misses": counters.get("parse_cache.misses"),
+            "in_flight": self._flights.in_flight(),
+            "coalesced": counters.get("singleflight.shared"),
+            "lease_waits": counters.get("parse_cache.lease_waits"),
+        }
@@ -0,0 +1,137 @@
+"""
+JSON Patch (RFC 6902) edits of `resume_details`, applied as one atomic
+Mongo update.
+
+Patch paths are relative to `resume_details` and become dotted Mongo
+paths ("/experience/0/title" is "resume_details.experience.0.title"):
+
+- `replace`, and `add` to an object member, become `$set`;
+- `add` to an array index becomes a `$push` at that `$position`, and to
+  "-" an append; a numeric last segment in `add` is always an array index;
+- `remove` of an object member becomes `$unset`;
+- `test` becomes an equality condition on the update's filter, and
+  `replace`/`remove` also require their target to exist, so a patch that
+  does not apply to the stored resume changes nothing.
+
+Every condition is checked against the stored resume as it was before the
+patch, not after the operations listed before it, so a `test` of a path an
+earlier operation writes is rejected. A query `$eq` on an array matches any
+element, so a `test` with an array value compares the whole array in an
+`$expr` (which cannot follow array indices: such paths are rejected), and a
+`test` with any other value never matches an array.
+
+`move`, `copy` and removing an array element by index cannot be written
+as a single update without reading the document, and are rejected with
+422; replace the array instead.
+"""
+from rest_framework.parsers import JSONParser
+
+ROOT = "resume_details"
+SUPPORTED_OPS = ("add", "remove", "replace", "test")
+
+
+class JsonPatchParser(JSONParser):
+    media_type = "application/json-patch+json"
+
+
+class PatchError(Exception):
+    """A patch that cannot be applied, with the HTTP status to answer with."""
+
+    def __init__(self, message, status=422):
+        super().__init__(message)
+        self.status = status
+
+
+def _segments(path):
+    if not isinstance(path, str) or not path.startswith("/"):
+        raise PatchError(f"Invalid path {path!r}", 400)
+    segments = [segment.replace("~1", "/").replace("~0", "~") for segment in path[1:].split("/")]
+    for segment in segments:
+        if not segment or "." in segment or segment.startswith("$"):
+            raise PatchError(f"Path {path!r} has a segment that cannot be stored")
+    return segments
+
+
+def _overlaps(first, second):
+    shorter, longer = sorted((first, second), key=len)
+    return longer == shorter or longer.startswith(shorter + ".")
+
+
+def patch_to_update(operations, max_operations=100):
+    """
+    Translate a JSON Patch into `(conditions, update)`: filter conditions
+    that must hold for the patch to apply, and the Mongo update document.
+    Raises PatchError for malformed (400) or unsupported (422) patches.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise PatchError("A JSON Patch must be a non-empty list of operations", 400)
+    if len(operations) > max_operations:
+        raise PatchError(f"A patch may have at most {max_operations} operations", 400)
+
+    conditions, sets, unsets, pushes = {}, {}, {}, {}
+    array_tests = []
+    written = []
+
+    def write(path):
+        for other in written:
+            if _overlaps(path, other):
+                raise PatchError(f"Operations on {path!r} and {other!r} overlap")
+        written.append(path)
+
+    for operation in operations:
+        if not isinstance(operation, dict) or "op" not in operation or "path" not in operation:
+            raise PatchError("Each operation needs an op and a path", 400)
+        op = operation["op"]
+        if op not in SUPPORTED_OPS:
+            raise PatchError(f"Unsupported operation {op!r}")
+        if op != "remove" and "value" not in operation:
+            raise PatchError(f"{op} needs a value", 400)
+
+        segments = _segments(operation["path"])
+        if "-" in segments[:-1] or (segments[-1] == "-" and op != "add"):
+            raise PatchError("'-' is only valid as the last segment of add")
+        path = ".".join([ROOT] + segments)
+
+        if op == "test":
+            if any(_overlaps(path, other) for other in written):
+                raise PatchError(f"test of {operation['path']!r} after an operation on it is not supported")
+            value = operation["value"]
+            if isinstance(value, list):
+                if any(segment.isdigit() for segment in segments):
+                    raise PatchError("Testing an array inside an array element is not supported")
+                array_tests.append({"$eq": ["$" + path, {"$literal": value}]})
+            else:
+                # $eq compares documents literally, so a value cannot act as a query operator
+                conditions[path] = {"$eq": value, "$not": {"$type": "array"}}
+        elif op == "add" and (segments[-1] == "-" or segments[-1].isdigit()):
+            array = ".".join([ROOT] + segments[:-1])
+            if segments[-1] == "-" and array in pushes and "$position" not in pushes[array]:
+                pushes[array]["$each"].append(operation["value"])
+                continue
+            write(array)
+            pushes[array] = {"$each": [operation["value"]]}
+            if segments[-1] != "-":
+                pushes[array]["$position"] = int(segments[-1])
+        elif op == "remove":
+            if segments[-1].isdigit():
+                raise PatchError("Removing an array element by index is not supported; replace the array instead")
+            write(path)
+            conditions.setdefault(path, {"$exists": True})
+            unsets[path] = ""
+        else:
+            write(path)
+            if op == "replace":
+                conditions.setdefault(path, {"$exists": True})
+            sets[path] = operation["value"]
+
+    if array_tests:
+        conditions["$expr"] = {"$and": array_tests}
+
+    update = {}
+    if sets:
+        update["$set"] = sets
+    if unsets:
+        update["$unset"] = unsets
+    if pushes:
+        update["$push"] = pushes
+    return conditions, update
@@ -0,0 +1,130 @@
+"""
+PDF text engines.
+
+The fast engine reads each page's text stream with PyPDF2 and records
+where every piece of text is drawn. Pages where that output looks poor
+(no text, garbled characters, text drawn out of reading order, or several
+columns) are flagged so they can be re-extracted with pdfplumber, whose
+layout analysis is much slower but orders text by position.
+"""
+import io
+import re
+from collections import Counter
+
+import PyPDF2
+
+ENGINES = ("auto", "pypdf", "pdfplumber")
+
+GARBLED_RE = re.compile(r"\(cid:\d+\)|\ufffd|[\x00-\x08\x0b\x0c\x0e-\x1f]")
+# Share of garbled characters, or mean word length, past which a page is unreadable
+MAX_GARBLED_RATIO = 0.02
+MAX_MEAN_WORD_LENGTH = 20
+# Layout checks need a few lines of text to say anything
+MIN_TEXT_CHUNKS = 8
+# Text drawn this far (in points) above the previous chunk counts as a jump back up the page
+BACKWARD_JUMP = 20
+MAX_BACKWARD_SHARE = 0.1
+# A column is a left edge shared by this share of the lines, this far from the others
+MIN_COLUMN_SHARE = 0.2
+MIN_COLUMN_GAP = 0.25
+COLUMN_BUCKET = 10
+
+EMPTY = "empty"
+GARBLED = "garbled"
+OUT_OF_ORDER = "out_of_order"
+MULTI_COLUMN = "multi_column"
+
+
+class PageText:
+    """
+    Text of one page from the fast engine. `problem` names why the text
+    should not be trusted, and `columns` holds the x positions where the
+    columns of a multi-column page start, left to right.
+    """
+
+    def __init__(self, text, problem=None, columns=()):
+        self.text = text
+        self.problem = problem
+        self.columns = list(columns)
+
+
+def _column_starts(points, width):
+    """Left edges shared by many lines, if they are far enough apart to be columns."""
+    buckets = Counter(round(x / COLUMN_BUCKET) for x, _ in points)
+    lefts = {}
+    for x, _ in points:
+        bucket = round(x / COLUMN_BUCKET)
+        lefts[bucket] = min(x, lefts.get(bucket, x))
+    common = sorted(lefts[bucket] for bucket, count in buckets.items() if count >= MIN_COLUMN_SHARE * len(points))
+    starts = common[:1]
+    for x in common[1:]:
+        if x - starts[-1] >= MIN_COLUMN_GAP * width:
+            starts.append(x)
+    return starts if len(starts) > 1 else []
+
+
+def page_problem(text, points, width):
+    """
+    Judge fast-engine output for one page. `points` are the (x, y) drawing
+    positions of its text chunks in content-stream order. Returns
+    `(problem, columns)`; problem is None when the text can be used as is.
+    """
+    stripped = text.strip()
+    if not stripped:
+        return EMPTY, []
+
+    words = stripped.split()
+    garbled = len(GARBLED_RE.findall(stripped))
+    if garbled > MAX_GARBLED_RATIO * len(stripped) or len(stripped) / len(words) > MAX_MEAN_WORD_LENGTH:
+        return GARBLED, []
+
+    if len(points) < MIN_TEXT_CHUNKS:
+        return None, []
+
+    columns = _column_starts(points, width)
+    if columns:
+        return MULTI_COLUMN, columns
+
+    backward = sum(1 for (_, y1), (_, y2) in zip(points, points[1:]) if y2 - y1 > BACKWARD_JUMP)
+    if backward > MAX_BACKWARD_SHARE * len(points):
+        return OUT_OF_ORDER, []
+    return None, []
+
+
+def fast_pages(source):
+    """Extract every page with PyPDF2. `source` is a path, file object or bytes."""
+    reader = PyPDF2.PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+    pages = []
+    for page in reader.pages:
+        points = []
+
+        def visit(text, cm, tm, font_dict, font_size):
+            if text.strip():
+                # Text space to page space: the text matrix origin through the CTM
+                points.append((
+                    cm[0] * tm[4] + cm[2] * tm[5] + cm[4],
+                    cm[1] * tm[4] + cm[3] * tm[5] + cm[5],
+                ))
+
+        text = page.extract_text(visitor_text=visit) or ""
+        problem, columns = page_problem(text, points, float(page.mediabox.width))
+        pages.append(PageText(text, problem, columns))
+    return pages
+
+
+def plumber_page_text(page, columns=()):
+    """
+    Text of a pdfplumber page. With `columns`, each column is cropped and
+    read on its own, left to right, so lines from side-by-side columns are
+    not merged.
+    """
+    if not columns:
+        return page.extract_text() or ""
+
+    edges = [page.bbox[0]] + [x - 2 for x in columns[1:]] + [page.bbox[2]]
+    parts = []
+    for left, right in zip(edges, edges[1:]):
+        text = page.crop((left, page.bbox[1], right, page.bbox[3])).extract_text()
+        if text:
+            parts.append(text)
+    return "\n".join(parts)
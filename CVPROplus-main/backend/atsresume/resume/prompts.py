@@ -0,0 +1,223 @@
+"""
+Prompt construction for Gemini resume parsing.
+
+The schema and extraction rules are static, so they are rendered once per
+set of requested sections and sent as the model's system instruction. Only
+the cleaned resume text changes between requests, and it is kept within a
+token budget by dropping repeated header/footer lines, then low-value
+sections, before truncating.
+"""
+import json
+import re
+from collections import Counter
+from functools import lru_cache
+
+# Output schema requested from Gemini, one entry per top-level section
+RESUME_SCHEMA = {
+    "personal": {
+        "name": "string",
+        "email": "string",
+        "phone": "string",
+        "address": "string",
+        "summary": "string or null",
+    },
+    "skills": ["string"],
+    "experience": [
+        {
+            "jobTitle": "string",
+            "company": "string",
+            "startDate": "MM/YYYY",
+            "endDate": "MM/YYYY or null (if current)",
+            "location": "string",
+            "tasks": ["string"]
+        }
+    ],
+    "projects": [
+        {
+            "name": "string",
+            "tasks": ["string"],
+            "technologies": ["string"]
+        }
+    ],
+    "education": [
+        {
+            "institution": "string",
+            "graduation_date": "MM/YYYY",
+            "course": "string",
+            "location": "string"
+        }
+    ]
+}
+
+SECTION_INSTRUCTIONS = {
+    "personal": [
+        "Name",
+        "Email",
+        "Phone Number only in 10 digits",
+        "Address",
+        "Summary (Ensure it's extracted properly. If missing, return null.)",
+    ],
+    "skills": ["Skills (as a list)"],
+    "experience": ["Experience (Job Title, Company, Start Date, End Date, Location, Description as separate tasks)"],
+    "projects": ["Projects (Title, Description as separate tasks, Technologies used)"],
+    "education": ["Education (Institution, Graduation Date, Course, Location)"],
+}
+
+SECTION_ALIASES = {
+    "summary": ["summary", "profile", "professional summary", "objective", "career objective", "about me"],
+    "skills": ["skills", "technical skills", "key skills", "core skills", "core competencies", "technologies"],
+    "experience": ["experience", "work experience", "professional experience", "employment history", "work history"],
+    "projects": ["projects", "personal projects", "academic projects", "key projects"],
+    "education": ["education", "academic background", "education and training", "qualifications"],
+}
+
+# Sections the schema has no field for, dropped first (in this order) when
+# a resume is over the token budget
+LOW_VALUE_SECTIONS = {
+    "references": ["references", "referees", "references available upon request"],
+    "declaration": ["declaration", "personal declaration"],
+    "hobbies": ["hobbies", "interests", "hobbies and interests", "personal interests"],
+    "personal details": ["personal details", "personal information", "personal profile"],
+    "activities": ["extracurricular activities", "activities", "volunteering", "volunteer experience"],
+    "languages": ["languages", "languages known"],
+    "awards": ["awards", "honors", "honours", "achievements", "awards and achievements"],
+    "certifications": ["certifications", "certificates", "courses", "training"],
+}
+
+KNOWN_HEADINGS = {
+    alias: name
+    for groups in (SECTION_ALIASES, LOW_VALUE_SECTIONS)
+    for name, aliases in groups.items()
+    for alias in aliases
+}
+
+# Only explicit markers ("Page 2", "Page 2 of 3", "Page 2/3", "2 of 3"): a
+# line holding just a number may be a phone number, a year or a date
+PAGE_MARKER_RE = re.compile(r"^(?:page\s*\d+(?:\s*(?:of|/)\s*\d+)?|\d+\s+of\s+\d+)$", re.IGNORECASE)
+CHARS_PER_TOKEN = 4
+# Short lines seen this often are likely page headers or footers, but can
+# be job titles or locations too, so they are only dropped to fit the budget
+REPEATED_LINE_MIN_COUNT = 3
+REPEATED_LINE_MAX_LENGTH = 80
+
+
+class ResumePrompt:
+    """A built prompt plus the size information reported for each request."""
+
+    def __init__(self, sections, system_instruction, text, original_tokens, trimmed=()):
+        self.sections = sections
+        self.system_instruction = system_instruction
+        self.text = text
+        self.original_tokens = original_tokens
+        self.trimmed = list(trimmed)
+
+    @property
+    def tokens(self):
+        return estimate_tokens(self.system_instruction) + estimate_tokens(self.text)
+
+
+def estimate_tokens(text):
+    """Rough token count for Gemini: about four characters per token."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+@lru_cache(maxsize=32)
+def system_instruction(sections):
+    """Render the static part of the prompt for a tuple of schema sections."""
+    instructions = "\n".join(
+        f"- {instruction}" for section in sections for instruction in SECTION_INSTRUCTIONS[section]
+    )
+    schema = {section: RESUME_SCHEMA[section] for section in sections}
+    return (
+        "Extract the following details from the resume the user sends:\n"
+        f"{instructions}\n"
+        "Reply with valid JSON only, in this structure:\n"
+        f"{json.dumps(schema, separators=(',', ':'))}"
+    )
+
+
+def _heading(line):
+    key = re.sub(r"[^a-z ]", "", line.lower()).strip()
+    return KNOWN_HEADINGS.get(" ".join(key.split()))
+
+
+def clean_resume_text(text):
+    """Collapse whitespace and drop blank lines and explicit page markers."""
+    lines = [" ".join(line.split()) for line in text.splitlines()]
+    return "\n".join(line for line in lines if line and not PAGE_MARKER_RE.match(line))
+
+
+def drop_repeated_lines(text):
+    """
+    Drop all but the first copy of short lines seen REPEATED_LINE_MIN_COUNT
+    times or more, as page headers and footers are. The first copy is kept
+    since it is often the candidate's name or contact details.
+    """
+    lines = text.split("\n")
+    counts = Counter(line for line in lines if len(line) <= REPEATED_LINE_MAX_LENGTH)
+    repeated = {line for line, count in counts.items() if count >= REPEATED_LINE_MIN_COUNT}
+    seen = set()
+    cleaned = []
+    for line in lines:
+        if line in repeated:
+            if line in seen:
+                continue
+            seen.add(line)
+        cleaned.append(line)
+    return "\n".join(cleaned)
+
+
+def _split_by_heading(text):
+    """Split cleaned text into `(heading, lines)` blocks; the first heading is None."""
+    blocks = [[None, []]]
+    for line in text.split("\n"):
+        heading = _heading(line)
+        if heading:
+            blocks.append([heading, [line]])
+        else:
+            blocks[-1][1].append(line)
+    return blocks
+
+
+def fit_to_budget(text, token_budget):
+    """
+    Return `(text, trimmed)` with `text` under `token_budget` tokens.
+    Repeated header/footer lines go first, then low-value sections; if that
+    is not enough the text is cut at a line boundary. `trimmed` names what
+    was removed.
+    """
+    if not token_budget or estimate_tokens(text) <= token_budget:
+        return text, []
+
+    trimmed = []
+    deduplicated = drop_repeated_lines(text)
+    if deduplicated != text:
+        text = deduplicated
+        trimmed.append("repeated lines")
+        if estimate_tokens(text) <= token_budget:
+            return text, trimmed
+
+    blocks = _split_by_heading(text)
+    for section in LOW_VALUE_SECTIONS:
+        if not any(heading == section for heading, _ in blocks):
+            continue
+        blocks = [block for block in blocks if block[0] != section]
+        trimmed.append(section)
+        text = "\n".join(line for _, lines in blocks for line in lines)
+        if estimate_tokens(text) <= token_budget:
+            return text, trimmed
+
+    limit = token_budget * CHARS_PER_TOKEN
+    cut = text.rfind("\n", 0, limit + 1)
+    text = text[:cut if cut > 0 else limit]
+    trimmed.append("truncated")
+    return text, trimmed
+
+
+def build_prompt(text, sections=None, token_budget=None):
+    """Build the Gemini prompt for `text`, limited to `sections` of RESUME_SCHEMA."""
+    sections = tuple(sections or RESUME_SCHEMA)
+    original_tokens = estimate_tokens(text)
+    cleaned = clean_resume_text(text)
+    cleaned, trimmed = fit_to_budget(cleaned, token_budget)
+    return ResumePrompt(sections, system_instruction(sections), cleaned, original_tokens, trimmed)
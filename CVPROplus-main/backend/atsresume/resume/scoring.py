@@ -0,0 +1,301 @@
+"""
+ATS match scoring of resumes against a job description.
+
+Scores are computed locally, without an LLM call. Both texts are
+tokenized, known skills are recognized through SKILL_LEXICON (including
+multi-word and aliased names such as "machine learning" or "k8s"), and
+every resume is compared with the job description in one NumPy pass:
+
+- keyword coverage: the weighted share of the job description's
+  keywords (its skills, plus its most frequent other terms) that the
+  resume contains; skills weigh SKILL_WEIGHT times more than other terms.
+- similarity: cosine similarity of sublinear TF-IDF vectors, with IDF
+  taken over the job description and the resumes being scored.
+
+The score (0-100) blends the two, COVERAGE_WEIGHT towards coverage.
+"""
+import re
+from collections import Counter
+
+import numpy as np
+
+# Canonical skill names and the ways they are written. Aliases that are also
+# common English words ("go", "rest", "excel") are left out or spelled out.
+SKILL_LEXICON = {
+    "Python": ["python", "python3"],
+    "Java": ["java"],
+    "JavaScript": ["javascript", "js", "ecmascript"],
+    "TypeScript": ["typescript", "ts"],
+    "C++": ["c++", "cpp"],
+    "C#": ["c#", "csharp"],
+    "Go": ["golang"],
+    "Rust": ["rust"],
+    "Ruby": ["ruby"],
+    "PHP": ["php"],
+    "Kotlin": ["kotlin"],
+    "Swift": ["swift"],
+    "Scala": ["scala"],
+    "MATLAB": ["matlab"],
+    "SQL": ["sql"],
+    "Bash": ["bash", "shell scripting"],
+    "HTML": ["html", "html5"],
+    "CSS": ["css", "css3"],
+    "Sass": ["sass", "scss"],
+    "Tailwind CSS": ["tailwind", "tailwindcss", "tailwind css"],
+    "Bootstrap": ["bootstrap"],
+    "React": ["react", "react.js", "reactjs"],
+    "React Native": ["react native", "react-native"],
+    "Redux": ["redux"],
+    "Angular": ["angular", "angularjs", "angular.js"],
+    "Vue.js": ["vue", "vue.js", "vuejs"],
+    "Next.js": ["next.js", "nextjs"],
+    "Node.js": ["node", "node.js", "nodejs"],
+    "Express": ["express.js", "expressjs"],
+    "Django": ["django"],
+    "Django REST Framework": ["django rest framework", "drf"],
+    "Flask": ["flask"],
+    "FastAPI": ["fastapi"],
+    "Spring": ["spring", "spring boot", "springboot"],
+    ".NET": ["dotnet", "asp.net", "dotnet core"],
+    "Ruby on Rails": ["rails", "ruby on rails"],
+    "Laravel": ["laravel"],
+    "GraphQL": ["graphql"],
+    "REST APIs": ["restful", "rest api", "rest apis", "restful api", "restful apis"],
+    "gRPC": ["grpc"],
+    "Microservices": ["microservices", "microservice"],
+    "PostgreSQL": ["postgresql", "postgres"],
+    "MySQL": ["mysql"],
+    "SQLite": ["sqlite"],
+    "Oracle": ["oracle"],
+    "SQL Server": ["sql server", "mssql"],
+    "MongoDB": ["mongodb", "mongo"],
+    "Redis": ["redis"],
+    "Elasticsearch": ["elasticsearch", "elastic search"],
+    "Cassandra": ["cassandra"],
+    "DynamoDB": ["dynamodb"],
+    "Kafka": ["kafka", "apache kafka"],
+    "RabbitMQ": ["rabbitmq"],
+    "Celery": ["celery"],
+    "Spark": ["spark", "apache spark", "pyspark"],
+    "Hadoop": ["hadoop"],
+    "Airflow": ["airflow", "apache airflow"],
+    "AWS": ["aws", "amazon web services"],
+    "Azure": ["azure", "microsoft azure"],
+    "GCP": ["gcp", "google cloud", "google cloud platform"],
+    "Docker": ["docker"],
+    "Kubernetes": ["kubernetes", "k8s"],
+    "Terraform": ["terraform"],
+    "Ansible": ["ansible"],
+    "Jenkins": ["jenkins"],
+    "GitHub Actions": ["github actions"],
+    "CI/CD": ["ci/cd", "ci cd", "cicd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "Git": ["git"],
+    "Linux": ["linux", "unix"],
+    "Nginx": ["nginx"],
+    "Machine Learning": ["machine learning", "ml"],
+    "Deep Learning": ["deep learning"],
+    "NLP": ["nlp", "natural language processing"],
+    "Computer Vision": ["computer vision"],
+    "Data Science": ["data science"],
+    "Data Analysis": ["data analysis", "data analytics"],
+    "Statistics": ["statistics", "statistical analysis"],
+    "TensorFlow": ["tensorflow"],
+    "PyTorch": ["pytorch"],
+    "Keras": ["keras"],
+    "scikit-learn": ["scikit-learn", "sklearn", "scikit learn"],
+    "Pandas": ["pandas"],
+    "NumPy": ["numpy"],
+    "spaCy": ["spacy"],
+    "LLMs": ["llm", "llms", "large language models"],
+    "Tableau": ["tableau"],
+    "Power BI": ["power bi", "powerbi"],
+    "Excel": ["microsoft excel", "ms excel"],
+    "Figma": ["figma"],
+    "UI/UX": ["ui/ux", "ux", "user experience"],
+    "Jira": ["jira"],
+    "Agile": ["agile"],
+    "Scrum": ["scrum"],
+    "Unit Testing": ["unit testing", "unit tests"],
+    "Pytest": ["pytest"],
+    "Jest": ["jest"],
+    "Selenium": ["selenium"],
+    "Cypress": ["cypress"],
+    "Android": ["android"],
+    "iOS": ["ios"],
+    "Flutter": ["flutter"],
+    "OAuth": ["oauth", "oauth2"],
+    "Security": ["cybersecurity", "application security"],
+    "System Design": ["system design", "distributed systems"],
+    "Project Management": ["project management"],
+    "Communication": ["communication skills"],
+    "Leadership": ["leadership"],
+}
+
+STOPWORDS = frozenset("""
+a about above across after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each either etc even every few for from further had
+has have having he her here hers him his how i if in into is it its itself just least less like made make many
+may me might more most must my no nor not now of off on once one only or other our ours out over own per please
+same shall she should so some such than that the their theirs them then there these they this those through to
+too under until up upon us use used using very via was we were what when where whether which while who whom why
+will with within without would yet you your yours
+ability able across apply candidate candidates company competitive degree experience experienced equivalent
+excellent familiarity good great help ideal including job knowledge looking new opportunity plus position preferred
+required requirement requirements responsibilities responsible role skills strong team teams understanding work
+working world year years
+""".split())
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[.\-][a-z0-9]+)*[+#]*")
+# Resume fields that carry no skills or experience
+IGNORED_FIELDS = frozenset((
+    "email", "phone", "address", "linkedin", "github", "website", "location",
+    "startDate", "endDate", "graduationDate", "graduation_date",
+))
+
+SKILL_WEIGHT = 2.0
+COVERAGE_WEIGHT = 0.7
+# Non-skill terms of the job description that count as keywords
+MAX_JD_TERMS = 15
+MIN_TERM_LENGTH = 3
+
+
+def tokenize(text):
+    text = text.lower().replace(".net", " dotnet")
+    return TOKEN_RE.findall(text)
+
+
+def _singular(word):
+    """Fold simple plurals ("engineers", "pipelines") onto the singular."""
+    if len(word) > 4 and word.endswith("s") and not word.endswith(("ss", "us", "is")) and word.isalpha():
+        return word[:-1]
+    return word
+
+
+def _build_phrases():
+    phrases = {}
+    for skill, aliases in SKILL_LEXICON.items():
+        for alias in aliases:
+            phrases[tuple(tokenize(alias))] = skill
+    return phrases, max(len(phrase) for phrase in phrases)
+
+
+SKILL_PHRASES, MAX_PHRASE_TOKENS = _build_phrases()
+
+
+def extract_terms(text):
+    """
+    Return the terms of `text` in order: known skills as "skill:<name>"
+    (longest alias first, so "react native" is not also "react"), and the
+    remaining words, singular, that are not stopwords or numbers.
+    """
+    tokens = tokenize(text)
+    terms = []
+    i = 0
+    while i < len(tokens):
+        for size in range(min(MAX_PHRASE_TOKENS, len(tokens) - i), 0, -1):
+            skill = SKILL_PHRASES.get(tuple(tokens[i:i + size]))
+            if skill:
+                terms.append(f"skill:{skill}")
+                i += size
+                break
+        else:
+            token = _singular(tokens[i])
+            if len(token) >= MIN_TERM_LENGTH and token not in STOPWORDS and not token.isdigit():
+                terms.append(token)
+            i += 1
+    return terms
+
+
+def resume_text(details):
+    """Flatten the text fields of `resume_details`, leaving out contact details and dates."""
+    parts = []
+
+    def walk(value):
+        if isinstance(value, str):
+            parts.append(value)
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if key not in IGNORED_FIELDS:
+                    walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+
+    walk(details)
+    return "\n".join(parts)
+
+
+def _label(term):
+    return term[6:] if term.startswith("skill:") else term
+
+
+def job_keywords(terms):
+    """The job description's keywords and their weights: every skill, then its most frequent other terms."""
+    counts = Counter(terms)
+    skills = [term for term in counts if term.startswith("skill:")]
+    words = [term for term, _ in Counter(
+        {term: count for term, count in counts.items() if not term.startswith("skill:")}
+    ).most_common(MAX_JD_TERMS)]
+    keywords = skills + words
+    weights = np.array([
+        (SKILL_WEIGHT if term.startswith("skill:") else 1.0) * (1 + np.log(counts[term]))
+        for term in keywords
+    ])
+    return keywords, weights
+
+
+def score_texts(job_description, texts):
+    """
+    Score each of `texts` against `job_description`. Returns one dict per
+    text, in order, with the score, its two components and the matched
+    and missing keywords (highest weight first).
+    """
+    jd_terms = extract_terms(job_description)
+    doc_terms = [extract_terms(text) for text in texts]
+    keywords, weights = job_keywords(jd_terms)
+
+    vocabulary = {}
+    rows, columns = [], []
+    for row, terms in enumerate([jd_terms] + doc_terms):
+        for term in terms:
+            rows.append(row)
+            columns.append(vocabulary.setdefault(term, len(vocabulary)))
+    counts = np.zeros((len(texts) + 1, max(len(vocabulary), 1)))
+    np.add.at(counts, (rows, columns), 1)
+
+    # Sublinear TF with smoothed IDF, as in scikit-learn's TfidfVectorizer
+    present = counts > 0
+    tf = np.where(present, 1 + np.log(np.maximum(counts, 1)), 0.0)
+    idf = np.log((1 + len(counts)) / (1 + present.sum(axis=0))) + 1
+    vectors = tf * idf
+    norms = np.linalg.norm(vectors, axis=1)
+    norms[norms == 0] = 1
+    vectors /= norms[:, None]
+    similarity = vectors[1:] @ vectors[0]
+
+    if keywords:
+        order = np.argsort(-weights, kind="stable")
+        keyword_columns = np.array([vocabulary[term] for term in keywords])
+        matched = present[1:, keyword_columns]
+        coverage = matched @ weights / weights.sum()
+    else:
+        order = np.array([], dtype=int)
+        matched = np.zeros((len(texts), 0), dtype=bool)
+        coverage = np.zeros(len(texts))
+
+    scores = np.rint(100 * (COVERAGE_WEIGHT * coverage + (1 - COVERAGE_WEIGHT) * similarity))
+    results = []
+    for i in range(len(texts)):
+        results.append({
+            "score": int(scores[i]),
+            "keyword_coverage": round(float(coverage[i]), 3),
+            "similarity": round(float(similarity[i]), 3),
+            "matched_keywords": [_label(keywords[k]) for k in order if matched[i, k]],
+            "missing_keywords": [_label(keywords[k]) for k in order if not matched[i, k]],
+        })
+    return results
+
+
+def score_resumes(job_description, resumes_details):
+    """Score stored `resume_details` documents against a job description."""
+    return score_texts(job_description, [resume_text(details or {}) for details in resumes_details])
@@ -0,0 +1,376 @@
+"""
+BM25 candidate search over all resumes.
+
+Each resume's searchable text (summary, skills, experience, projects and
+education) is turned into terms with the ATS scorer's tokenizer, so skill
+aliases match ("k8s" finds "Kubernetes"). Term counts are persisted per
+resume in Mongo (`search_terms`), each write stamped with an increasing
+sequence number. Every process keeps an in-memory index built from those
+documents and catches up by reading the documents with a newer sequence.
+
+In memory, postings are stored in CSR form: one array of resume slots and
+one of term frequencies, sorted by term, with an offset per term. Resumes
+added since the arrays were built sit in a small delta segment that is
+merged in once it grows past DELTA_MERGE_SIZE. Updated and deleted
+resumes keep their old slot, masked out, until the next full build.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+
+from .metrics import counters
+from .scoring import extract_terms
+
+logger = logging.getLogger(__name__)
+
+K1 = 1.2
+B = 0.75
+DELTA_MERGE_SIZE = 2000
+# Sequence numbers are taken before the write lands, so a write can become
+# visible after a later one. Catching up re-reads this many sequences back.
+SYNC_OVERLAP = 1000
+SEQUENCE_ID = "search_terms"
+
+
+def _dicts(value):
+    return [item for item in value if isinstance(item, dict)] if isinstance(value, list) else []
+
+
+def _strings(value):
+    return [item for item in value if isinstance(item, str)] if isinstance(value, list) else []
+
+
+def searchable_text(details):
+    """
+    The parts of `resume_details` candidates are searched on. Values of the
+    wrong type, as an LLM or a client may send, are skipped.
+    """
+    details = details if isinstance(details, dict) else {}
+    personal = details.get("personal")
+    parts = [personal.get("summary") if isinstance(personal, dict) else None]
+    parts.extend(_strings(details.get("skills")))
+    for job in _dicts(details.get("experience")):
+        parts.append(job.get("jobTitle"))
+        parts.extend(_strings(job.get("tasks")))
+    for project in _dicts(details.get("projects")):
+        parts.append(project.get("name"))
+        parts.extend(_strings(project.get("tasks")))
+        parts.extend(_strings(project.get("technologies")))
+    for school in _dicts(details.get("education")):
+        parts.append(school.get("course"))
+        parts.append(school.get("institution"))
+    return "\n".join(part for part in parts if isinstance(part, str) and part)
+
+
+def resume_terms(details):
+    """Term frequencies of a resume, as stored in Mongo: a list of [term, count] pairs."""
+    return [[term, count] for term, count in Counter(extract_terms(searchable_text(details))).items()]
+
+
+class SearchIndex:
+    """
+    In-process BM25 index over the resumes in `terms_collection`, kept in
+    sync through the sequence counter in `meta_collection`.
+    """
+
+    def __init__(self, terms_collection, meta_collection, sync_interval=2.0):
+        self._collection = terms_collection
+        self._meta = meta_collection
+        self._sync_interval = sync_interval
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._last_sync = 0.0
+        self._synced_seq = 0
+        self._reset()
+
+    def _reset(self):
+        self._vocabulary = {}
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._post_slots = np.zeros(0, dtype=np.int32)
+        self._post_tfs = np.zeros(0, dtype=np.float32)
+        self._delta = {}
+        self._delta_docs = 0
+        self._slot_ids = []
+        self._slots = {}
+        self._seqs = {}
+        self._lengths = np.zeros(0, dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+
+    # Mongo side
+
+    def ensure_indexes(self):
+        self._collection.create_index([("seq", ASCENDING)])
+
+    def _next_seq(self, count=1):
+        sequence = self._meta.find_one_and_update(
+            {"_id": SEQUENCE_ID}, {"$inc": {"value": count}},
+            upsert=True, return_document=ReturnDocument.AFTER,
+        )
+        return sequence["value"]
+
+    def index_resume(self, resume_id, details):
+        """Store the terms of a created or updated resume and index them here."""
+        terms = resume_terms(details)
+        document = {
+            "_id": resume_id,
+            "seq": self._next_seq(),
+            "terms": terms,
+            "length": sum(count for _, count in terms),
+            "deleted": False,
+        }
+        self._collection.replace_one({"_id": resume_id}, document, upsert=True)
+        with self._lock:
+            if self._loaded:
+                self._apply([document])
+
+    def remove_resume(self, resume_id):
+        """Leave a tombstone for a deleted resume, so other processes drop it too."""
+        document = {"_id": resume_id, "seq": self._next_seq(), "terms": [], "length": 0, "deleted": True}
+        self._collection.replace_one({"_id": resume_id}, document, upsert=True)
+        with self._lock:
+            if self._loaded:
+                self._apply([document])
+
+    def rebuild(self, resume_collection, batch_size=1000):
+        """Recompute every resume's terms from `resume_collection` and rebuild this index."""
+        self.ensure_indexes()
+        started_seq = self._next_seq()
+        documents = []
+        batch = []
+
+        def flush():
+            first = self._next_seq(len(batch)) - len(batch) + 1
+            for offset, document in enumerate(batch):
+                document["seq"] = first + offset
+            self._collection.bulk_write(
+                [UpdateOne({"_id": doc["_id"]}, {"$set": doc}, upsert=True) for doc in batch], ordered=False
+            )
+            documents.extend(batch)
+            batch.clear()
+
+        for resume in resume_collection.find({}, {"resume_details": 1}):
+            terms = resume_terms(resume.get("resume_details"))
+            batch.append({
+                "_id": str(resume["_id"]), "terms": terms,
+                "length": sum(count for _, count in terms), "deleted": False,
+            })
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+
+        # Resumes deleted behind the index's back: not rewritten above, and not
+        # written by a request since the rebuild started
+        self._collection.update_many(
+            {"seq": {"$lt": started_seq}, "deleted": False},
+            {"$set": {"deleted": True, "terms": [], "length": 0, "seq": self._next_seq()}},
+        )
+
+        with self._lock:
+            self.load_documents(documents)
+            self._loaded = True
+            self._last_sync = time.monotonic()
+        return len(documents)
+
+    def _load(self):
+        self.ensure_indexes()
+        self.load_documents(self._collection.find({"deleted": False}))
+        self._loaded = True
+        self._last_sync = time.monotonic()
+
+    def sync(self, force=False):
+        """Load the index on first use, then pick up other processes' writes."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                return
+            if not force and time.monotonic() - self._last_sync < self._sync_interval:
+                return
+            changed = list(self._collection.find({"seq": {"$gt": self._synced_seq - SYNC_OVERLAP}}).sort("seq", 1))
+            self._apply(changed)
+            self._last_sync = time.monotonic()
+
+    # In-memory index
+
+    def load_documents(self, documents):
+        """Replace the in-memory index with `documents` (dicts shaped like the Mongo term documents)."""
+        with self._lock:
+            self._reset()
+            term_ids, slots, tfs = [], [], []
+            lengths = []
+            for document in documents:
+                self._synced_seq = max(self._synced_seq, document.get("seq", 0))
+                if document.get("deleted"):
+                    continue
+                slot = len(self._slot_ids)
+                self._slot_ids.append(document["_id"])
+                self._slots[document["_id"]] = slot
+                self._seqs[document["_id"]] = document.get("seq", 0)
+                lengths.append(document["length"])
+                if document["terms"]:
+                    terms, counts = zip(*document["terms"])
+                    term_ids.append(np.fromiter(
+                        (self._vocabulary.setdefault(term, len(self._vocabulary)) for term in terms),
+                        dtype=np.int32, count=len(terms),
+                    ))
+                    slots.append(np.full(len(terms), slot, dtype=np.int32))
+                    tfs.append(np.asarray(counts, dtype=np.float32))
+            self._lengths = np.asarray(lengths, dtype=np.float32)
+            self._alive = np.ones(len(lengths), dtype=bool)
+            self._build_postings(term_ids, slots, tfs)
+
+    def _build_postings(self, term_ids, slots, tfs):
+        if term_ids:
+            term_ids = np.concatenate(term_ids)
+            slots = np.concatenate(slots)
+            tfs = np.concatenate(tfs)
+        else:
+            term_ids = np.zeros(0, dtype=np.int32)
+            slots = np.zeros(0, dtype=np.int32)
+            tfs = np.zeros(0, dtype=np.float32)
+        order = np.argsort(term_ids, kind="stable")
+        self._post_slots = slots[order]
+        self._post_tfs = tfs[order]
+        self._offsets = np.zeros(len(self._vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(self._vocabulary)), out=self._offsets[1:])
+        self._delta = {}
+        self._delta_docs = 0
+
+    def _merge_delta(self):
+        """Fold the delta segment into the CSR arrays."""
+        term_ids = [np.repeat(np.arange(len(self._offsets) - 1, dtype=np.int32), np.diff(self._offsets))]
+        slots = [self._post_slots]
+        tfs = [self._post_tfs]
+        for term_id, (delta_slots, delta_tfs) in self._delta.items():
+            term_ids.append(np.full(len(delta_slots), term_id, dtype=np.int32))
+            slots.append(np.asarray(delta_slots, dtype=np.int32))
+            tfs.append(np.asarray(delta_tfs, dtype=np.float32))
+        self._build_postings(term_ids, slots, tfs)
+
+    def _apply(self, documents):
+        """Apply term documents newer than what this process has indexed."""
+        added = []
+        for document in documents:
+            resume_id = document["_id"]
+            seq = document.get("seq", 0)
+            self._synced_seq = max(self._synced_seq, seq)
+            if self._seqs.get(resume_id, -1) >= seq:
+                continue
+            self._seqs[resume_id] = seq
+            old_slot = self._slots.pop(resume_id, None)
+            if old_slot is not None:
+                self._alive[old_slot] = False
+            if not document.get("deleted"):
+                added.append(document)
+
+        if not added:
+            return
+        first_slot = len(self._slot_ids)
+        self._lengths = np.concatenate([self._lengths, np.asarray([doc["length"] for doc in added], dtype=np.float32)])
+        self._alive = np.concatenate([self._alive, np.ones(len(added), dtype=bool)])
+        for slot, document in enumerate(added, start=first_slot):
+            self._slot_ids.append(document["_id"])
+            self._slots[document["_id"]] = slot
+            for term, count in document["terms"]:
+                term_id = self._vocabulary.setdefault(term, len(self._vocabulary))
+                delta_slots, delta_tfs = self._delta.setdefault(term_id, ([], []))
+                delta_slots.append(slot)
+                delta_tfs.append(count)
+        # New terms have no CSR postings yet
+        if len(self._offsets) <= len(self._vocabulary):
+            self._offsets = np.concatenate([
+                self._offsets, np.full(len(self._vocabulary) + 1 - len(self._offsets), self._offsets[-1]),
+            ])
+        self._delta_docs += len(added)
+        if self._delta_docs >= DELTA_MERGE_SIZE:
+            self._merge_delta()
+
+    def _postings(self, term_id):
+        start, end = self._offsets[term_id], self._offsets[term_id + 1]
+        slots, tfs = self._post_slots[start:end], self._post_tfs[start:end]
+        if term_id in self._delta:
+            delta_slots, delta_tfs = self._delta[term_id]
+            slots = np.concatenate([slots, np.asarray(delta_slots, dtype=np.int32)])
+            tfs = np.concatenate([tfs, np.asarray(delta_tfs, dtype=np.float32)])
+        return slots, tfs
+
+    def search(self, query, limit=20):
+        """Return up to `limit` (resume id, BM25 score) pairs for a free-text query, best first."""
+        terms = list(dict.fromkeys(extract_terms(query)))
+        with self._lock:
+            alive_count = int(self._alive.sum())
+            term_ids = [self._vocabulary[term] for term in terms if term in self._vocabulary]
+            if not alive_count or not term_ids:
+                return []
+
+            avgdl = float(self._lengths[self._alive].mean()) or 1.0
+            norms = K1 * (1 - B + B * self._lengths / avgdl)
+            scores = np.zeros(len(self._lengths), dtype=np.float32)
+            for term_id in term_ids:
+                slots, tfs = self._postings(term_id)
+                live = self._alive[slots]
+                slots, tfs = slots[live], tfs[live]
+                if not len(slots):
+                    continue
+                idf = np.log(1 + (alive_count - len(slots) + 0.5) / (len(slots) + 0.5))
+                # Each resume has one posting per term, so the slots are unique
+                scores[slots] += idf * tfs * (K1 + 1) / (tfs + norms[slots])
+
+            candidates = np.flatnonzero(scores)
+            if len(candidates) > limit:
+                candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+            candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+            return [(self._slot_ids[slot], float(scores[slot])) for slot in candidates]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": self._loaded,
+                "resumes": int(self._alive.sum()),
+                "terms": len(self._vocabulary),
+                "postings": int(len(self._post_slots)),
+                "delta_resumes": self._delta_docs,
+                "synced_seq": self._synced_seq,
+            }
+
+
+_search_index = None
+_search_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """The process-wide search index, created on first use."""
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None:
+            from db_connection import get_mongo_connection
+            db = get_mongo_connection()
+            _search_index = SearchIndex(
+                db["search_terms"],
+                db["search_meta"],
+                sync_interval=getattr(settings, "RESUME_SEARCH_SYNC_INTERVAL", 2.0),
+            )
+        return _search_index
+
+
+def index_resume_safely(resume_id, details):
+    """Index a resume from a request handler; a failure is logged, not raised."""
+    try:
+        get_search_index().index_resume(resume_id, details)
+    except Exception as e:
+        # The resume is already stored; a search index problem must not fail the request
+        logger.warning(f"Could not index resume {resume_id}: {str(e)}")
+        counters.incr("search.index_errors")
+
+
+def remove_resume_safely(resume_id):
+    try:
+        get_search_index().remove_resume(resume_id)
+    except Exception as e:
+        logger.warning(f"Could not remove resume {resume_id} from the search index: {str(e)}")
+        counters.incr("search.index_errors")
@@ -0,0 +1,308 @@
+"""
+"More like this" over all resumes with hashed n-gram vectors.
+
+Each resume's text (`resume_details` without contact details or dates)
+becomes a fixed-width vector: word unigrams and bigrams plus character
+3-grams of each word are hashed into DIM buckets with a hashed sign,
+weighted by sublinear term frequency and L2-normalized, so the dot
+product of two vectors is their cosine similarity.
+
+All vectors live in one memory-mapped float32 matrix on disk, shared by
+every worker process, next to a memory-mapped array of the resume id of
+each row and a small JSON header. Writes take an exclusive file lock:
+an update overwrites the resume's row in place, a new resume is appended
+(the files grow by doubling), and a delete blanks its row. Readers
+reopen the files when the header's generation changes, under a shared
+lock so they never see a header and files from different generations.
+`rebuild` writes a compact copy without blank rows and swaps it in.
+"""
+import fcntl
+import json
+import logging
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+
+from .metrics import counters
+from .scoring import resume_text, tokenize
+
+logger = logging.getLogger(__name__)
+
+ID_DTYPE = "S24"  # Resume ids are ObjectId hex strings
+INITIAL_CAPACITY = 1024
+# Rows multiplied per step, so a query never holds more than this many scores at once
+BATCH_ROWS = 16384
+CHAR_NGRAM = 3
+
+
+def _hash(feature):
+    return zlib.crc32(feature.encode())
+
+
+def resume_features(details):
+    """Word unigrams and bigrams, and character 3-grams of each word."""
+    words = tokenize(resume_text(details or {}))
+    features = list(words)
+    features.extend(f"{first} {second}" for first, second in zip(words, words[1:]))
+    for word in words:
+        padded = f"<{word}>"
+        features.extend(f"#{padded[i:i + CHAR_NGRAM]}" for i in range(len(padded) - CHAR_NGRAM + 1))
+    return features
+
+
+def resume_vector(details, dim):
+    """The unit-length hashed feature vector of `resume_details` (all zeros for an empty resume)."""
+    features = resume_features(details)
+    vector = np.zeros(dim, dtype=np.float32)
+    if not features:
+        return vector
+    hashes = np.fromiter((_hash(feature) for feature in features), dtype=np.uint64, count=len(features))
+    buckets, counts = np.unique(hashes, return_counts=True)
+    # Low bits pick the column, one high bit the sign, so collisions tend to cancel out
+    columns = (buckets % dim).astype(np.int64)
+    signs = np.where((buckets >> np.uint64(31)) & np.uint64(1), -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, columns, signs * (1 + np.log(counts)).astype(np.float32))
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+class SimilarityMatrix:
+    """
+    The on-disk matrix of resume vectors in `directory`: `vectors.f32`,
+    `ids.bin` and `header.json`, guarded by `lock`.
+    """
+
+    def __init__(self, directory, dim=512):
+        self.directory = directory
+        self.dim = dim
+        self._local = threading.Lock()
+        self._generation = None
+        self._vectors = None
+        self._ids = None
+        self._rows = 0
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def _file_lock(self, shared=False):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path("lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_header(self):
+        try:
+            with open(self._path("header.json")) as header:
+                return json.load(header)
+        except FileNotFoundError:
+            return None
+
+    def _write_header(self, header):
+        temporary = self._path("header.json.tmp")
+        with open(temporary, "w") as output:
+            json.dump(header, output)
+        os.replace(temporary, self._path("header.json"))
+
+    def _create(self, capacity, suffix=""):
+        """Allocate empty files for `capacity` rows and return their memory maps."""
+        vectors = np.memmap(self._path("vectors.f32" + suffix), dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        ids = np.memmap(self._path("ids.bin" + suffix), dtype=ID_DTYPE, mode="w+", shape=(capacity,))
+        return vectors, ids
+
+    def _open(self, header):
+        """Map the files described by `header`, if they are not mapped already."""
+        if header is None:
+            self._vectors, self._ids, self._rows, self._generation = None, None, 0, None
+            return
+        if header["generation"] != self._generation:
+            if header["dim"] != self.dim:
+                raise ValueError(f"Similarity matrix has {header['dim']} columns, expected {self.dim}")
+            shape = (header["capacity"], self.dim)
+            self._vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r+", shape=shape)
+            self._ids = np.memmap(self._path("ids.bin"), dtype=ID_DTYPE, mode="r+", shape=(header["capacity"],))
+            self._generation = header["generation"]
+        self._rows = header["rows"]
+
+    def _refresh(self):
+        self._open(self._read_header())
+
+    def _refresh_shared(self):
+        """Refresh for a read. A mapped file stays readable after a writer replaces it."""
+        with self._file_lock(shared=True):
+            self._refresh()
+
+    def _grow(self, header):
+        """Double the capacity; rows are copied into new files swapped in under the lock."""
+        capacity = max(INITIAL_CAPACITY, header["capacity"] * 2)
+        vectors, ids = self._create(capacity, suffix=".tmp")
+        vectors[:header["rows"]] = self._vectors[:header["rows"]]
+        ids[:header["rows"]] = self._ids[:header["rows"]]
+        vectors.flush()
+        ids.flush()
+        del vectors, ids
+        os.replace(self._path("vectors.f32.tmp"), self._path("vectors.f32"))
+        os.replace(self._path("ids.bin.tmp"), self._path("ids.bin"))
+        header = dict(header, capacity=capacity, generation=header["generation"] + 1)
+        self._write_header(header)
+        self._open(header)
+        return header
+
+    def _row_of(self, resume_id):
+        matches = np.flatnonzero(self._ids[:self._rows] == resume_id.encode())
+        return int(matches[0]) if len(matches) else None
+
+    def upsert(self, resume_id, details):
+        """Write a created or updated resume's vector."""
+        vector = resume_vector(details, self.dim)
+        with self._local, self._file_lock():
+            header = self._read_header()
+            if header is None:
+                vectors, ids = self._create(INITIAL_CAPACITY)
+                del vectors, ids
+                header = {"dim": self.dim, "capacity": INITIAL_CAPACITY, "rows": 0,
+                          "generation": (self._generation or 0) + 1}
+                self._write_header(header)
+            self._open(header)
+
+            row = self._row_of(resume_id)
+            if row is None:
+                if header["rows"] >= header["capacity"]:
+                    header = self._grow(header)
+                row = header["rows"]
+                header = dict(header, rows=row + 1)
+            self._vectors[row] = vector
+            self._ids[row] = resume_id.encode()
+            self._vectors.flush()
+            self._ids.flush()
+            if header["rows"] != self._rows:
+                self._write_header(header)
+                self._open(header)
+
+    def remove(self, resume_id):
+        """Blank a deleted resume's row; `rebuild` reclaims it."""
+        with self._local, self._file_lock():
+            self._refresh()
+            if self._vectors is None:
+                return
+            row = self._row_of(resume_id)
+            if row is not None:
+                self._vectors[row] = 0
+                self._ids[row] = b""
+                self._vectors.flush()
+                self._ids.flush()
+
+    def rebuild(self, resumes):
+        """Write a compact matrix of `resumes` ((id, resume_details) pairs) and swap it in."""
+        with self._local, self._file_lock():
+            header = self._read_header()
+            generation = (header["generation"] if header else 0) + 1
+            capacity = INITIAL_CAPACITY
+            vectors, ids = self._create(capacity, suffix=".tmp")
+            rows = 0
+            for resume_id, details in resumes:
+                if rows == capacity:
+                    capacity *= 2
+                    vectors.flush()
+                    ids.flush()
+                    del vectors, ids
+                    vectors = np.memmap(self._path("vectors.f32.tmp"), dtype=np.float32, mode="r+",
+                                        shape=(capacity, self.dim))
+                    ids = np.memmap(self._path("ids.bin.tmp"), dtype=ID_DTYPE, mode="r+", shape=(capacity,))
+                vectors[rows] = resume_vector(details, self.dim)
+                ids[rows] = str(resume_id).encode()
+                rows += 1
+            vectors.flush()
+            ids.flush()
+            del vectors, ids
+            os.replace(self._path("vectors.f32.tmp"), self._path("vectors.f32"))
+            os.replace(self._path("ids.bin.tmp"), self._path("ids.bin"))
+            header = {"dim": self.dim, "capacity": capacity, "rows": rows, "generation": generation}
+            self._write_header(header)
+            self._open(header)
+            return rows
+
+    def most_similar(self, details, limit=10, exclude_id=None):
+        """
+        The `limit` resumes most similar to `resume_details`, as (resume id,
+        cosine similarity) pairs, best first. Rows are scored in batches of
+        BATCH_ROWS, keeping the best `limit` of each batch.
+        """
+        query = resume_vector(details, self.dim)
+        with self._local:
+            self._refresh_shared()
+            if self._vectors is None or not query.any():
+                return []
+            exclude = exclude_id.encode() if exclude_id else None
+            best_scores, best_rows = [], []
+            for start in range(0, self._rows, BATCH_ROWS):
+                end = min(start + BATCH_ROWS, self._rows)
+                scores = self._vectors[start:end] @ query
+                ids = self._ids[start:end]
+                scores[ids == b""] = -np.inf
+                if exclude is not None:
+                    scores[ids == exclude] = -np.inf
+                if end - start > limit:
+                    top = np.argpartition(-scores, limit - 1)[:limit]
+                else:
+                    top = np.arange(end - start)
+                best_scores.append(scores[top])
+                best_rows.append(top + start)
+            if not best_scores:
+                return []
+            scores = np.concatenate(best_scores)
+            rows = np.concatenate(best_rows)
+            order = np.argsort(-scores, kind="stable")[:limit]
+            return [
+                (self._ids[rows[i]].decode(), round(float(scores[i]), 4))
+                for i in order if np.isfinite(scores[i]) and scores[i] > 0
+            ]
+
+    def stats(self):
+        with self._local:
+            self._refresh_shared()
+            live = int(np.count_nonzero(self._ids[:self._rows])) if self._ids is not None else 0
+            return {"rows": self._rows, "resumes": live, "dim": self.dim}
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+
+
+def get_similarity_matrix():
+    """The process's handle on the shared similarity matrix, created on first use."""
+    global _matrix
+    with _matrix_lock:
+        if _matrix is None:
+            _matrix = SimilarityMatrix(
+                str(getattr(settings, "RESUME_SIMILAR_DIR", "var/similar")),
+                dim=getattr(settings, "RESUME_SIMILAR_DIM", 512),
+            )
+        return _matrix
+
+
+def upsert_similar_safely(resume_id, details):
+    """Update a resume's vector from a request handler; a failure is logged, not raised."""
+    try:
+        get_similarity_matrix().upsert(resume_id, details)
+    except Exception as e:
+        # The resume is already stored; a matrix problem must not fail the request
+        logger.warning(f"Could not update the similarity vector of resume {resume_id}: {str(e)}")
+        counters.incr("similar.update_errors")
+
+
+def remove_similar_safely(resume_id):
+    try:
+        get_similarity_matrix().remove(resume_id)
+    except Exception as e:
+        logger.warning(f"Could not remove resume {resume_id} from the similarity matrix: {str(e)}")
+        counters.incr("similar.update_errors")
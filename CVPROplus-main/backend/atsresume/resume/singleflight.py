@@ -0,0 +1,115 @@
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from .metrics import counters
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key.
+
+    The first caller for a key runs the function. Callers that arrive while
+    it is running wait and receive the same result or exception instead of
+    running it again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            counters.incr("singleflight.shared")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class MongoLease:
+    """
+    Short-lived ownership of a key shared by every worker process.
+
+    A lease is a document whose `_id` is the key. Creating it wins the lease,
+    an expired lease can be taken over, and a TTL index removes leases left
+    behind by crashed processes.
+    """
+
+    def __init__(self, collection, ttl_seconds=60):
+        self._collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{ObjectId()}"
+        self._index_ready = False
+
+    def _ensure_ttl_index(self):
+        if self._index_ready:
+            return
+        self._collection.create_index("expires_at", expireAfterSeconds=0)
+        self._index_ready = True
+
+    def acquire(self, key):
+        """Return True if this process now holds the lease for `key`."""
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=self.ttl_seconds)
+        try:
+            self._ensure_ttl_index()
+            self._collection.insert_one({"_id": key, "owner": self.owner, "expires_at": expires_at})
+            return True
+        except DuplicateKeyError:
+            pass
+        except PyMongoError as e:
+            # Without Mongo there is nothing to coordinate with
+            logger.warning(f"Could not acquire parse lease: {str(e)}")
+            return True
+
+        try:
+            taken = self._collection.find_one_and_update(
+                {"_id": key, "expires_at": {"$lt": now}},
+                {"$set": {"owner": self.owner, "expires_at": expires_at}},
+            )
+        except PyMongoError as e:
+            logger.warning(f"Could not take over parse lease: {str(e)}")
+            return True
+        return taken is not None
+
+    def release(self, key):
+        try:
+            self._collection.delete_one({"_id": key, "owner": self.owner})
+        except PyMongoError as e:
+            logger.warning(f"Could not release parse lease: {str(e)}")
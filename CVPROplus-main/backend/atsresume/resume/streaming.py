@@ -0,0 +1,63 @@
+import json
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class SectionScanner:
+    """
+    Incremental scanner for a JSON object arriving in chunks.
+
+    `feed()` returns the `(key, value)` members of the top-level object that
+    were completed by the new chunk, decoded with json. Anything before the
+    opening brace, such as a ```json fence, is ignored. `complete` turns
+    True once the closing brace has been seen.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.complete = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+
+    def feed(self, chunk):
+        self.text += chunk
+        members = []
+        while self._pos < len(self.text) and not self.complete:
+            char = self.text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._member_start = self._pos + 1
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char == "," and self._depth == 1:
+                members.extend(self._member(self._pos))
+            elif char in "}]":
+                if self._depth == 1:
+                    members.extend(self._member(self._pos))
+                    self.complete = True
+                self._depth -= 1
+            self._pos += 1
+        return members
+
+    def _member(self, end):
+        member = self.text[self._member_start:end]
+        self._member_start = end + 1
+        if not member.strip():
+            return []
+        return list(json.loads("{" + member + "}").items())
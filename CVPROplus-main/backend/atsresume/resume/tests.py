@@ -9,10 +9,27 @@ from rest_framework import status
 from bson import ObjectId
 from io import BytesIO
 from django.core.files.uploadedfile import SimpleUploadedFile
-from .views import ResumeCreateView,ResumeRetrieveView,ResumeImageView,ResumeDeleteView
+from .views import ResumeCreateView,ResumeRetrieveView,ResumeImageView,ResumeDeleteView,parse_cache,upload_source,stream_parse_events
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from .parse_cache import ParseCache, make_cache_key
+from .jobs import ExtractionJobQueue
+from .bulk_import import BulkImporter
+from pymongo.errors import BulkWriteError
+import zipfile
+from .tiered import parse_locally, parse_locally_batch, parse_tiered
+from .utils import extract_pdf_pages, _page_ranges
+from .metrics import counters
+from .pdf_engines import EMPTY, GARBLED, MULTI_COLUMN, OUT_OF_ORDER, fast_pages, page_problem
+from . import utils as resume_utils
+import threading
+import time
+from .benchmarks.corpus import synthetic_docx, synthetic_pdf
+from django.test import override_settings
 import gridfs.errors
 import tempfile
 import os
+import shutil
+from datetime import datetime
 
 # class TestParseResumeWithGemini(unittest.TestCase):
 #     def setUp(self):
@@ -98,6 +115,12 @@ import os
 class ResumeCreateViewTests(TestCase):
     def setUp(self):
         self.client = APIClient()
+        index_patcher = patch('resume.views.index_resume_safely')
+        self.mock_index = index_patcher.start()
+        self.addCleanup(index_patcher.stop)
+        similar_patcher = patch('resume.views.upsert_similar_safely')
+        self.mock_similar = similar_patcher.start()
+        self.addCleanup(similar_patcher.stop)
         self.url = '/resume/create/'
         self.sample_resume_data = {
             "personal": {
@@ -155,6 +178,8 @@ class ResumeCreateViewTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertIn("resume_id", response.data)
         mock_insert.assert_called_once()
+        self.mock_index.assert_called_once_with(response.data["resume_id"], self.sample_resume_data)
+        self.mock_similar.assert_called_once_with(response.data["resume_id"], self.sample_resume_data)
 
     @patch('resume.views.resume_collection.insert_one')
     def test_create_resume_missing_fields(self, mock_insert):
@@ -178,6 +203,12 @@ class ResumeCreateViewTests(TestCase):
 class ResumeDeleteViewTests(TestCase):
     def setUp(self):
         self.client = APIClient()
+        index_patcher = patch('resume.views.remove_resume_safely')
+        self.mock_unindex = index_patcher.start()
+        self.addCleanup(index_patcher.stop)
+        similar_patcher = patch('resume.views.remove_similar_safely')
+        self.mock_unsimilar = similar_patcher.start()
+        self.addCleanup(similar_patcher.stop)
         self.sample_resume_id = ObjectId()
         self.sample_resume = {
             "_id": self.sample_resume_id,
@@ -201,6 +232,8 @@ class ResumeDeleteViewTests(TestCase):
         mock_find_one.assert_called_once_with({"_id": str(self.sample_resume_id)})
         mock_fs_delete.assert_called_once_with(self.sample_resume["image_id"])
         mock_delete_one.assert_called_once_with({"_id": str(self.sample_resume_id)})
+        self.mock_unindex.assert_called_once_with(str(self.sample_resume_id))
+        self.mock_unsimilar.assert_called_once_with(str(self.sample_resume_id))
 
     @patch('resume.views.resume_collection.find_one')
     def test_delete_resume_not_found(self, mock_find_one):
@@ -264,6 +297,10 @@ class ResumeImageViewTests(TestCase):
         self.sample_file_data = MagicMock()
         self.sample_file_data.read.return_value = b'mock_image_data'
         self.sample_file_data.filename = 'test.png'
+        self.sample_file_data.upload_date = datetime(2024, 5, 1, 12, 0)
+        self.sample_file_data.content_type = None
+        self.sample_file_data.length = len(b'mock_image_data')
+        self.sample_file_data.chunk_size = 255 * 1024
 
     @patch('resume.views.fs.get')
     def test_get_image_success(self, mock_fs_get):
@@ -303,6 +340,12 @@ class ResumeImageViewTests(TestCase):
 class ResumeUpdateViewTests(TestCase):
     def setUp(self):
         self.client = APIClient()
+        index_patcher = patch('resume.views.index_resume_safely')
+        self.mock_index = index_patcher.start()
+        self.addCleanup(index_patcher.stop)
+        similar_patcher = patch('resume.views.upsert_similar_safely')
+        self.mock_similar = similar_patcher.start()
+        self.addCleanup(similar_patcher.stop)
         self.resume_id = ObjectId()
         self.url = f'/resume/update/{str(self.resume_id)}/'
         self.sample_resume = {
@@ -411,13 +454,20 @@ class ResumeUploadViewTests(TestCase):
         
         # Create a sample test file
         self.sample_pdf = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
-        self.sample_pdf.write(b'%PDF sample content')
+        self.sample_pdf.write(synthetic_pdf(1))
         self.sample_pdf.close()
         
         self.sample_docx = tempfile.NamedTemporaryFile(suffix='.docx', delete=False)
-        self.sample_docx.write(b'DOCX sample content')
+        self.sample_docx.write(synthetic_docx(1))
         self.sample_docx.close()
 
+        # Keep parses from leaking between tests through the parse cache
+        parse_cache.clear()
+        cache_patcher = patch.object(parse_cache, '_collection')
+        self.mock_cache_collection = cache_patcher.start()
+        self.mock_cache_collection.find_one.return_value = None
+        self.addCleanup(cache_patcher.stop)
+
     def tearDown(self):
         # Clean up test files
         if os.path.exists(self.sample_pdf.name):
@@ -489,6 +539,71 @@ class ResumeUploadViewTests(TestCase):
         finally:
             os.remove(unsupported_file.name)
 
+    def post_file(self, name, data):
+        return self.client.post(self.url, {'file': SimpleUploadedFile(name, data)}, format='multipart')
+
+    @patch('resume.views.extract_text_from_pdf')
+    def test_upload_mislabeled_file_rejected(self, mock_extract_pdf):
+        """Test the format is read from the content, not the file name"""
+        rejected = counters.get("upload.rejected.unsupported")
+
+        response = self.post_file("resume.pdf", b"MZ\x90\x00 not a resume")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "Unsupported file format")
+        self.assertEqual(counters.get("upload.rejected.unsupported") - rejected, 1)
+        mock_extract_pdf.assert_not_called()
+
+    @patch('resume.views.parse_resume_with_gemini', return_value={"structured": "data"})
+    @patch('resume.views.extract_text_from_docx', return_value="Extracted DOCX text")
+    def test_upload_docx_named_pdf_read_as_docx(self, mock_extract_docx, mock_parse):
+        """Test a DOCX uploaded under a .pdf name goes to the DOCX extractor"""
+        response = self.post_file("resume.pdf", synthetic_docx(1))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_extract_docx.assert_called_once()
+
+    @override_settings(RESUME_UPLOAD_MAX_BYTES=1000)
+    @patch('resume.views.extract_text_from_pdf')
+    def test_upload_too_large_rejected(self, mock_extract_pdf):
+        """Test files over the byte limit get 413 without being parsed"""
+        response = self.post_file("resume.pdf", synthetic_pdf(1))
+
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        mock_extract_pdf.assert_not_called()
+
+    @override_settings(RESUME_UPLOAD_MAX_BYTES=1000)
+    def test_oversized_request_rejected_before_reading_body(self):
+        """Test a declared Content-Length over the limit is refused up front"""
+        with patch('resume.views.admit_upload') as mock_admit:
+            response = self.client.post(
+                self.url, b"x" * 100, content_type="multipart/form-data; boundary=x",
+                CONTENT_LENGTH=str(200 * 1024),
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        mock_admit.assert_not_called()
+
+    @override_settings(RESUME_UPLOAD_MAX_PDF_PAGES=2)
+    @patch('resume.views.extract_text_from_pdf')
+    def test_upload_too_many_pages_rejected(self, mock_extract_pdf):
+        """Test PDFs over the page limit get 422 without being parsed"""
+        rejected = counters.get("upload.rejected.too_many_pages")
+
+        response = self.post_file("resume.pdf", synthetic_pdf(3))
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(response.data["error"], "PDF has 3 pages; the limit is 2")
+        self.assertEqual(counters.get("upload.rejected.too_many_pages") - rejected, 1)
+        mock_extract_pdf.assert_not_called()
+
+    def test_upload_damaged_pdf_rejected(self):
+        """Test a truncated PDF is refused as unreadable"""
+        response = self.post_file("resume.pdf", synthetic_pdf(1)[:500])
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(response.data["error"], "PDF file is damaged or unreadable")
+
     @patch('resume.views.parse_resume_with_gemini')
     @patch('resume.views.extract_text_from_pdf')
     def test_pdf_extraction_error(self, mock_extract_pdf, mock_parse):
@@ -524,4 +639,2060 @@ class ResumeUploadViewTests(TestCase):
             )
 
         self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
-        self.assertEqual(response.data["error"], "Parsing failed")
\ No newline at end of file
+        self.assertEqual(response.data["error"], "Parsing failed")
+    @patch('resume.views.parse_resume_with_gemini')
+    @patch('resume.views.extract_text_from_pdf')
+    def test_repeat_upload_uses_parse_cache(self, mock_extract_pdf, mock_parse):
+        """Test re-uploading the same resume skips the LLM call"""
+        mock_extract_pdf.return_value = "Extracted PDF text"
+        mock_parse.return_value = {"structured": "data"}
+
+        for _ in range(2):
+            with open(self.sample_pdf.name, 'rb') as pdf_file:
+                response = self.client.post(
+                    self.url,
+                    {'file': pdf_file},
+                    format='multipart'
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data, {"structured": "data"})
+
+        mock_parse.assert_called_once_with("Extracted PDF text")
+
+    @patch('resume.views.extraction_jobs.submit')
+    def test_upload_async_returns_job_id(self, mock_submit):
+        """Test async mode queues the file instead of parsing it"""
+        mock_submit.return_value = "job123"
+
+        with open(self.sample_pdf.name, 'rb') as pdf_file:
+            response = self.client.post(
+                self.url + '?mode=async',
+                {'file': pdf_file},
+                format='multipart'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["job_id"], "job123")
+        self.assertEqual(response.data["status_url"], "/resume/extract/job123/")
+        data, filename, extension = mock_submit.call_args[0]
+        self.assertEqual(data, synthetic_pdf(1))
+        self.assertEqual(extension, "pdf")
+
+    @patch('resume.views.parse_resume_with_gemini')
+    @patch('resume.views.extract_text_from_pdf')
+    def test_upload_parsed_from_memory(self, mock_extract_pdf, mock_parse):
+        """Test small uploads reach the extractor as an in-memory buffer"""
+        mock_extract_pdf.side_effect = lambda source: source.read().decode()
+        mock_parse.side_effect = lambda text: {"text": text}
+
+        with open(self.sample_pdf.name, 'rb') as pdf_file:
+            response = self.client.post(
+                self.url,
+                {'file': pdf_file},
+                format='multipart'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"text": synthetic_pdf(1).decode()})
+
+    @patch('resume.views.parse_tiered')
+    @patch('resume.views.extract_text_from_pdf')
+    def test_upload_tiered_strategy_reports_tier(self, mock_extract_pdf, mock_parse_tiered):
+        """Test the tier that produced the result is returned in a header"""
+        from .tiered import TieredResult
+        mock_extract_pdf.return_value = "Extracted PDF text"
+        mock_parse_tiered.return_value = TieredResult({"skills": ["Python"]}, "hybrid", ["experience"])
+
+        with open(self.sample_pdf.name, 'rb') as pdf_file:
+            response = self.client.post(
+                self.url + '?strategy=tiered',
+                {'file': pdf_file},
+                format='multipart'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"skills": ["Python"]})
+        self.assertEqual(response['X-Resume-Parse-Tier'], "hybrid")
+        self.assertEqual(response['X-Resume-Parse-Escalated'], "experience")
+
+class UploadSourceTests(TestCase):
+    def test_in_memory_upload_returns_buffer(self):
+        """Test in-memory uploads are not written to disk"""
+        uploaded = SimpleUploadedFile("resume.pdf", b"%PDF data")
+        uploaded.read()
+
+        source = upload_source(uploaded)
+
+        self.assertFalse(isinstance(source, str))
+        self.assertEqual(source.read(), b"%PDF data")
+
+    def test_spooled_upload_reuses_temporary_file(self):
+        """Test uploads Django already spooled to disk are opened by path"""
+        uploaded = TemporaryUploadedFile("resume.pdf", "application/pdf", 9, None)
+        uploaded.write(b"%PDF data")
+        uploaded.flush()
+        try:
+            self.assertEqual(upload_source(uploaded), uploaded.temporary_file_path())
+        finally:
+            uploaded.close()
+
+class ExtractionJobStatusViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    @patch('resume.views.extraction_jobs.get')
+    def test_get_job_done(self, mock_get):
+        """Test polling a finished job returns its result"""
+        mock_get.return_value = {"job_id": "job123", "status": "done", "result": {"skills": []}, "error": None}
+
+        response = self.client.get('/resume/extract/job123/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "done")
+        self.assertEqual(response.data["result"], {"skills": []})
+        mock_get.assert_called_once_with("job123")
+
+    @patch('resume.views.extraction_jobs.get')
+    def test_get_job_not_found(self, mock_get):
+        """Test polling an unknown job"""
+        mock_get.return_value = None
+
+        response = self.client.get('/resume/extract/missing/')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data["error"], "Job not found")
+
+class ExtractionJobQueueTests(TestCase):
+    def setUp(self):
+        self.collection = MagicMock()
+        self.fs = MagicMock()
+        self.fs.get.return_value.read.return_value = b'%PDF data'
+        self.handler = MagicMock(return_value={"skills": ["Python"]})
+        self.queue = ExtractionJobQueue(self.collection, self.fs, self.handler, max_attempts=2)
+        self.job = {"_id": "job123", "file_id": ObjectId(), "file_extension": "pdf", "attempts": 1}
+
+    def test_run_job_success(self):
+        """Test a successful job stores its result and drops the upload"""
+        self.queue.run_job(self.job)
+
+        file_obj, extension = self.handler.call_args[0]
+        self.assertEqual(file_obj.read(), b'%PDF data')
+        self.assertEqual(extension, "pdf")
+        update = self.collection.update_one.call_args[0][1]["$set"]
+        self.assertEqual(update["status"], "done")
+        self.assertEqual(update["result"], {"skills": ["Python"]})
+        self.fs.delete.assert_called_once_with(self.job["file_id"])
+
+    def test_run_job_requeues_until_max_attempts(self):
+        """Test a failing job is retried, then marked failed"""
+        self.handler.side_effect = Exception("Gemini unavailable")
+
+        self.queue.run_job(self.job)
+        self.assertEqual(self.collection.update_one.call_args[0][1]["$set"]["status"], "queued")
+        self.fs.delete.assert_not_called()
+
+        self.queue.run_job(dict(self.job, attempts=2))
+        update = self.collection.update_one.call_args[0][1]["$set"]
+        self.assertEqual(update["status"], "failed")
+        self.assertEqual(update["error"], "Gemini unavailable")
+        self.fs.delete.assert_called_once()
+
+    def test_worker_survives_an_error_recording_the_outcome(self):
+        """Test an unexpected error while finishing a job is logged, not raised out of the worker loop"""
+        self.collection.find_one_and_update.return_value = self.job
+        self.fs.delete.side_effect = TypeError("bad file id")
+
+        with self.assertLogs('resume.jobs', level='ERROR'):
+            self.assertTrue(self.queue.work_once())
+
+    @patch('resume.views.extraction_jobs')
+    def test_workers_start_when_a_server_starts(self, mock_jobs):
+        """Test the app starts the workers in server processes but not in management commands"""
+        from django.apps import apps
+        config = apps.get_app_config("resume")
+
+        with patch('resume.apps.sys.argv', ["manage.py", "migrate"]):
+            config.ready()
+        mock_jobs.start.assert_not_called()
+
+        with patch('resume.apps.sys.argv', ["/usr/local/bin/gunicorn", "atsresume.wsgi:application"]):
+            config.ready()
+        mock_jobs.start.assert_called_once()
+
+class ParseCacheTests(TestCase):
+    def setUp(self):
+        self.collection = MagicMock()
+        self.collection.find_one.return_value = None
+        self.cache = ParseCache(self.collection, max_entries=2)
+
+    def test_key_ignores_whitespace_differences(self):
+        """Test cache keys are computed from normalized text"""
+        self.assertEqual(make_cache_key("John  Doe\nEngineer"), make_cache_key("John Doe Engineer "))
+        self.assertNotEqual(make_cache_key("John Doe"), make_cache_key("Jane Doe"))
+
+    def test_miss_then_memory_hit(self):
+        """Test a parsed result is served from memory on the next call"""
+        parse_fn = MagicMock(return_value={"personal": {"name": "John Doe"}})
+
+        first = self.cache.get_or_parse("John Doe resume", parse_fn)
+        second = self.cache.get_or_parse("John Doe resume", parse_fn)
+
+        self.assertEqual(first, second)
+        parse_fn.assert_called_once_with("John Doe resume")
+        self.collection.replace_one.assert_called_once()
+        self.assertEqual(self.collection.find_one.call_count, 1)
+
+    def test_mongo_hit_skips_parse(self):
+        """Test a result stored by another worker is reused"""
+        from datetime import datetime, timezone
+        self.collection.find_one.return_value = {
+            "result": {"skills": ["Python"]},
+            "created_at": datetime.now(timezone.utc),
+        }
+        parse_fn = MagicMock()
+
+        result = self.cache.get_or_parse("Some resume", parse_fn)
+
+        self.assertEqual(result, {"skills": ["Python"]})
+        parse_fn.assert_not_called()
+
+    def test_failed_parse_not_cached(self):
+        """Test None results are not stored"""
+        parse_fn = MagicMock(return_value=None)
+
+        self.cache.get_or_parse("Some resume", parse_fn)
+        self.cache.get_or_parse("Some resume", parse_fn)
+
+        self.assertEqual(parse_fn.call_count, 2)
+        self.collection.replace_one.assert_not_called()
+
+    def test_lru_evicts_oldest_entry(self):
+        """Test the in-process tier respects its size cap"""
+        parse_fn = MagicMock(side_effect=lambda text: {"text": text})
+
+        for text in ("resume one", "resume two", "resume three"):
+            self.cache.get_or_parse(text, parse_fn)
+
+        self.assertEqual(self.cache.stats()["memory_entries"], 2)
+        self.cache.get_or_parse("resume one", parse_fn)
+        self.assertEqual(parse_fn.call_count, 4)
+
+    def test_concurrent_identical_parses_share_one_call(self):
+        """Test identical requests in flight at the same time call the parser once"""
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_parse(text):
+            started.set()
+            release.wait(5)
+            return {"personal": {"name": "John Doe"}}
+
+        from .metrics import counters
+        shared_before = counters.get("singleflight.shared")
+        parse_fn = MagicMock(side_effect=slow_parse)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get_or_parse("Same resume", parse_fn)))
+                   for _ in range(4)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while counters.get("singleflight.shared") - shared_before < 3:
+            pass
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        parse_fn.assert_called_once()
+        self.assertEqual(results, [{"personal": {"name": "John Doe"}}] * 4)
+
+    def test_waiters_receive_the_parse_error(self):
+        """Test an exception from the shared parse reaches every waiter"""
+        from .singleflight import SingleFlight
+        flights = SingleFlight()
+        release = threading.Event()
+        errors = []
+
+        def failing():
+            release.wait(5)
+            raise ValueError("Gemini unavailable")
+
+        def call():
+            try:
+                flights.do("key", failing)
+            except ValueError as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        while flights.in_flight() == 0:
+            pass
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(errors, ["Gemini unavailable"] * 3)
+        self.assertEqual(flights.in_flight(), 0)
+
+    def test_lease_holder_result_is_reused(self):
+        """Test a process that loses the lease waits for the holder's cached result"""
+        from datetime import datetime, timezone
+        leases = MagicMock()
+        leases.acquire.return_value = False
+        cache = ParseCache(self.collection, leases=leases, lease_poll_interval=0)
+        self.collection.find_one.side_effect = [
+            None,
+            {"result": {"skills": ["Go"]}, "created_at": datetime.now(timezone.utc)},
+        ]
+        parse_fn = MagicMock()
+
+        result = cache.get_or_parse("Shared resume", parse_fn)
+
+        self.assertEqual(result, {"skills": ["Go"]})
+        parse_fn.assert_not_called()
+        leases.release.assert_not_called()
+
+    def test_lease_released_after_parse(self):
+        """Test the lease holder parses, stores and releases the lease"""
+        leases = MagicMock()
+        leases.acquire.return_value = True
+        cache = ParseCache(self.collection, leases=leases)
+        parse_fn = MagicMock(return_value={"skills": ["Go"]})
+
+        cache.get_or_parse("Shared resume", parse_fn)
+
+        parse_fn.assert_called_once()
+        self.collection.replace_one.assert_called_once()
+        leases.release.assert_called_once()
+
+    def test_expired_lease_can_be_taken_over(self):
+        """Test a lease left by a crashed process is taken over"""
+        from pymongo.errors import DuplicateKeyError
+        from .singleflight import MongoLease
+        collection = MagicMock()
+        collection.insert_one.side_effect = DuplicateKeyError("duplicate")
+        lease = MongoLease(collection)
+
+        collection.find_one_and_update.return_value = {"_id": "key"}
+        self.assertTrue(lease.acquire("key"))
+        collection.find_one_and_update.return_value = None
+        self.assertFalse(lease.acquire("key"))
+
+class ResumeMetricsViewTests(TestCase):
+    def test_metrics_include_parse_cache_stats(self):
+        """Test parse cache counters are exposed"""
+        response = APIClient().get('/resume/metrics/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("parse_cache", response.data)
+        for key in ("memory_hits", "mongo_hits", "misses"):
+            self.assertIn(key, response.data["parse_cache"])
+
+class PdfPageExtractionTests(TestCase):
+    def test_page_ranges_cover_all_pages_in_order(self):
+        """Test page ranges are contiguous and ordered"""
+        ranges = _page_ranges(10, 3)
+        self.assertEqual(ranges, [(0, 4), (4, 8), (8, 10)])
+        self.assertEqual(_page_ranges(1, 4), [(0, 1)])
+
+    @override_settings(RESUME_PDF_WORKERS=2)
+    def test_parallel_extraction_matches_serial(self):
+        """Test the process pool returns the same pages in the same order"""
+        data = synthetic_pdf(5)
+
+        serial = extract_pdf_pages(BytesIO(data), parallel_min_pages=0, engine="pdfplumber")
+        parallel = extract_pdf_pages(BytesIO(data), parallel_min_pages=3, engine="pdfplumber")
+
+        self.assertEqual(len(serial), 5)
+        self.assertEqual(serial, parallel)
+
+    @override_settings(RESUME_PDF_WORKERS=2)
+    @patch('resume.utils._get_pdf_pool')
+    def test_short_pdf_stays_serial(self, mock_pool):
+        """Test PDFs below the page threshold skip the process pool"""
+        pages = extract_pdf_pages(BytesIO(synthetic_pdf(2)), parallel_min_pages=3, engine="pdfplumber")
+
+        self.assertEqual(len(pages), 2)
+        mock_pool.assert_not_called()
+
+class PdfEngineTests(TestCase):
+    COUNTERS = ("pdf.pypdf_pages", "pdf.pdfplumber_pages", "pdf.fallback.multi_column", "pdf.fast_engine_errors")
+
+    def setUp(self):
+        self.counters = {name: counters.get(name) for name in self.COUNTERS}
+
+    def delta(self, name):
+        return counters.get(name) - self.counters[name]
+
+    @patch('resume.utils._plumber_pages')
+    def test_single_column_pages_use_fast_engine(self, mock_plumber):
+        """Test clean single-column pages never reach pdfplumber"""
+        pages = extract_pdf_pages(BytesIO(synthetic_pdf(3)), parallel_min_pages=0, engine="auto")
+
+        self.assertEqual(len(pages), 3)
+        self.assertTrue(all(page.strip() for page in pages))
+        mock_plumber.assert_not_called()
+        self.assertEqual(self.delta("pdf.pypdf_pages"), 3)
+        self.assertEqual(self.delta("pdf.pdfplumber_pages"), 0)
+
+    def test_multi_column_pages_fall_back_per_column(self):
+        """Test two-column pages are re-read with pdfplumber one column at a time"""
+        data = synthetic_pdf(2, columns=2)
+        fast = fast_pages(data)
+        self.assertEqual([page.problem for page in fast], [MULTI_COLUMN, MULTI_COLUMN])
+        self.assertEqual(len(fast[0].columns), 2)
+
+        pages = extract_pdf_pages(BytesIO(data), parallel_min_pages=0, engine="auto")
+        plumber = extract_pdf_pages(BytesIO(data), parallel_min_pages=0, engine="pdfplumber")
+
+        self.assertEqual(self.delta("pdf.fallback.multi_column"), 2)
+        # Whole lines of the left column stay together instead of interleaving with the right
+        left_line = plumber[0].splitlines()[0]
+        self.assertNotIn(left_line, pages[0].splitlines())
+        self.assertEqual(sorted(pages[0].split()), sorted(plumber[0].split()))
+
+    def test_page_problem_detects_empty_and_garbled_text(self):
+        """Test unusable fast-engine output is flagged"""
+        self.assertEqual(page_problem("  \n", [], 612)[0], EMPTY)
+        self.assertEqual(page_problem("(cid:12)(cid:34) (cid:56)", [], 612)[0], GARBLED)
+        self.assertEqual(page_problem("Jane Doe\nPython developer", [], 612)[0], None)
+
+    def test_page_problem_detects_out_of_order_text(self):
+        """Test text drawn bottom-up is flagged as out of order"""
+        points = [(50, 100 + 30 * i) for i in range(10)]
+        self.assertEqual(page_problem("some words " * 10, points, 612)[0], OUT_OF_ORDER)
+        self.assertEqual(page_problem("some words " * 10, points[::-1], 612)[0], None)
+
+    @patch('resume.utils.fast_pages', side_effect=ValueError("bad xref"))
+    def test_fast_engine_errors_fall_back_to_pdfplumber(self, mock_fast):
+        """Test a PDF PyPDF2 cannot read is still extracted"""
+        pages = extract_pdf_pages(BytesIO(synthetic_pdf(1)), parallel_min_pages=0, engine="auto")
+
+        self.assertTrue(pages[0].strip())
+        self.assertEqual(self.delta("pdf.fast_engine_errors"), 1)
+
+    def test_unknown_engine_is_rejected(self):
+        with self.assertRaises(ValueError):
+            extract_pdf_pages(BytesIO(synthetic_pdf(1)), engine="ocr")
+
+class ResumeBulkImportViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = '/resume/bulk-import/'
+        parse_cache.clear()
+        cache_patcher = patch.object(parse_cache, '_collection')
+        cache_patcher.start().find_one.return_value = None
+        self.addCleanup(cache_patcher.stop)
+        index_patcher = patch('resume.views.index_resume_safely')
+        self.mock_index = index_patcher.start()
+        self.addCleanup(index_patcher.stop)
+        similar_patcher = patch('resume.views.upsert_similar_safely')
+        self.mock_similar = similar_patcher.start()
+        self.addCleanup(similar_patcher.stop)
+
+    def read_lines(self, response):
+        content = b"".join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def make_archive(self, files):
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for name, data in files.items():
+                archive.writestr(name, data)
+        return SimpleUploadedFile("resumes.zip", buffer.getvalue(), content_type="application/zip")
+
+    @patch('resume.views.resume_collection.insert_many')
+    @patch('resume.views.parse_resume_with_gemini')
+    @patch('resume.views.extract_text_from_pdf')
+    def test_import_zip_archive(self, mock_extract_pdf, mock_parse, mock_insert_many):
+        """Test every supported archive entry is parsed and saved"""
+        mock_extract_pdf.return_value = "Resume"
+        mock_parse.side_effect = lambda text: {"personal": {"name": text}}
+        archive = self.make_archive({
+            "one.pdf": synthetic_pdf(1, seed=1),
+            "nested/two.pdf": synthetic_pdf(1, seed=2),
+            "notes.txt": b"not a resume",
+        })
+
+        response = self.client.post(self.url, {"archive": archive, "user_id": "user123"}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = self.read_lines(response)
+        by_file = {line["file"]: line for line in lines if "file" in line}
+        self.assertEqual(by_file["one.pdf"]["status"], "ok")
+        self.assertEqual(by_file["nested/two.pdf"]["status"], "ok")
+        self.assertEqual(by_file["notes.txt"]["error"], "Unsupported file format")
+        self.assertEqual(lines[-1], {"status": "complete", "imported": 2, "failed": 1})
+
+        documents = mock_insert_many.call_args[0][0]
+        self.assertEqual({doc["title"] for doc in documents}, {"one", "two"})
+        self.assertTrue(all(doc["user_id"] == "user123" for doc in documents))
+        indexed = {call[0][0] for call in self.mock_index.call_args_list}
+        self.assertEqual(indexed, {doc["_id"] for doc in documents})
+        self.assertEqual({call[0][0] for call in self.mock_similar.call_args_list}, indexed)
+
+    @patch('resume.views.resume_collection.insert_many')
+    @patch('resume.views.parse_resume_with_gemini')
+    @patch('resume.views.extract_text_from_docx')
+    def test_import_multiple_files(self, mock_extract_docx, mock_parse, mock_insert_many):
+        """Test individually uploaded files are imported and failures reported"""
+        bad = synthetic_docx(1, seed=2)
+        mock_extract_docx.side_effect = lambda source: "bad" if source.read() == bad else "good"
+        mock_parse.side_effect = lambda text: None if text == "bad" else {"skills": [text]}
+
+        response = self.client.post(
+            self.url,
+            {"files": [
+                SimpleUploadedFile("good.docx", synthetic_docx(1, seed=1)),
+                SimpleUploadedFile("bad.docx", bad),
+            ]},
+            format='multipart'
+        )
+
+        lines = self.read_lines(response)
+        by_file = {line["file"]: line for line in lines if "file" in line}
+        self.assertEqual(by_file["good.docx"]["status"], "ok")
+        self.assertEqual(by_file["bad.docx"]["error"], "Could not parse resume")
+        mock_insert_many.assert_called_once()
+
+    @override_settings(RESUME_UPLOAD_MAX_PDF_PAGES=2)
+    @patch('resume.views.resume_collection.insert_many')
+    @patch('resume.views.parse_resume_with_gemini')
+    @patch('resume.views.extract_text_from_pdf')
+    def test_entries_failing_admission_are_reported(self, mock_extract_pdf, mock_parse, mock_insert_many):
+        """Test archive entries get the single-upload content checks before extraction"""
+        mock_extract_pdf.return_value = "Resume"
+        mock_parse.return_value = {"skills": ["Python"]}
+        archive = self.make_archive({
+            "good.pdf": synthetic_pdf(1),
+            "renamed.pdf": b"plain text, not a PDF",
+            "long.pdf": synthetic_pdf(3),
+        })
+
+        response = self.client.post(self.url, {"archive": archive}, format='multipart')
+
+        lines = self.read_lines(response)
+        by_file = {line["file"]: line for line in lines if "file" in line}
+        self.assertEqual(by_file["good.pdf"]["status"], "ok")
+        self.assertEqual(by_file["renamed.pdf"]["error"], "Unsupported file format")
+        self.assertEqual(by_file["long.pdf"]["error"], "PDF has 3 pages; the limit is 2")
+        mock_extract_pdf.assert_called_once()
+
+    def test_invalid_archive(self):
+        """Test a non-ZIP archive is rejected before any processing"""
+        response = self.client.post(
+            self.url,
+            {"archive": SimpleUploadedFile("resumes.zip", b"not a zip")},
+            format='multipart'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "Uploaded archive is not a valid ZIP file")
+
+    def test_nothing_uploaded(self):
+        """Test the endpoint requires an archive or files"""
+        response = self.client.post(self.url, {}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class BulkImporterTests(TestCase):
+    def entries(self, count):
+        return [(f"resume{i}.pdf", "pdf", f"text {i}".encode(), None) for i in range(count)]
+
+    def test_batches_inserts(self):
+        """Test resumes are written with insert_many in fixed-size batches"""
+        collection = MagicMock()
+        importer = BulkImporter(
+            collection,
+            lambda source, extension: source.read().decode(),
+            lambda text: {"text": text},
+            extract_concurrency=2,
+            llm_concurrency=1,
+            batch_size=2,
+        )
+
+        results = list(importer.run(self.entries(5)))
+
+        self.assertEqual(results[-1], {"status": "complete", "imported": 5, "failed": 0})
+        self.assertEqual([len(call[0][0]) for call in collection.insert_many.call_args_list], [2, 2, 1])
+
+    def test_partial_insert_failure(self):
+        """Test only the documents rejected by Mongo are reported as failed"""
+        collection = MagicMock()
+        collection.insert_many.side_effect = BulkWriteError({"writeErrors": [{"index": 1}]})
+        importer = BulkImporter(
+            collection,
+            lambda source, extension: source.read().decode(),
+            lambda text: {"text": text},
+            batch_size=10,
+        )
+
+        results = list(importer.run(self.entries(3)))
+
+        self.assertEqual(results[-1], {"status": "complete", "imported": 2, "failed": 1})
+
+    def test_duplicates_within_one_batch_are_flagged(self):
+        """Test a resume is flagged as a duplicate of one still waiting in its batch"""
+        collection = MagicMock()
+        collection.find.return_value.limit.return_value = []
+        text = "Senior backend engineer building Django services with MongoDB and Docker for ten years"
+        importer = BulkImporter(
+            collection,
+            lambda source, extension: source.read().decode(),
+            lambda text: {"summary": text},
+            extract_concurrency=1,
+            llm_concurrency=1,
+            batch_size=10,
+        )
+
+        entries = [("first.pdf", "pdf", text.encode(), None), ("copy.pdf", "pdf", text.encode(), None)]
+        results = [result for result in importer.run(entries) if "file" in result]
+
+        first, second = collection.insert_many.call_args[0][0]
+        self.assertEqual(first["duplicate_of"], [])
+        self.assertEqual(second["duplicate_of"], [first["_id"]])
+        self.assertEqual(results[1]["possible_duplicates"], [first["_id"]])
+
+    def test_prepare_batches_extracted_texts(self):
+        """Test extracted texts are prepared in batches and handed to the parser"""
+        collection = MagicMock()
+        collection.find.return_value.limit.return_value = []
+        prepare = MagicMock(side_effect=lambda texts: [text.upper() for text in texts])
+        importer = BulkImporter(
+            collection,
+            lambda source, extension: source.read().decode(),
+            lambda text, prepared: {"text": text, "prepared": prepared},
+            extract_concurrency=2,
+            llm_concurrency=1,
+            prepare_batch_fn=prepare,
+            prepare_batch_size=2,
+        )
+
+        results = list(importer.run(self.entries(5)))
+
+        self.assertEqual(results[-1], {"status": "complete", "imported": 5, "failed": 0})
+        self.assertEqual(sorted(len(call[0][0]) for call in prepare.call_args_list), [1, 2, 2])
+        documents = collection.insert_many.call_args[0][0]
+        self.assertTrue(all(doc["resume_details"]["prepared"] == doc["resume_details"]["text"].upper()
+                            for doc in documents))
+
+    def test_inserted_hook_skips_rejected_documents(self):
+        """Test on_inserted is called only for the documents Mongo stored"""
+        collection = MagicMock()
+        collection.insert_many.side_effect = BulkWriteError({"writeErrors": [{"index": 1}]})
+        on_inserted = MagicMock()
+        importer = BulkImporter(
+            collection,
+            lambda source, extension: source.read().decode(),
+            lambda text: {"text": text},
+            batch_size=10,
+            on_inserted=on_inserted,
+        )
+
+        results = list(importer.run(self.entries(3)))
+
+        documents = collection.insert_many.call_args[0][0]
+        stored = [documents[0], documents[2]]
+        self.assertEqual(
+            [call[0] for call in on_inserted.call_args_list],
+            [(document["_id"], document["resume_details"]) for document in stored],
+        )
+        self.assertEqual(results[-1]["imported"], 2)
+
+@patch('resume.utils.extract_name', return_value="John Doe")
+class TieredParsingTests(TestCase):
+    def setUp(self):
+        self.resume_text = """John Doe
+john.doe@example.com | +1 416 555 2671
+Summary
+Backend engineer with six years of experience.
+Skills
+Python, Django, MongoDB, Docker
+Experience
+Software Engineer - XYZ Corp (01/2020 - Present)
+- Developed AI models for automation.
+- Optimized backend services.
+Projects
+Resume Builder - React, Django
+- Built an ATS-friendly resume editor.
+Education
+ABC University, Toronto
+BSc Computer Science 06/2016
+"""
+
+    def test_local_parse_of_clean_resume(self, mock_name):
+        """Test a well-structured resume is parsed locally with high confidence"""
+        data, confidence = parse_locally(self.resume_text)
+
+        self.assertEqual(data["personal"]["name"], "John Doe")
+        self.assertEqual(data["personal"]["email"], "john.doe@example.com")
+        self.assertEqual(data["personal"]["phone"], "4165552671")
+        self.assertEqual(data["skills"], ["Python", "Django", "MongoDB", "Docker"])
+        self.assertEqual(data["experience"][0]["jobTitle"], "Software Engineer")
+        self.assertEqual(data["experience"][0]["company"], "XYZ Corp")
+        self.assertEqual(data["experience"][0]["startDate"], "01/2020")
+        self.assertIsNone(data["experience"][0]["endDate"])
+        self.assertEqual(len(data["experience"][0]["tasks"]), 2)
+        self.assertEqual(data["projects"][0]["technologies"], ["React", "Django"])
+        self.assertEqual(data["education"][0]["institution"], "ABC University")
+        self.assertEqual(data["education"][0]["graduation_date"], "06/2016")
+        self.assertGreaterEqual(confidence["experience"], 0.9)
+
+    def test_confident_parse_skips_llm(self, mock_name):
+        """Test no LLM call is made when every field passes its threshold"""
+        llm_parse = MagicMock()
+
+        result = parse_tiered(self.resume_text, llm_parse)
+
+        self.assertEqual(result.tier, "local")
+        self.assertEqual(result.escalated, [])
+        llm_parse.assert_not_called()
+
+    def test_only_low_confidence_sections_escalate(self, mock_name):
+        """Test the LLM is asked only for weak sections and merged in"""
+        text = self.resume_text.replace("Software Engineer - XYZ Corp (01/2020 - Present)", "Worked on many things")
+        llm_experience = [{"jobTitle": "Engineer", "company": "XYZ", "startDate": "01/2020",
+                           "endDate": None, "location": "", "tasks": []}]
+        llm_parse = MagicMock(return_value={"experience": llm_experience, "skills": ["ignored"]})
+
+        result = parse_tiered(text, llm_parse)
+
+        llm_parse.assert_called_once_with(text, ["experience"])
+        self.assertEqual(result.tier, "hybrid")
+        self.assertEqual(result.data["experience"], llm_experience)
+        self.assertEqual(result.data["skills"], ["Python", "Django", "MongoDB", "Docker"])
+
+    def test_thresholds_are_configurable(self, mock_name):
+        """Test raising a threshold forces escalation of that section"""
+        llm_parse = MagicMock(return_value=None)
+
+        result = parse_tiered(self.resume_text, llm_parse, thresholds={"skills": 0.95})
+
+        llm_parse.assert_called_once_with(self.resume_text, ["skills"])
+        self.assertEqual(result.tier, "local")
+
+    @patch('resume.utils.extract_names', return_value=["John Doe"])
+    def test_batch_local_parse_feeds_tiered(self, mock_names, mock_name):
+        """Test a local parse from parse_locally_batch is reused instead of parsing again"""
+        local = parse_locally_batch([self.resume_text])[0]
+        mock_name.reset_mock()
+
+        result = parse_tiered(self.resume_text, MagicMock(), local=local)
+
+        mock_names.assert_called_once()
+        mock_name.assert_not_called()
+        self.assertEqual(result.tier, "local")
+        self.assertEqual(result.data["personal"]["name"], "John Doe")
+
+class NlpLoadingTests(TestCase):
+    def setUp(self):
+        patcher = patch.object(resume_utils, '_nlp', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fake_doc(self, *entities):
+        return MagicMock(ents=[MagicMock(label_=label, text=text) for label, text in entities])
+
+    @patch('resume.utils.spacy.load')
+    def test_model_loaded_once_with_pruned_pipeline(self, mock_load):
+        """Test the model loads lazily, once, without unused components"""
+        mock_load.return_value = MagicMock(return_value=self.fake_doc(("PERSON", "John Doe")))
+        mock_load.assert_not_called()
+
+        threads = [threading.Thread(target=resume_utils.extract_name, args=("John Doe",)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        mock_load.assert_called_once_with("en_core_web_sm", exclude=resume_utils.NLP_EXCLUDE)
+        self.assertNotIn("ner", resume_utils.NLP_EXCLUDE)
+
+    @patch('resume.utils.spacy.load')
+    def test_extract_names_batches_through_pipe(self, mock_load):
+        """Test batch NER runs one nlp.pipe call over all texts"""
+        nlp = MagicMock()
+        nlp.pipe.return_value = iter([
+            self.fake_doc(("ORG", "XYZ Corp"), ("PERSON", "Jane Roe")),
+            self.fake_doc(),
+        ])
+        mock_load.return_value = nlp
+
+        names = resume_utils.extract_names(["Jane Roe resume", "no name here"], n_process=2)
+
+        self.assertEqual(names, ["Jane Roe", None])
+        nlp.pipe.assert_called_once_with(["Jane Roe resume", "no name here"], batch_size=32, n_process=2)
+        nlp.assert_not_called()
+
+class PromptBuilderTests(TestCase):
+    def test_page_markers_removed(self):
+        """Test explicit page markers are dropped"""
+        from .prompts import clean_resume_text
+        pages = [f"Line {i}\nPage {i} of 3" for i in range(1, 4)] + ["Line 4\n4 of 4"]
+
+        cleaned = clean_resume_text("\n".join(pages))
+
+        self.assertEqual(cleaned, "Line 1\nLine 2\nLine 3\nLine 4")
+
+    def test_numbers_dates_and_repeated_titles_kept_within_budget(self):
+        """Test bare numbers, dates and repeated job titles are resume content, not page boilerplate"""
+        from .prompts import build_prompt
+        jobs = [f"Software Engineer\nRemote\n06/{2016 + i}\nBuilt service {i}" for i in range(3)]
+        text = "John Doe\n5551234567\n2021\n" + "\n".join(jobs)
+
+        prompt = build_prompt(text, token_budget=1000)
+
+        self.assertEqual(prompt.text, text)
+        self.assertEqual(prompt.trimmed, [])
+
+    def test_repeated_footers_dropped_when_over_budget(self):
+        """Test header lines repeated on every page are sent once when the text must shrink"""
+        from .prompts import fit_to_budget
+        text = "\n".join(f"John Doe - Resume\nLine {i}" for i in range(1, 4))
+
+        trimmed_text, trimmed = fit_to_budget(text, 10)
+
+        self.assertEqual(trimmed_text, "John Doe - Resume\nLine 1\nLine 2\nLine 3")
+        self.assertEqual(trimmed, ["repeated lines"])
+
+    def test_low_value_sections_trimmed_before_truncating(self):
+        """Test references are dropped to fit the budget while experience is kept"""
+        from .prompts import build_prompt
+        text = "John Doe\nExperience\nEngineer at Acme\nReferences\n" + "".join(
+            f"Jane Roe {i}, Manager\n" for i in range(200))
+
+        prompt = build_prompt(text, token_budget=50)
+
+        self.assertEqual(prompt.trimmed, ["references"])
+        self.assertIn("Engineer at Acme", prompt.text)
+        self.assertNotIn("Jane Roe", prompt.text)
+
+    def test_text_truncated_when_still_over_budget(self):
+        """Test the resume text never exceeds the token budget"""
+        from .prompts import build_prompt, estimate_tokens
+        text = "\n".join(f"Built feature number {i} for the platform" for i in range(500))
+
+        prompt = build_prompt(text, token_budget=100)
+
+        self.assertEqual(prompt.trimmed, ["truncated"])
+        self.assertLessEqual(estimate_tokens(prompt.text), 100)
+        self.assertGreater(prompt.original_tokens, 100)
+
+    def test_system_instruction_is_compact_and_limited_to_sections(self):
+        """Test the static instruction holds only the requested schema sections"""
+        from .prompts import system_instruction
+        instruction = system_instruction(("skills",))
+
+        self.assertIn('{"skills":["string"]}', instruction)
+        self.assertNotIn("education", instruction)
+        self.assertIs(instruction, system_instruction(("skills",)))
+
+    @override_settings(RESUME_PROMPT_TOKEN_BUDGET=1000, RESUME_LLM_BACKEND="gemini")
+    @patch('resume.llm.genai.GenerativeModel')
+    def test_gemini_receives_system_instruction_and_resume_text(self, mock_model):
+        """Test the static prompt is sent as a system instruction and only the resume as content"""
+        from .llm import reset_llm_client
+        from .metrics import counters
+        reset_llm_client()
+        self.addCleanup(reset_llm_client)
+        mock_model.return_value.generate_content.return_value = MagicMock(text='```json\n{"skills": ["Python"]}\n```')
+        tokens_before = counters.get("gemini.prompt_tokens")
+
+        result = parse_resume_with_gemini("John Doe\nSkills\nPython", sections=["skills"])
+
+        self.assertEqual(result, {"skills": ["Python"]})
+        self.assertIn("system_instruction", mock_model.call_args.kwargs)
+        self.assertEqual(mock_model.return_value.generate_content.call_args.args, ("John Doe\nSkills\nPython",))
+        self.assertGreater(counters.get("gemini.prompt_tokens"), tokens_before)
+
+class LLMClientTests(TestCase):
+    def setUp(self):
+        from .prompts import build_prompt
+        self.prompt = build_prompt("John Doe\nSkills\nPython", ["skills"])
+        # Injected rather than patching time.sleep, which pymongo's monitor threads also call
+        self.sleep = MagicMock()
+
+    def llm_client(self, backend, **kwargs):
+        from .llm import CircuitBreaker, LLMClient
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        return LLMClient(backend, timeout=5, deadline=30, max_attempts=3, breaker=breaker, sleep=self.sleep, **kwargs)
+
+    def test_retries_transient_failures(self):
+        """Test a failing call is retried with backoff and then succeeds"""
+        backend = MagicMock()
+        backend.generate.side_effect = [ConnectionError("reset"), '{"skills": []}']
+        backend.is_retryable.return_value = True
+
+        self.assertEqual(self.llm_client(backend).complete(self.prompt), '{"skills": []}')
+        self.assertEqual(backend.generate.call_count, 2)
+        self.assertEqual(backend.generate.call_args.args[1], 5)
+        self.sleep.assert_called_once()
+
+    def test_non_retryable_error_fails_fast(self):
+        """Test errors the backend marks as permanent are not retried"""
+        from .llm import LLMError
+        backend = MagicMock()
+        backend.generate.side_effect = ValueError("bad api key")
+        backend.is_retryable.return_value = False
+
+        with self.assertRaises(LLMError):
+            self.llm_client(backend).complete(self.prompt)
+        backend.generate.assert_called_once()
+
+    def test_breaker_opens_then_allows_trial_call(self):
+        """Test repeated failures open the circuit and a trial call closes it again"""
+        from .llm import CircuitOpenError, LLMError
+        backend = MagicMock()
+        backend.generate.side_effect = TimeoutError("slow")
+        client = self.llm_client(backend)
+
+        for _ in range(2):
+            with self.assertRaises(LLMError):
+                client.complete(self.prompt)
+        calls = backend.generate.call_count
+        with self.assertRaises(CircuitOpenError):
+            client.complete(self.prompt)
+        self.assertEqual(backend.generate.call_count, calls)
+
+        client.breaker._opened_at -= 31
+        backend.generate.side_effect = None
+        backend.generate.return_value = '{"skills": []}'
+        self.assertEqual(client.complete(self.prompt), '{"skills": []}')
+        self.assertEqual(client.breaker.state, "closed")
+
+    def test_stream_closed_during_trial_frees_the_breaker(self):
+        """Test a half-open stream its reader abandons does not keep the circuit shut"""
+        backend = MagicMock()
+        backend.stream.side_effect = lambda prompt, timeout: iter(['{"skills":', ' []}'])
+        client = self.llm_client(backend)
+        client.breaker._opened_at = time.monotonic() - 31
+
+        stream = client.stream(self.prompt)
+        next(stream)
+        stream.close()
+
+        self.assertEqual(client.breaker.state, "half_open")
+        self.assertEqual("".join(client.stream(self.prompt)), '{"skills": []}')
+        self.assertEqual(client.breaker.state, "closed")
+
+    def test_fake_backend_returns_schema_for_requested_sections(self):
+        """Test the offline backend answers with valid, empty sections"""
+        from .llm import FakeBackend
+        response = FakeBackend(latency=0.1, jitter=0, sleep=self.sleep).generate(self.prompt, timeout=5)
+
+        self.assertEqual(json.loads(response), {"skills": []})
+        self.sleep.assert_called_once_with(0.1)
+
+    @patch('resume.views.parse_resume_with_gemini')
+    def test_upload_falls_back_to_local_parser(self, mock_gemini):
+        """Test uploads still succeed from the local parser while the LLM is unavailable"""
+        from .llm import CircuitOpenError
+        parse_cache.clear()
+        mock_gemini.side_effect = CircuitOpenError("LLM circuit breaker is open")
+        text = "John Doe\njohn@example.com\nSkills\nPython, Django, SQL"
+
+        with patch.object(parse_cache, '_collection') as collection, \
+                patch('resume.views.extract_text_from_pdf', return_value=text), \
+                patch('resume.utils.extract_name', return_value="John Doe"):
+            collection.find_one.return_value = None
+            response = APIClient().post('/resume/extract/', {
+                'file': SimpleUploadedFile("resume.pdf", synthetic_pdf(1), content_type="application/pdf"),
+                'mode': 'sync',
+            }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Resume-Parse-Tier"], "local")
+        self.assertEqual(response.data["personal"]["email"], "john@example.com")
+        self.assertEqual(response.data["skills"], ["Python", "Django", "SQL"])
+
+class StreamingParseTests(TestCase):
+    response_text = '```json\n' + json.dumps({
+        "personal": {"name": "John Doe", "summary": "Builds {fast}, \"reliable\" APIs"},
+        "skills": ["Python", "C++"],
+        "experience": [{"jobTitle": "Engineer", "tasks": ["a, b", "[c]"]}],
+        "projects": [],
+        "education": None,
+    }) + '\n```'
+
+    def test_scanner_emits_sections_as_they_complete(self):
+        """Test each top-level member is decoded once its closing delimiter arrives"""
+        from .streaming import SectionScanner
+        scanner = SectionScanner()
+        sections = []
+        for char in self.response_text:
+            sections.extend(scanner.feed(char))
+
+        self.assertTrue(scanner.complete)
+        self.assertEqual(dict(sections), json.loads(self.response_text[8:-4]))
+        self.assertEqual([section for section, _ in sections],
+                         ["personal", "skills", "experience", "projects", "education"])
+
+    def test_stream_matches_non_streaming_parse(self):
+        """Test the merged stream is identical to the non-streaming result"""
+        backend = MagicMock()
+        backend.name = "test"
+        backend.generate.return_value = self.response_text
+        backend.stream.return_value = iter([self.response_text[i:i + 7] for i in range(0, len(self.response_text), 7)])
+
+        with patch('resume.utils.get_llm_client') as get_client:
+            from .llm import LLMClient
+            get_client.return_value = LLMClient(backend)
+            streamed = dict(resume_utils.stream_resume_with_gemini("John Doe resume"))
+            whole = parse_resume_with_gemini("John Doe resume")
+
+        self.assertEqual(streamed, whole)
+
+    def test_stream_retried_only_before_first_chunk(self):
+        """Test a stream that fails before producing output is retried"""
+        from .llm import LLMClient
+        backend = MagicMock()
+        backend.is_retryable.return_value = True
+        backend.stream.side_effect = [ConnectionError("reset"), iter(['{"skills":', ' []}'])]
+
+        chunks = list(LLMClient(backend, sleep=MagicMock()).stream(MagicMock()))
+
+        self.assertEqual("".join(chunks), '{"skills": []}')
+        self.assertEqual(backend.stream.call_count, 2)
+
+    @patch('resume.views.stream_resume_with_gemini')
+    @patch('resume.views.extract_text_from_pdf', return_value="John Doe resume")
+    def test_sse_view_streams_sections_then_document(self, mock_extract, mock_stream):
+        """Test sections are sent as events, followed by the merged document"""
+        parse_cache.clear()
+        mock_stream.return_value = iter([("personal", {"name": "John Doe"}), ("skills", ["Python"])])
+
+        with patch.object(parse_cache, '_collection') as collection:
+            collection.find_one.return_value = None
+            response = APIClient().post('/resume/extract/stream/', {
+                'file': SimpleUploadedFile("resume.pdf", synthetic_pdf(1), content_type="application/pdf"),
+            }, format='multipart')
+            body = b"".join(response.streaming_content).decode()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = [block.split("\n") for block in body.strip().split("\n\n")]
+        self.assertEqual([lines[0] for lines in events],
+                         ["event: section", "event: section", "event: done"])
+        self.assertEqual(json.loads(events[0][1][6:]), {"section": "personal", "data": {"name": "John Doe"}})
+        self.assertEqual(json.loads(events[2][1][6:]), {"personal": {"name": "John Doe"}, "skills": ["Python"]})
+        collection.replace_one.assert_called_once()
+
+    @patch('resume.utils.extract_name', return_value="John Doe")
+    @patch('resume.views.parse_resume_with_gemini')
+    @patch('resume.views.stream_resume_with_gemini')
+    def test_tiered_stream_matches_tiered_parse(self, mock_stream, mock_parse, mock_name):
+        """Test the tiered stream sends confident local sections, then streams only the escalated ones"""
+        from .views import parse_with_strategy
+        text = "\n".join([
+            "John Doe", "john.doe@example.com | +1 416 555 2671",
+            "Summary", "Backend engineer with six years of experience.",
+            "Skills", "Python, Django, MongoDB, Docker",
+            "Experience", "Worked on many things",
+            "Education", "ABC University, Toronto", "BSc Computer Science 06/2016",
+        ])
+        experience = [{"jobTitle": "Engineer", "company": "XYZ", "startDate": "01/2020",
+                       "endDate": None, "location": "", "tasks": []}]
+        mock_stream.return_value = iter([("experience", experience)])
+        mock_parse.return_value = {"experience": experience}
+        parse_cache.clear()
+
+        with patch.object(parse_cache, '_collection') as collection:
+            collection.find_one.return_value = None
+            events = list(stream_parse_events(text, "tiered"))
+            parse_cache.clear()
+            expected = parse_with_strategy(text, "tiered")
+
+        mock_stream.assert_called_once_with(text, ["experience"])
+        payloads = [json.loads(event.split("\n")[1][6:]) for event in events]
+        sections = [payload["section"] for payload in payloads[:-1]]
+        self.assertEqual(sections, ["personal", "skills", "projects", "education", "experience"])
+        self.assertEqual(payloads[-1], expected.data)
+        self.assertEqual(payloads[-1]["experience"], experience)
+
+    def test_sse_view_rejects_unsupported_file(self):
+        """Test validation errors are returned before any stream starts"""
+        response = APIClient().post('/resume/extract/stream/', {
+            'file': SimpleUploadedFile("resume.txt", b"text", content_type="text/plain"),
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {"error": "Unsupported file format"})
+
+class ExtractionBenchmarkTests(TestCase):
+    def test_corpus_is_reproducible(self):
+        """Test the same seed produces byte-identical PDF and DOCX files"""
+        from .benchmarks.corpus import build_corpus
+        first = build_corpus((1, 2), seed=3)
+        second = build_corpus((1, 2), seed=3)
+
+        self.assertEqual([d.data for d in first], [d.data for d in second])
+        self.assertEqual({d.extension for d in first}, {"pdf", "docx"})
+        self.assertEqual({d.layout for d in first}, {"single-column", "two-column", "paragraphs", "tables"})
+
+    def test_percentiles_interpolate(self):
+        """Test latency percentiles over a known sample"""
+        from .benchmarks.runner import percentile
+        values = [i / 100 for i in range(1, 101)]
+
+        self.assertAlmostEqual(percentile(values, 0.50), 0.505)
+        self.assertAlmostEqual(percentile(values, 0.99), 0.9901)
+
+    @override_settings(RESUME_LLM_BACKEND="fake", RESUME_FAKE_LLM_LATENCY=0, RESUME_FAKE_LLM_JITTER=0)
+    def test_benchmark_times_every_stage(self):
+        """Test each pipeline stage gets its own timings"""
+        from .benchmarks.corpus import build_corpus
+        from .benchmarks.runner import run_benchmark
+        from .llm import reset_llm_client
+        reset_llm_client()
+        self.addCleanup(reset_llm_client)
+
+        results = run_benchmark(build_corpus((1,)), repeat=1, warmup=False)
+
+        self.assertEqual(set(results["stages"]), {
+            "upload", "extract_pdf", "extract_docx", "extract_sections", "extract_name", "extract_fields",
+            "llm_parse", "total"})
+        self.assertEqual(results["stages"]["total"]["count"], 4)
+        self.assertGreater(results["peak_rss_mb"], 0)
+
+class FieldExtractorTests(TestCase):
+    sample = "\n".join([
+        "John Doe",
+        "john.doe@example.com | (416) 555-0199",
+        "Experience",
+        "Engineer at XYZ Corp",
+        "Skills",
+        "Python, Django",
+        "Projects",
+        "Resume Parser",
+    ])
+
+    @patch('resume.utils.extract_name', return_value="John Doe")
+    def test_single_pass_matches_separate_extractors(self, mock_name):
+        """Test one scan returns the email and sections the per-field extractors find"""
+        fields = resume_utils.extract_fields(self.sample)
+
+        self.assertEqual(fields["email"], resume_utils.extract_email(self.sample))
+        for section, lines in resume_utils.extract_sections(self.sample).items():
+            self.assertEqual(fields[section], lines)
+        self.assertEqual(fields["name"], "John Doe")
+        # NER only sees the header lines, never the whole document
+        self.assertEqual(mock_name.call_args.args[0], "\n".join(self.sample.split("\n")[:8]))
+
+    @override_settings(RESUME_PHONE_REGION="CA")
+    def test_phone_without_country_code_uses_default_region(self):
+        """Test local numbers are read in the configured region"""
+        self.assertEqual(resume_utils.scan_fields(self.sample)["phone"], "+1 416-555-0199")
+        self.assertIsNone(resume_utils.scan_fields("Engineer (03/2015 - 02/2024)\nOrder 2024 1234 56")["phone"])
+
+    @patch('resume.utils.extract_names', return_value=["John Doe", None])
+    def test_batch_runs_ner_once(self, mock_names):
+        """Test a batch of resumes shares one NER call"""
+        fields = resume_utils.extract_fields_batch([self.sample, "No contact details"])
+
+        mock_names.assert_called_once()
+        self.assertEqual([f["name"] for f in fields], ["John Doe", None])
+        self.assertEqual(fields[0]["email"], "john.doe@example.com")
+        self.assertIsNone(fields[1]["email"])
+
+    @patch('resume.utils.extract_name', return_value="John Doe")
+    def test_local_parse_scans_text_once(self, mock_name):
+        """Test the tiered local parser gets contact details and header-split sections from one scan"""
+        with patch('resume.utils.scan_fields', wraps=resume_utils.scan_fields) as mock_scan:
+            data, _ = parse_locally(self.sample)
+
+        mock_scan.assert_called_once()
+        self.assertEqual(data["personal"]["email"], "john.doe@example.com")
+        self.assertEqual(data["skills"], ["Python", "Django"])
+        self.assertEqual(mock_name.call_args.args[0], "John Doe\njohn.doe@example.com | (416) 555-0199")
+
+class DocxTextExtractionTests(TestCase):
+    def _docx(self, body, extra_parts=None):
+        """A minimal DOCX holding `body` as its document.xml body."""
+        namespaces = (
+            'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+            'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+        )
+        output = BytesIO()
+        with zipfile.ZipFile(output, "w") as archive:
+            archive.writestr("word/document.xml", f'<w:document {namespaces}><w:body>{body}</w:body></w:document>')
+            for name, content in (extra_parts or {}).items():
+                archive.writestr(name, f'<w:hdr {namespaces}>{content}</w:hdr>')
+        return output.getvalue()
+
+    def test_tables_and_headers_in_reading_order(self):
+        """Test table rows and page headers are extracted, unlike python-docx paragraphs"""
+        data = self._docx(
+            '<w:p><w:r><w:t>Skills</w:t></w:r></w:p>'
+            '<w:tbl><w:tr><w:tc><w:p><w:r><w:t>Python</w:t></w:r></w:p></w:tc>'
+            '<w:tc><w:p><w:r><w:t>Django</w:t></w:r></w:p></w:tc></w:tr></w:tbl>'
+            '<w:p><w:r><w:t xml:space="preserve">Jan 2020 </w:t><w:tab/><w:t>Present</w:t></w:r></w:p>',
+            {
+                "word/header1.xml": '<w:p><w:r><w:t>john@example.com</w:t></w:r></w:p>',
+                "word/header2.xml": '<w:p><w:r><w:t>john@example.com</w:t></w:r></w:p>',
+            },
+        )
+
+        self.assertEqual(
+            resume_utils.extract_text_from_docx(BytesIO(data)),
+            "john@example.com\nSkills\nPython | Django\nJan 2020 \tPresent",
+        )
+
+    def test_text_box_read_once(self):
+        """Test text boxes are read from the DrawingML copy and not the VML fallback"""
+        data = self._docx(
+            '<w:p><w:r><mc:AlternateContent>'
+            '<mc:Choice><w:txbxContent><w:p><w:r><w:t>Kubernetes</w:t></w:r></w:p></w:txbxContent></mc:Choice>'
+            '<mc:Fallback><w:txbxContent><w:p><w:r><w:t>Kubernetes</w:t></w:r></w:p></w:txbxContent></mc:Fallback>'
+            '</mc:AlternateContent></w:r><w:r><w:t>Tools</w:t></w:r></w:p>'
+        )
+
+        self.assertEqual(resume_utils.extract_text_from_docx(BytesIO(data)), "Kubernetes\nTools")
+
+    def test_matches_python_docx_on_plain_paragraphs(self):
+        """Test the streaming extractor returns the same text python-docx does for body paragraphs"""
+        from .benchmarks.corpus import synthetic_docx
+        from .management.commands.bench_docx_extraction import python_docx_text
+        data = synthetic_docx(3)
+
+        self.assertEqual(resume_utils.extract_text_from_docx(BytesIO(data)), python_docx_text(data))
+
+class ResumeScoreTests(TestCase):
+    job_description = (
+        "Backend Engineer. Python developer with Django REST Framework, PostgreSQL, Redis and Docker. "
+        "Kubernetes (k8s) and CI/CD pipelines are a plus. You will design RESTful APIs."
+    )
+    backend_resume = {
+        "personal": {"name": "Jane Doe", "email": "jane@example.com", "summary": "Backend engineer"},
+        "skills": ["Python", "Django REST Framework", "Postgres", "Docker"],
+        "experience": [{"jobTitle": "Engineer", "tasks": ["Built REST APIs", "Ran services on Kubernetes"]}],
+    }
+    frontend_resume = {"personal": {"summary": "Frontend developer"}, "skills": ["React", "CSS"]}
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = '/resume/score/'
+
+    def test_terms_use_skill_aliases_and_longest_match(self):
+        """Test aliases map to one skill and multi-word skills win over their parts"""
+        from .scoring import extract_terms
+        terms = extract_terms("Kubernetes/k8s, React Native and the Django REST Framework; CI/CD pipelines")
+
+        self.assertEqual(terms, [
+            "skill:Kubernetes", "skill:Kubernetes", "skill:React Native",
+            "skill:Django REST Framework", "skill:CI/CD", "pipeline",
+        ])
+
+    def test_scores_rank_matching_resume_higher(self):
+        """Test a matching resume scores higher and reports what it misses"""
+        from .scoring import score_resumes
+        backend, frontend = score_resumes(self.job_description, [self.backend_resume, self.frontend_resume])
+
+        self.assertGreater(backend["score"], frontend["score"])
+        self.assertTrue(0 <= frontend["score"] <= backend["score"] <= 100)
+        self.assertIn("PostgreSQL", backend["matched_keywords"])
+        self.assertIn("Kubernetes", backend["matched_keywords"])
+        self.assertIn("Redis", backend["missing_keywords"])
+        self.assertEqual(frontend["matched_keywords"], ["developer"])
+        # Contact details are not scored
+        self.assertNotIn("jane", backend["matched_keywords"])
+
+    def test_empty_inputs_score_zero(self):
+        from .scoring import score_resumes
+        self.assertEqual(score_resumes("Python and Django", [{}])[0]["score"], 0)
+        self.assertEqual(score_resumes("the and of", [self.backend_resume])[0]["missing_keywords"], [])
+
+    @patch('resume.views.resume_collection')
+    def test_score_single_resume(self, mock_collection):
+        """Test one stored resume is scored without calling the LLM"""
+        mock_collection.find_one.return_value = {"_id": "r1", "title": "Backend", "resume_details": self.backend_resume}
+
+        with patch('resume.views.get_llm_client') as mock_llm:
+            response = self.client.post(self.url, {
+                "job_description": self.job_description, "resume_id": "r1",
+            }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["resume_id"], "r1")
+        self.assertIn("Docker", response.data["matched_keywords"])
+        mock_llm.assert_not_called()
+        mock_collection.find_one.assert_called_once_with({"_id": "r1"}, {"title": 1, "resume_details": 1})
+
+    @patch('resume.views.resume_collection')
+    def test_score_batch_by_user_best_first(self, mock_collection):
+        """Test all of a user's resumes are scored in one request, best first"""
+        mock_collection.find.return_value = [
+            {"_id": "front", "title": "Frontend", "resume_details": self.frontend_resume},
+            {"_id": "back", "title": "Backend", "resume_details": self.backend_resume},
+            {"_id": "blank", "title": "Draft"},
+        ]
+
+        response = self.client.post(self.url, {
+            "job_description": self.job_description, "user_id": "user123",
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result["resume_id"] for result in response.data["results"]], ["back", "front", "blank"])
+
+    @patch('resume.views.resume_collection')
+    def test_score_validation(self, mock_collection):
+        mock_collection.find_one.return_value = None
+
+        missing_jd = self.client.post(self.url, {"resume_id": "r1"}, format='json')
+        missing_target = self.client.post(self.url, {"job_description": "Python"}, format='json')
+        not_found = self.client.post(self.url, {"job_description": "Python", "resume_id": "r1"}, format='json')
+
+        self.assertEqual(missing_jd.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(missing_target.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(not_found.status_code, status.HTTP_404_NOT_FOUND)
+
+class SearchIndexTests(TestCase):
+    backend = {
+        "personal": {"summary": "Backend engineer"},
+        "skills": ["Python", "Django", "PostgreSQL"],
+        "experience": [{"jobTitle": "Backend Developer", "tasks": ["Built Django REST APIs", "Tuned PostgreSQL queries"]}],
+    }
+    devops = {
+        "skills": ["Kubernetes", "Docker", "Terraform", "Python"],
+        "experience": [{"jobTitle": "DevOps Engineer", "tasks": ["Ran k8s clusters", "Wrote CI/CD pipelines"]}],
+    }
+    designer = {"skills": ["Figma", "UI/UX"], "education": [{"course": "Graphic Design", "institution": "Art School"}]}
+
+    def make_index(self):
+        from .search import SearchIndex
+        self.terms = MagicMock()
+        self.meta = MagicMock()
+        self.seq = 0
+
+        def next_seq(query, update, **kwargs):
+            self.seq += update["$inc"]["value"]
+            return {"value": self.seq}
+
+        self.meta.find_one_and_update.side_effect = next_seq
+        index = SearchIndex(self.terms, self.meta, sync_interval=0)
+        index.load_documents([])
+        index._loaded = True
+        return index
+
+    def term_document(self, resume_id, details, seq):
+        from .search import resume_terms
+        terms = resume_terms(details)
+        return {"_id": resume_id, "seq": seq, "terms": terms, "length": sum(c for _, c in terms), "deleted": False}
+
+    def test_bm25_ranks_best_match_first(self):
+        """Test resumes are ranked by BM25 and skill aliases match"""
+        index = self.make_index()
+        index.load_documents([
+            self.term_document("backend", self.backend, 1),
+            self.term_document("devops", self.devops, 2),
+            self.term_document("designer", self.designer, 3),
+        ])
+
+        self.assertEqual([rid for rid, _ in index.search("Django backend developer with PostgreSQL")], ["backend"])
+        self.assertEqual([rid for rid, _ in index.search("kubernetes")], ["devops"])
+        ranked = [rid for rid, _ in index.search("Python Kubernetes engineer")]
+        self.assertEqual(ranked, ["devops", "backend"])
+        self.assertEqual(index.search("python", limit=1)[0][0], "devops")
+        self.assertEqual(index.search("cobol"), [])
+
+    def test_incremental_updates_match_a_fresh_build(self):
+        """Test creates, updates and deletes through the delta segment give fresh-build results"""
+        index = self.make_index()
+        index.index_resume("backend", self.backend)
+        index.index_resume("devops", self.devops)
+        index.index_resume("designer", self.designer)
+        # The designer retrains as a backend developer, the devops resume is deleted
+        index.index_resume("designer", {"skills": ["Django", "Python"], "personal": {"summary": "Backend developer"}})
+        index.remove_resume("devops")
+        writes = self.terms.replace_one.call_args_list
+
+        fresh = self.make_index()
+        fresh.load_documents([
+            self.term_document("backend", self.backend, 1),
+            self.term_document("designer", {"skills": ["Django", "Python"], "personal": {"summary": "Backend developer"}}, 2),
+        ])
+        for query in ("python django", "figma", "kubernetes", "backend developer"):
+            self.assertEqual(index.search(query), fresh.search(query), query)
+        self.assertEqual(len(writes), 5)
+        self.assertTrue(writes[-1][0][1]["deleted"])
+
+    def test_delta_merge_keeps_results(self):
+        """Test folding the delta segment into the CSR arrays changes nothing"""
+        index = self.make_index()
+        for number in range(6):
+            index.index_resume(f"r{number}", [self.backend, self.devops, self.designer][number % 3])
+        before = index.search("python design kubernetes", limit=10)
+
+        index._merge_delta()
+
+        self.assertEqual(index.stats()["delta_resumes"], 0)
+        self.assertEqual(index.search("python design kubernetes", limit=10), before)
+
+    def test_sync_picks_up_other_processes_writes(self):
+        """Test term documents written elsewhere are applied, and stale ones ignored"""
+        index = self.make_index()
+        index.load_documents([self.term_document("backend", self.backend, 5)])
+        self.terms.find.return_value.sort.return_value = [
+            self.term_document("backend", self.backend, 5),
+            self.term_document("devops", self.devops, 6),
+            {"_id": "backend", "seq": 7, "terms": [], "length": 0, "deleted": True},
+        ]
+
+        index.sync(force=True)
+
+        self.assertEqual([rid for rid, _ in index.search("python")], ["devops"])
+        self.assertEqual(index.stats()["synced_seq"], 7)
+
+    def test_rebuild_rewrites_every_resume(self):
+        """Test a rebuild indexes all resumes and tombstones ones no longer stored"""
+        index = self.make_index()
+        resumes = MagicMock()
+        resumes.find.return_value = [
+            {"_id": "backend", "resume_details": self.backend},
+            {"_id": "devops", "resume_details": self.devops},
+        ]
+
+        self.assertEqual(index.rebuild(resumes, batch_size=1), 2)
+
+        self.assertEqual(self.terms.bulk_write.call_count, 2)
+        stale_filter = self.terms.update_many.call_args[0][0]
+        self.assertEqual(stale_filter, {"seq": {"$lt": 1}, "deleted": False})
+        self.assertEqual(index.stats()["resumes"], 2)
+
+    def test_items_of_the_wrong_type_are_skipped(self):
+        """Test strings and nulls among sections, as an LLM may return, do not break indexing"""
+        from .search import searchable_text
+        details = {
+            "personal": "John Doe",
+            "skills": ["Python", None],
+            "experience": ["Engineer at Acme", None, {"jobTitle": "Backend Developer", "tasks": "Built APIs"}],
+            "projects": [None],
+            "education": [{"course": 42, "institution": "ABC University"}],
+        }
+
+        self.assertEqual(searchable_text(details), "Python\nBackend Developer\nABC University")
+
+    @patch('resume.search.get_search_index')
+    def test_safe_indexing_logs_any_error(self, mock_index):
+        """Test an unexpected indexing error is logged, not raised to the request handler"""
+        from .search import index_resume_safely
+        mock_index.return_value.index_resume.side_effect = AttributeError("bad details")
+
+        with self.assertLogs('resume.search', level='WARNING'):
+            index_resume_safely("resume1", {"skills": ["Python"]})
+
+class DuplicateDetectionTests(TestCase):
+    def setUp(self):
+        from .benchmarks.corpus import synthetic_resume_details
+        self.original, self.other = [r["resume_details"] for r in synthetic_resume_details(2, seed=3)]
+        self.copy = json.loads(json.dumps(self.original))
+        self.copy["title"] = "Copy for Globex"
+        self.copy["skills"][-1] = "Rust"
+
+    def test_signatures_estimate_similarity(self):
+        """Test a lightly edited copy is near the original and another resume is not"""
+        from .dedup import minhash, similarity
+        original = minhash(self.original)
+
+        self.assertGreater(similarity(original, minhash(self.copy)), 0.8)
+        self.assertLess(similarity(original, minhash(self.other)), 0.3)
+        self.assertIsNone(minhash({"personal": {"name": "Draft"}}))
+
+    def test_lookup_reads_only_band_candidates(self):
+        """Test duplicates are looked up by LSH band and confirmed on the signature"""
+        from .dedup import find_duplicates, signature_fields
+        fields = signature_fields(self.copy)
+        collection = MagicMock()
+        collection.find.return_value.limit.return_value = [
+            {"_id": "original", "minhash": signature_fields(self.original)["minhash"]},
+            {"_id": "other", "minhash": signature_fields(self.other)["minhash"]},
+        ]
+
+        matches = find_duplicates(collection, fields, exclude_id="self")
+
+        self.assertEqual([resume_id for resume_id, _ in matches], ["original"])
+        query = collection.find.call_args[0][0]
+        self.assertEqual(query, {"lsh_bands": {"$in": fields["lsh_bands"]}, "_id": {"$ne": "self"}})
+
+    @patch('resume.views.upsert_similar_safely')
+    @patch('resume.views.index_resume_safely')
+    @patch('resume.views.resume_collection')
+    def test_create_flags_likely_duplicates(self, mock_collection, mock_index, mock_similar):
+        """Test a new near-copy is stored with its signature and flagged"""
+        from .dedup import signature_fields
+        mock_collection.find.return_value.limit.return_value = [
+            {"_id": "original", "minhash": signature_fields(self.original)["minhash"]},
+        ]
+
+        response = APIClient().post('/resume/create/', {
+            "user_id": "user123", "resumeData": json.dumps(self.copy),
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["possible_duplicates"], ["original"])
+        stored = mock_collection.insert_one.call_args[0][0]
+        self.assertEqual(stored["duplicate_of"], ["original"])
+        self.assertEqual(len(stored["minhash"]), 128)
+        self.assertEqual(len(stored["lsh_bands"]), 16)
+
+    def test_clusters_join_confirmed_pairs(self):
+        """Test band buckets become clusters only where the signatures agree"""
+        from .dedup import duplicate_clusters, signature_fields
+        second_copy = json.loads(json.dumps(self.copy))
+        second_copy["personal"]["summary"] = "Updated summary line."
+        signatures = {
+            "a": signature_fields(self.original)["minhash"],
+            "b": signature_fields(self.copy)["minhash"],
+            "c": signature_fields(second_copy)["minhash"],
+            "d": signature_fields(self.other)["minhash"],
+        }
+        collection = MagicMock()
+        collection.aggregate.return_value = [{"_id": "0:x", "ids": ["b", "a"]}, {"_id": "3:y", "ids": ["c", "b", "d"]}]
+        collection.find.return_value = [
+            {"_id": resume_id, "minhash": signature, "user_id": "u1", "title": resume_id}
+            for resume_id, signature in signatures.items()
+        ]
+
+        clusters = duplicate_clusters(collection)
+
+        self.assertEqual([[resume_id for resume_id, _ in cluster] for cluster in clusters], [["a", "b", "c"]])
+
+    @patch('resume.views.resume_collection.find_one')
+    def test_retrieve_hides_duplicate_detection_fields(self, mock_find_one):
+        mock_find_one.return_value = {"_id": "r1", "resume_details": {}}
+
+        APIClient().get('/resume/retrieve/', {"id": "r1"})
+
+        mock_find_one.assert_called_once_with({"_id": "r1"}, {"minhash": 0, "lsh_bands": 0, "duplicate_of": 0})
+
+
+class SimilarResumeTests(TestCase):
+    def setUp(self):
+        from .benchmarks.corpus import synthetic_resume_details
+        from .similar import SimilarityMatrix
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.matrix = SimilarityMatrix(directory, dim=256)
+        self.resumes = [r["resume_details"] for r in synthetic_resume_details(6, seed=5)]
+        self.copy = json.loads(json.dumps(self.resumes[0]))
+        self.copy["title"] = "Copy for Initech"
+
+    def test_vectors_are_unit_length_and_rank_near_copies_first(self):
+        from .similar import resume_vector
+        original = resume_vector(self.resumes[0], 256)
+
+        self.assertAlmostEqual(float(original @ original), 1.0, places=5)
+        self.assertGreater(float(original @ resume_vector(self.copy, 256)),
+                           float(original @ resume_vector(self.resumes[1], 256)))
+        self.assertFalse(resume_vector({}, 256).any())
+
+    def test_upsert_remove_and_rebuild(self):
+        """Test rows are overwritten in place, blanked on delete and compacted on rebuild"""
+        for i, details in enumerate(self.resumes):
+            self.matrix.upsert(f"r{i}", details)
+        self.matrix.upsert("copy", self.copy)
+        self.matrix.upsert("copy", self.copy)
+
+        matches = self.matrix.most_similar(self.resumes[0], limit=3, exclude_id="r0")
+        self.assertEqual(matches[0][0], "copy")
+        self.assertEqual(len(matches), 3)
+        self.assertEqual(self.matrix.stats(), {"rows": 7, "resumes": 7, "dim": 256})
+
+        self.matrix.remove("copy")
+        self.assertNotIn("copy", [resume_id for resume_id, _ in self.matrix.most_similar(self.resumes[0], limit=10)])
+        self.assertEqual(self.matrix.stats()["resumes"], 6)
+
+        self.matrix.rebuild((f"r{i}", details) for i, details in enumerate(self.resumes))
+        self.assertEqual(self.matrix.stats(), {"rows": 6, "resumes": 6, "dim": 256})
+
+    def test_other_processes_see_growth(self):
+        """Test a second handle on the same files picks up rows written past the first capacity"""
+        from . import similar
+        from .similar import SimilarityMatrix
+        reader = SimilarityMatrix(self.matrix.directory, dim=256)
+        self.matrix.upsert("r0", self.resumes[0])
+        self.assertEqual(reader.stats()["rows"], 1)
+
+        with patch.object(similar, "INITIAL_CAPACITY", 2):
+            grower = SimilarityMatrix(tempfile.mkdtemp(dir=self.matrix.directory), dim=256)
+            follower = SimilarityMatrix(grower.directory, dim=256)
+            for i, details in enumerate(self.resumes):
+                grower.upsert(f"r{i}", details)
+                self.assertEqual(follower.stats()["rows"], i + 1)
+        self.assertEqual(follower.most_similar(self.copy, limit=1)[0][0], "r0")
+
+    @patch('resume.views.resume_collection')
+    def test_similar_view_returns_titles_best_first(self, mock_collection):
+        for i, details in enumerate(self.resumes):
+            self.matrix.upsert(f"r{i}", details)
+        self.matrix.upsert("copy", self.copy)
+        mock_collection.find_one.return_value = {"_id": "r0", "resume_details": self.resumes[0]}
+        mock_collection.find.return_value = [
+            {"_id": f"r{i}", "title": f"Resume {i}", "user_id": "u1"} for i in range(1, 6)
+        ] + [{"_id": "copy", "title": "Copy", "user_id": "u2"}]
+
+        with patch('resume.views.get_similarity_matrix', return_value=self.matrix):
+            response = APIClient().get('/resume/similar/r0/', {"limit": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]["resume_id"], "copy")
+        self.assertEqual(results[0]["title"], "Copy")
+        self.assertGreater(results[0]["similarity"], results[1]["similarity"])
+
+    @patch('resume.views.resume_collection.find_one', return_value=None)
+    def test_similar_view_missing_resume(self, mock_find_one):
+        response = APIClient().get('/resume/similar/nope/')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @patch('resume.views.resume_collection.find_one', return_value={"_id": "r0", "resume_details": {}})
+    def test_similar_view_unavailable_matrix(self, mock_find_one):
+        """Test a matrix that cannot be read, e.g. mid-rebuild, answers 503 rather than 500"""
+        matrix = MagicMock()
+        matrix.most_similar.side_effect = ValueError("mmap length is greater than file size")
+
+        with patch('resume.views.get_similarity_matrix', return_value=matrix):
+            response = APIClient().get('/resume/similar/r0/')
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class ResumeListingTests(TestCase):
+    @patch('resume.views.resume_collection.find')
+    def test_summary_listing_projects_and_sorts(self, mock_find):
+        """Test ?view=summary reads only listing fields, newest first, through the index order"""
+        legacy_id = ObjectId()
+        mock_find.return_value.sort.return_value = [
+            {"_id": "r2", "title": "New", "image_id": "img2",
+             "created_at": datetime(2024, 5, 1), "updated_at": datetime(2024, 5, 3)},
+            {"_id": str(legacy_id), "title": "Old"},
+        ]
+
+        response = APIClient().get('/resume/retrieve/', {"user_id": "u1", "view": "summary"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_find.assert_called_once_with({"user_id": "u1"}, {"title": 1, "image_id": 1, "created_at": 1, "updated_at": 1})
+        mock_find.return_value.sort.assert_called_once_with([("updated_at", -1), ("_id", -1)])
+        self.assertEqual([resume["_id"] for resume in response.data], ["r2", str(legacy_id)])
+        self.assertEqual(response.data[0]["image_url"], "img2")
+        self.assertNotIn("resume_details", response.data[0])
+        # Resumes from before timestamps fall back to their id's creation time
+        self.assertEqual(response.data[1]["created_at"], legacy_id.generation_time.replace(tzinfo=None))
+        self.assertEqual(response.data[1]["updated_at"], response.data[1]["created_at"])
+
+    @patch('resume.views.resume_collection.find')
+    def test_full_listing_is_unchanged(self, mock_find):
+        mock_find.return_value = [{"_id": "r1", "resume_details": {"a": 1}}]
+
+        response = APIClient().get('/resume/retrieve/', {"email": "a@example.com"})
+
+        mock_find.assert_called_once_with({"email": "a@example.com"}, {"minhash": 0, "lsh_bands": 0, "duplicate_of": 0})
+        self.assertEqual(response.data[0]["resume_details"], {"a": 1})
+
+    @patch('resume.views.upsert_similar_safely')
+    @patch('resume.views.index_resume_safely')
+    @patch('resume.views.resume_collection')
+    def test_writes_record_timestamps(self, mock_collection, mock_index, mock_similar):
+        mock_collection.find.return_value.limit.return_value = []
+        APIClient().post('/resume/create/', {"user_id": "u1", "resumeData": "{}"}, format='multipart')
+        created = mock_collection.insert_one.call_args[0][0]
+        self.assertEqual(created["created_at"], created["updated_at"])
+
+        mock_collection.find_one.return_value = dict(created, title="Old")
+        mock_collection.update_one.return_value = MagicMock(modified_count=1)
+        APIClient().put(f'/resume/update/{created["_id"]}/', {"title": "New"}, format='multipart')
+        update = mock_collection.update_one.call_args[0][1]["$set"]
+        self.assertGreaterEqual(update["updated_at"], created["updated_at"])
+
+        mock_collection.update_one.reset_mock()
+        APIClient().put(f'/resume/update/{created["_id"]}/', {"title": "Old"}, format='multipart')
+        self.assertNotIn("updated_at", mock_collection.update_one.call_args[0][1]["$set"])
+
+
+class EnsureIndexesTests(TestCase):
+    def test_creates_every_planned_index_and_reports_failures(self):
+        from pymongo.errors import OperationFailure
+        from db_indexes import ensure_indexes, index_plan
+        db = MagicMock()
+        db.__getitem__.return_value.create_index.side_effect = ["idx", OperationFailure("conflict")] + ["idx"] * 50
+
+        results = ensure_indexes(db)
+
+        self.assertEqual(len(results), sum(len(indexes) for indexes in index_plan().values()))
+        failed = [result for result in results if result[2]]
+        self.assertEqual(failed, [("resumes", "email_1_updated_at_-1__id_-1", "conflict")])
+        self.assertIn("users", [call[0][0] for call in db.__getitem__.call_args_list])
+
+    def test_plan_matches_lazily_created_indexes(self):
+        """Test the plan uses the same keys and TTLs as the classes that create indexes on first use"""
+        from db_indexes import index_plan
+        plan = index_plan()
+        self.assertIn(([("created_at", 1)], {"expireAfterSeconds": parse_cache.ttl_seconds}), plan["parse_cache"])
+        self.assertIn(([("seq", 1)], {}), plan["search_terms"])
+        self.assertIn(([("lsh_bands", 1)], {}), plan["resumes"])
+
+
+class CursorPaginationTests(TestCase):
+    def test_pages_continue_after_the_last_sort_key(self):
+        """Test each page is limit + 1 documents after the previous page's last key"""
+        from pagination import decode_cursor, fetch_page
+        collection = MagicMock()
+        cursor = collection.find.return_value.sort.return_value.limit
+        cursor.return_value = [
+            {"_id": "r3", "updated_at": datetime(2024, 5, 3)},
+            {"_id": "r2", "updated_at": datetime(2024, 5, 2)},
+            {"_id": "r1", "updated_at": datetime(2024, 5, 2)},
+        ]
+        sort = [("updated_at", -1), ("_id", -1)]
+
+        page, next_cursor = fetch_page(collection, {"user_id": "u1"}, None, sort, 2)
+
+        self.assertEqual([resume["_id"] for resume in page], ["r3", "r2"])
+        cursor.assert_called_once_with(3)
+        values = decode_cursor(next_cursor)
+        self.assertEqual(values[1], "r2")
+        self.assertEqual(values[0].replace(tzinfo=None), datetime(2024, 5, 2))
+
+        cursor.return_value = [{"_id": "r1", "updated_at": datetime(2024, 5, 2)}]
+        page, last_cursor = fetch_page(collection, {"user_id": "u1"}, None, sort, 2, values)
+
+        self.assertIsNone(last_cursor)
+        query = collection.find.call_args[0][0]
+        self.assertEqual(query["$and"][0], {"user_id": "u1"})
+        self.assertEqual(query["$and"][1]["$or"], [
+            {"updated_at": {"$lt": values[0]}},
+            {"updated_at": None},
+            {"updated_at": values[0], "_id": {"$lt": "r2"}},
+        ])
+
+    def test_null_keys_and_bad_cursors(self):
+        from pagination import InvalidPage, after, decode_cursor, encode_cursor
+        # Resumes without a timestamp sort last when newest first
+        self.assertEqual(after([("updated_at", -1), ("_id", -1)], [None, "r5"]),
+                         {"$or": [{"updated_at": None, "_id": {"$lt": "r5"}}]})
+        self.assertEqual(after([("_id", 1)], [ObjectId("0" * 24)])["$or"][0]["_id"]["$gt"], ObjectId("0" * 24))
+        for token in ("not a cursor", encode_cursor({"a": 1}), encode_cursor([{"$ne": None}])):
+            with self.assertRaises(InvalidPage):
+                decode_cursor(token)
+        with self.assertRaises(InvalidPage):
+            after([("_id", 1)], ["a", "b"])
+
+    @patch('resume.views.resume_collection.find')
+    def test_retrieve_listing_pages_on_request(self, mock_find):
+        from pagination import encode_cursor
+        limit = mock_find.return_value.sort.return_value.limit
+        limit.return_value = [
+            {"_id": f"r{i}", "title": f"Resume {i}", "updated_at": datetime(2024, 5, i)} for i in (3, 2, 1)
+        ]
+
+        response = APIClient().get('/resume/retrieve/', {"user_id": "u1", "view": "summary", "limit": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([resume["_id"] for resume in response.data["resumes"]], ["r3", "r2"])
+        self.assertIsNotNone(response.data["next_cursor"])
+        limit.assert_called_once_with(3)
+
+        response = APIClient().get('/resume/retrieve/', {"user_id": "u1", "cursor": encode_cursor([1, 2, 3])})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = APIClient().get('/resume/retrieve/', {"user_id": "u1", "limit": "x"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ResumePatchTests(TestCase):
+    def setUp(self):
+        self.url = '/resume/update/r1/'
+        patchers = [patch('resume.views.index_resume_safely'), patch('resume.views.upsert_similar_safely'),
+                    patch('resume.views.resume_collection')]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        from . import views
+        self.collection = views.resume_collection
+        self.collection.find.return_value.limit.return_value = []
+
+    def send(self, operations, **headers):
+        return APIClient().patch(self.url, json.dumps(operations),
+                                 content_type='application/json-patch+json', **headers)
+
+    def test_operations_translate_to_one_update(self):
+        from .patch import patch_to_update
+        conditions, update = patch_to_update([
+            {"op": "test", "path": "/personal/name", "value": "Ada"},
+            {"op": "replace", "path": "/experience/0/title", "value": "Lead Engineer"},
+            {"op": "add", "path": "/skills/-", "value": "Rust"},
+            {"op": "add", "path": "/skills/-", "value": "Go"},
+            {"op": "add", "path": "/projects/0", "value": {"name": "New"}},
+            {"op": "remove", "path": "/personal/website"},
+            {"op": "add", "path": "/a~1b", "value": 1},
+        ])
+
+        self.assertEqual(conditions, {
+            "resume_details.personal.name": {"$eq": "Ada", "$not": {"$type": "array"}},
+            "resume_details.experience.0.title": {"$exists": True},
+            "resume_details.personal.website": {"$exists": True},
+        })
+        self.assertEqual(update, {
+            "$set": {"resume_details.experience.0.title": "Lead Engineer", "resume_details.a/b": 1},
+            "$unset": {"resume_details.personal.website": ""},
+            "$push": {"resume_details.skills": {"$each": ["Rust", "Go"]},
+                      "resume_details.projects": {"$each": [{"name": "New"}], "$position": 0}},
+        })
+
+    def test_tests_compare_whole_values_before_the_patch(self):
+        """Test a test op is RFC 6902 equality, not array membership, on the stored resume"""
+        from .patch import PatchError, patch_to_update
+        conditions, _ = patch_to_update([
+            {"op": "test", "path": "/skills", "value": "Python"},
+            {"op": "test", "path": "/projects/0/technologies", "value": "Django"},
+            {"op": "test", "path": "/personal/languages", "value": ["English", "French"]},
+        ])
+
+        self.assertEqual(conditions["resume_details.skills"], {"$eq": "Python", "$not": {"$type": "array"}})
+        self.assertEqual(conditions["$expr"], {"$and": [
+            {"$eq": ["$resume_details.personal.languages", {"$literal": ["English", "French"]}]},
+        ]})
+        for operations in (
+            [{"op": "test", "path": "/experience/0/tasks", "value": ["Built APIs"]}],
+            [{"op": "add", "path": "/skills/-", "value": "Go"}, {"op": "test", "path": "/skills", "value": ["Go"]}],
+        ):
+            with self.assertRaises(PatchError) as raised:
+                patch_to_update(operations)
+            self.assertEqual(raised.exception.status, 422)
+
+    def test_rejected_patches(self):
+        from .patch import PatchError, patch_to_update
+        for operations, status_code in (
+            ([], 400),
+            ([{"op": "move", "from": "/a", "path": "/b"}], 422),
+            ([{"op": "remove", "path": "/skills/2"}], 422),
+            ([{"op": "replace", "path": "/personal", "value": {}},
+              {"op": "replace", "path": "/personal/name", "value": "Ada"}], 422),
+            ([{"op": "add", "path": "/$where", "value": 1}], 422),
+            ([{"op": "replace", "path": "personal", "value": 1}], 400),
+        ):
+            with self.assertRaises(PatchError) as raised:
+                patch_to_update(operations)
+            self.assertEqual(raised.exception.status, status_code, operations)
+
+    def test_patch_applies_atomically_with_version(self):
+        self.collection.find_one_and_update.return_value = {"_id": "r1", "version": 4, "resume_details": {"skills": ["Go"]}}
+
+        response = self.send([{"op": "add", "path": "/skills/-", "value": "Go"}], HTTP_IF_MATCH='"3"')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["version"], 4)
+        query, update = self.collection.find_one_and_update.call_args[0]
+        self.assertEqual(query, {"_id": "r1", "version": 3})
+        self.assertEqual(update["$push"], {"resume_details.skills": {"$each": ["Go"]}})
+        self.assertEqual(update["$inc"], {"version": 1})
+        self.collection.find_one.assert_not_called()
+
+    def test_patch_conflicts(self):
+        self.collection.find_one_and_update.return_value = None
+        self.collection.find_one.return_value = {"_id": "r1", "version": 5}
+
+        response = self.send([{"op": "replace", "path": "/title", "value": "x"}], HTTP_IF_MATCH='"3"')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["version"], 5)
+
+        response = self.send([{"op": "test", "path": "/title", "value": "y"}])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        self.collection.find_one.return_value = None
+        response = self.send([{"op": "replace", "path": "/title", "value": "x"}])
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.send([{"op": "remove", "path": "/skills/0"}])
+        self.assertEqual(response.status_code, 422)
+
+    def test_unchanged_put_keeps_version(self):
+        """Test resubmitting a resume saved before signatures existed backfills them without a new version"""
+        self.collection.find_one.return_value = {"_id": "r1", "title": "Old", "resume_details": {"a": "b"}, "version": 2}
+        self.collection.update_one.return_value = MagicMock(modified_count=1)
+
+        response = APIClient().put(self.url, {"title": "Old", "resumeData": '{"a": "b"}'}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "No changes made")
+        update = self.collection.update_one.call_args[0][1]
+        self.assertNotIn("$inc", update)
+        self.assertNotIn("updated_at", update["$set"])
+        self.assertIn("lsh_bands", update["$set"])
+
+    def test_put_checks_if_match(self):
+        self.collection.find_one.return_value = {"_id": "r1", "title": "Old", "version": 2}
+
+        response = APIClient().put(self.url, {"title": "New"}, format='multipart', HTTP_IF_MATCH='"1"')
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.collection.update_one.assert_not_called()
+
+    def test_put_losing_race_after_if_match_conflicts(self):
+        """Test a write overtaken between the If-Match check and the update is a conflict"""
+        self.collection.find_one.side_effect = [
+            {"_id": "r1", "title": "Old", "version": 1},
+            {"_id": "r1", "version": 2},
+        ]
+        self.collection.update_one.return_value = MagicMock(matched_count=0, modified_count=0)
+
+        response = APIClient().put(self.url, {"title": "New"}, format='multipart', HTTP_IF_MATCH='"1"')
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["version"], 2)
+        self.assertEqual(self.collection.update_one.call_args[0][0], {"_id": "r1", "version": 1})
+
+
+class ConditionalGetTests(TestCase):
+    @patch('resume.views.resume_collection.find_one')
+    def test_resume_carries_validators(self, mock_find_one):
+        mock_find_one.return_value = {"_id": "r1", "version": 3, "updated_at": datetime(2024, 5, 1, 12, 0), "resume_details": {}}
+
+        response = APIClient().get('/resume/retrieve/', {"id": "r1"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["ETag"], '"3"')
+        self.assertEqual(response["Last-Modified"], "Wed, 01 May 2024 12:00:00 GMT")
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+    @patch('resume.views.resume_collection.find_one')
+    def test_matching_etag_answers_304_from_a_projection(self, mock_find_one):
+        """Test a revalidation reads only the version and timestamps, never resume_details"""
+        mock_find_one.return_value = {"_id": "r1", "version": 3, "updated_at": datetime(2024, 5, 1, 12, 0)}
+
+        response = APIClient().get('/resume/retrieve/', {"id": "r1"}, HTTP_IF_NONE_MATCH='"3"')
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], '"3"')
+        mock_find_one.assert_called_once_with({"_id": "r1"}, {"version": 1, "updated_at": 1, "created_at": 1})
+
+    @patch('resume.views.resume_collection.find_one')
+    def test_changed_resume_is_sent_again(self, mock_find_one):
+        mock_find_one.side_effect = [
+            {"_id": "r1", "version": 4, "updated_at": datetime(2024, 5, 2)},
+            {"_id": "r1", "version": 4, "updated_at": datetime(2024, 5, 2), "resume_details": {"a": 1}},
+        ]
+
+        response = APIClient().get('/resume/retrieve/', {"id": "r1"}, HTTP_IF_NONE_MATCH='"3"',
+                                   HTTP_IF_MODIFIED_SINCE="Wed, 01 May 2024 12:00:00 GMT")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["resume_details"], {"a": 1})
+        self.assertEqual(response["ETag"], '"4"')
+
+    @patch('resume.views.resume_collection.find_one')
+    def test_if_modified_since_alone(self, mock_find_one):
+        mock_find_one.return_value = {"_id": "r1", "version": 3, "updated_at": datetime(2024, 5, 1, 12, 0)}
+
+        response = APIClient().get('/resume/retrieve/', {"id": "r1"}, HTTP_IF_MODIFIED_SINCE="Thu, 02 May 2024 00:00:00 GMT")
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @patch('resume.views.fs.get')
+    @patch('resume.views.resume_collection.find_one')
+    def test_if_modified_since_with_stored_milliseconds(self, mock_find_one, mock_fs_get):
+        """Test the header, which has whole seconds, matches timestamps stored with milliseconds"""
+        mock_find_one.return_value = {"_id": "r1", "version": 3, "updated_at": datetime(2024, 5, 1, 12, 0, 0, 123000)}
+        mock_fs_get.return_value = MagicMock(upload_date=datetime(2024, 5, 1, 12, 0, 0, 123000))
+        header = "Wed, 01 May 2024 12:00:00 GMT"
+
+        response = APIClient().get('/resume/retrieve/', {"id": "r1"}, HTTP_IF_MODIFIED_SINCE=header)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["Last-Modified"], header)
+
+        response = APIClient().get(f'/resume/image/{ObjectId()}/', HTTP_IF_MODIFIED_SINCE=header)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @patch('resume.views.fs.get')
+    def test_image_revalidation_skips_the_chunks(self, mock_fs_get):
+        image_id = ObjectId()
+        mock_fs_get.return_value = MagicMock(upload_date=datetime(2024, 5, 1), filename="a.png")
+
+        response = APIClient().get(f'/resume/image/{image_id}/', HTTP_IF_NONE_MATCH=f'"{image_id}"')
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], f'"{image_id}"')
+        mock_fs_get.return_value.read.assert_not_called()
+        mock_fs_get.return_value.__iter__.assert_not_called()
+
+
+class ImageStreamingTests(TestCase):
+    def setUp(self):
+        self.image_id = ObjectId()
+        self.url = f'/resume/image/{self.image_id}/'
+        self.data = bytes(range(256)) * 40  # 10 KiB
+
+    def stored(self, content_type="image/jpeg"):
+        stream = BytesIO(self.data)
+        reads = []
+
+        def read(size=-1):
+            reads.append(size)
+            return stream.read(size)
+
+        return MagicMock(
+            upload_date=datetime(2024, 5, 1), filename="photo.jpg", content_type=content_type,
+            length=len(self.data), chunk_size=1024, seek=stream.seek, read=read, reads=reads,
+        )
+
+    @patch('resume.views.fs.get')
+    def test_streams_chunk_by_chunk_with_length_and_type(self, mock_fs_get):
+        mock_fs_get.return_value = stored = self.stored()
+
+        response = APIClient().get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b"".join(response.streaming_content), self.data)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(response["Content-Length"], str(len(self.data)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Cache-Control"], "private, max-age=31536000, immutable")
+        self.assertEqual(max(stored.reads), 1024)
+
+    @patch('resume.views.fs.get')
+    def test_range_requests(self, mock_fs_get):
+        for header, expected in (("bytes=100-199", (100, 199)), ("bytes=10000-", (10000, 10239)),
+                                 ("bytes=-40", (10200, 10239)), ("bytes=10200-99999", (10200, 10239))):
+            mock_fs_get.return_value = self.stored()
+            response = APIClient().get(self.url, HTTP_RANGE=header)
+
+            start, end = expected
+            self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT, header)
+            self.assertEqual(b"".join(response.streaming_content), self.data[start:end + 1])
+            self.assertEqual(response["Content-Range"], f"bytes {start}-{end}/{len(self.data)}")
+            self.assertEqual(response["Content-Length"], str(end - start + 1))
+
+        mock_fs_get.return_value = self.stored()
+        response = APIClient().get(self.url, HTTP_RANGE="bytes=20000-")
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.data)}")
+
+    @patch('resume.views.fs.get')
+    def test_stale_if_range_and_multiple_ranges_send_everything(self, mock_fs_get):
+        for headers in ({"HTTP_RANGE": "bytes=0-9", "HTTP_IF_RANGE": '"other"'},
+                        {"HTTP_RANGE": "bytes=0-9,20-29"}):
+            mock_fs_get.return_value = self.stored(content_type=None)
+            response = APIClient().get(self.url, **headers)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response["Content-Type"], "image/jpeg")
+            self.assertEqual(len(b"".join(response.streaming_content)), len(self.data))
+
+        for if_range in (f'"{self.image_id}"', "Wed, 01 May 2024 00:00:00 GMT"):
+            mock_fs_get.return_value = self.stored()
+            mock_fs_get.return_value.upload_date = datetime(2024, 5, 1, 0, 0, 0, 456000)
+            response = APIClient().get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=if_range)
+            self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT, if_range)
+
+    @patch('resume.views.resume_collection.insert_one')
+    @patch('resume.views.index_resume_safely')
+    @patch('resume.views.upsert_similar_safely')
+    @patch('resume.views.fs.put', return_value=ObjectId())
+    def test_uploads_record_content_type(self, mock_put, *mocks):
+        image = SimpleUploadedFile("photo.jpg", b"\xff\xd8\xff", content_type="image/jpeg")
+
+        APIClient().post('/resume/create/', {"user_id": "u1", "resumeData": "{}", "image": image}, format='multipart')
+
+        self.assertEqual(mock_put.call_args[1]["contentType"], "image/jpeg")
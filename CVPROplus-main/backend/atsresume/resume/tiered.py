@@ -0,0 +1,293 @@
+"""
+Tiered resume parsing: a local regex/spaCy extractor first, Gemini only for
+the sections the local extractor is not confident about.
+"""
+import logging
+import re
+
+from .metrics import counters
+from .prompts import RESUME_SCHEMA, SECTION_ALIASES
+from .utils import extract_fields, extract_fields_batch
+
+logger = logging.getLogger(__name__)
+
+HEADER_TO_SECTION = {alias: section for section, aliases in SECTION_ALIASES.items() for alias in aliases}
+CONTACT_FIELDS = ("name", "email", "phone")
+
+# Minimum confidence per field before it is escalated to the LLM
+DEFAULT_THRESHOLDS = {
+    "personal.name": 0.8,
+    "personal.email": 0.8,
+    "personal.phone": 0.6,
+    "personal.address": 0.0,
+    "personal.summary": 0.5,
+    "skills": 0.7,
+    "experience": 0.7,
+    "projects": 0.6,
+    "education": 0.7,
+}
+
+MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+_DATE = r"(?:(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{4}|\d{1,2}/\d{4}|\d{4})"
+DATE_RE = re.compile(_DATE, re.IGNORECASE)
+DATE_RANGE_RE = re.compile(
+    rf"\(?\s*({_DATE})\s*(?:-|–|—|to)\s*({_DATE}|present|current|now)\s*\)?", re.IGNORECASE
+)
+BULLET_RE = re.compile(r"^\s*(?:[-•*▪●◦–]|\d+[.)])\s+")
+SPLIT_TITLE_RE = re.compile(r"\s+(?:at|@)\s+|\s+[-–|]\s+|,\s+")
+INSTITUTION_RE = re.compile(r"\b(university|college|institute|school|academy|polytechnic)\b", re.IGNORECASE)
+DEGREE_RE = re.compile(
+    r"\b(bachelor|master|b\.?sc|m\.?sc|b\.?tech|m\.?tech|b\.?e|phd|ph\.d|mba|diploma|associate|certificate)\b",
+    re.IGNORECASE,
+)
+NAME_LINE_RE = re.compile(r"^[A-Z][a-zA-Z'.-]+(?:\s+[A-Z][a-zA-Z'.-]+){1,3}$")
+TECH_LINE_RE = re.compile(r"^\s*(?:technologies|tech stack|tools|built with)\s*(?:used)?\s*:\s*(.+)$", re.IGNORECASE)
+
+
+class TieredResult:
+    """Structured resume data plus which tier produced it."""
+
+    def __init__(self, data, tier, escalated=()):
+        self.data = data
+        self.tier = tier
+        self.escalated = list(escalated)
+
+
+def _normalize_date(value):
+    """Convert a matched date to MM/YYYY where possible; None for present/current."""
+    if not value or value.lower() in ("present", "current", "now"):
+        return None
+    value = value.strip()
+    if "/" in value:
+        month, year = value.split("/")
+        return f"{int(month):02d}/{year}"
+    parts = value.replace(".", "").split()
+    if len(parts) == 2 and parts[0][:3].lower() in MONTHS:
+        return f"{MONTHS[parts[0][:3].lower()]:02d}/{parts[1]}"
+    return value
+
+
+def _header_section(line):
+    key = re.sub(r"[^a-z ]", "", line.lower()).strip()
+    if len(key.split()) > 4:
+        return None
+    return HEADER_TO_SECTION.get(key)
+
+
+def split_fields(text):
+    """
+    The contact fields and sections of resume text in one scan, sections
+    split on known header lines, with NER on the header block only.
+    """
+    return extract_fields(text, split=_header_section)
+
+
+def _strip_bullet(line):
+    return BULLET_RE.sub("", line).strip()
+
+
+def _parse_experience(lines):
+    entries = []
+    for line in lines:
+        date_range = DATE_RANGE_RE.search(line)
+        if date_range and not BULLET_RE.match(line):
+            heading = (line[:date_range.start()] + line[date_range.end():]).strip(" -–|,")
+            parts = [part.strip() for part in SPLIT_TITLE_RE.split(heading) if part.strip()]
+            entries.append({
+                "jobTitle": parts[0] if parts else "",
+                "company": parts[1] if len(parts) > 1 else "",
+                "startDate": _normalize_date(date_range.group(1)),
+                "endDate": _normalize_date(date_range.group(2)),
+                "location": parts[2] if len(parts) > 2 else "",
+                "tasks": [],
+            })
+        elif entries:
+            entries[-1]["tasks"].append(_strip_bullet(line))
+    complete = sum(1 for e in entries if e["jobTitle"] and e["company"] and e["startDate"])
+    return entries, (complete / len(entries) if entries else 0.0)
+
+
+def _parse_projects(lines):
+    entries = []
+    for line in lines:
+        tech = TECH_LINE_RE.match(line)
+        if tech and entries:
+            entries[-1]["technologies"] = [t.strip() for t in re.split(r"[,|;]", tech.group(1)) if t.strip()]
+        elif BULLET_RE.match(line) and entries:
+            entries[-1]["tasks"].append(_strip_bullet(line))
+        else:
+            name, _, technologies = line.partition(" - ")
+            entries.append({
+                "name": name.strip(),
+                "tasks": [],
+                "technologies": [t.strip() for t in technologies.split(",") if t.strip()],
+            })
+    complete = sum(1 for e in entries if e["name"] and (e["tasks"] or e["technologies"]))
+    return entries, (0.9 * complete / len(entries) if entries else 0.0)
+
+
+def _parse_education(lines):
+    entries = []
+    for line in lines:
+        is_institution = bool(INSTITUTION_RE.search(line))
+        is_degree = bool(DEGREE_RE.search(line))
+        dates = DATE_RE.findall(line)
+        text = DATE_RANGE_RE.sub("", line)
+        text = DATE_RE.sub("", text).strip(" -–|,()")
+
+        starts_entry = not entries or (is_institution and entries[-1]["institution"]) or (
+            is_degree and entries[-1]["course"])
+        if starts_entry and (is_institution or is_degree):
+            entries.append({"institution": "", "graduation_date": "", "course": "", "location": ""})
+        if not entries:
+            continue
+
+        entry = entries[-1]
+        if is_institution and not entry["institution"]:
+            institution, _, location = text.partition(",")
+            entry["institution"] = institution.strip()
+            entry["location"] = entry["location"] or location.strip()
+        elif is_degree and not entry["course"]:
+            entry["course"] = text
+        if dates:
+            entry["graduation_date"] = _normalize_date(dates[-1])
+    complete = sum(1 for e in entries if e["institution"] and e["course"])
+    return entries, (complete / len(entries) if entries else 0.0)
+
+
+def _parse_skills(lines):
+    skills = []
+    for line in lines:
+        line = _strip_bullet(line)
+        if ":" in line:
+            line = line.split(":", 1)[1]
+        skills.extend(item.strip() for item in re.split(r"[,|;•·]", line) if item.strip())
+    skills = list(dict.fromkeys(skills))
+    if len(skills) >= 3:
+        return skills, 0.9
+    return skills, (0.5 if skills else 0.0)
+
+
+def parse_locally(text, fields=None):
+    """
+    Parse resume text without an LLM.
+
+    Returns `(data, confidence)`: `data` follows RESUME_SCHEMA and
+    `confidence` maps "personal.<field>" and each top-level section to a
+    score between 0 and 1. `fields` is the text's split_fields result when
+    parse_locally_batch already extracted it.
+    """
+    fields = fields or split_fields(text)
+    sections = {key: value for key, value in fields.items() if key not in CONTACT_FIELDS}
+    # When several known headers were found, a missing section is most
+    # likely absent from the resume rather than missed by the splitter.
+    absent_confidence = 0.8 if len(sections) >= 3 else 0.3
+
+    name = fields["name"]
+    name_confidence = 0.9 if name else 0.0
+    if not name and sections["header"] and NAME_LINE_RE.match(sections["header"][0]):
+        name, name_confidence = sections["header"][0], 0.6
+    email, phone = fields["email"], fields["phone"]
+    if phone:
+        # Same contract as the Gemini prompt: the phone number in 10 digits
+        phone = re.sub(r"\D", "", phone)[-10:]
+    summary_lines = sections.get("summary", [])
+
+    data = {
+        "personal": {
+            "name": name or "",
+            "email": email or "",
+            "phone": phone or "",
+            "address": "",
+            "summary": " ".join(summary_lines) or None,
+        },
+    }
+    confidence = {
+        "personal.name": name_confidence,
+        "personal.email": 0.99 if email else 0.3,
+        "personal.phone": 0.95 if phone else 0.3,
+        "personal.address": 0.0,
+        "personal.summary": 0.85 if summary_lines else absent_confidence,
+    }
+
+    for section, parser in (
+        ("skills", _parse_skills),
+        ("experience", _parse_experience),
+        ("projects", _parse_projects),
+        ("education", _parse_education),
+    ):
+        if section in sections:
+            data[section], confidence[section] = parser(sections[section])
+        else:
+            data[section], confidence[section] = [], absent_confidence
+
+    return data, confidence
+
+
+def parse_locally_batch(texts, batch_size=32, n_process=1):
+    """parse_locally over many texts, running NER once per batch through nlp.pipe."""
+    all_fields = extract_fields_batch(texts, split=_header_section, batch_size=batch_size, n_process=n_process)
+    return [parse_locally(text, fields) for text, fields in zip(texts, all_fields)]
+
+
+def low_confidence_sections(confidence, thresholds=None):
+    """Top-level schema sections holding at least one field under its threshold."""
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    sections = []
+    for field, score in confidence.items():
+        section = field.split(".", 1)[0]
+        if score < thresholds.get(field, 0.0) and section not in sections:
+            sections.append(section)
+    return [section for section in RESUME_SCHEMA if section in sections]
+
+
+def parse_tiered(text, llm_parse, thresholds=None, local=None):
+    """
+    Parse locally and call `llm_parse(text, sections)` only for the sections
+    that fall below their confidence thresholds. Local fields that passed
+    their threshold are kept even inside an escalated section. `local` is
+    the text's `(data, confidence)` when parse_locally_batch already ran.
+    """
+    data, confidence = local or parse_locally(text)
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    escalate = low_confidence_sections(confidence, thresholds)
+
+    if not escalate:
+        counters.incr("parse_tier.local")
+        return TieredResult(data, "local")
+
+    llm_data = llm_parse(text, escalate)
+    if not isinstance(llm_data, dict):
+        logger.warning("LLM escalation failed; returning the local parse")
+        counters.incr("parse_tier.local_fallback")
+        return TieredResult(data, "local")
+
+    merge_escalated(data, confidence, llm_data, escalate, thresholds)
+    tier = escalated_tier(escalate)
+    counters.incr(f"parse_tier.{tier}")
+    return TieredResult(data, tier, escalate)
+
+
+def merge_escalated(data, confidence, llm_data, sections, thresholds=None):
+    """
+    Merge the LLM's `llm_data` for the escalated `sections` into the local
+    `data`, in place. Local personal fields that passed their threshold are
+    kept; any other escalated section is replaced.
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    for section in sections:
+        if section not in llm_data:
+            continue
+        if section == "personal" and isinstance(llm_data["personal"], dict):
+            for field, value in llm_data["personal"].items():
+                if confidence.get(f"personal.{field}", 0.0) < thresholds.get(f"personal.{field}", 0.0):
+                    data["personal"][field] = value
+        else:
+            data[section] = llm_data[section]
+    return data
+
+
+def escalated_tier(sections):
+    """The tier of a parse that escalated `sections` to the LLM."""
+    return "llm" if len(sections) == len(RESUME_SCHEMA) else "hybrid"
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import  ResumeCreateView, ResumeRetrieveView, ResumeUpdateView, ResumeDeleteView, ResumeUploadView,ResumeImageView
+from .views import  ResumeCreateView, ResumeRetrieveView, ResumeUpdateView, ResumeDeleteView, ResumeUploadView,ResumeImageView,ResumeMetricsView,ExtractionJobStatusView,ResumeBulkImportView,ResumeExtractStreamView,ResumeScoreView,ResumeSimilarView
 
 urlpatterns = [
     path("create/", ResumeCreateView.as_view(), name="resume-create"),
@@ -7,5 +7,11 @@ urlpatterns = [
     path("update/<str:id>/", ResumeUpdateView.as_view(), name="resume-update"),
     path("delete/<str:id>/", ResumeDeleteView.as_view(), name="resume-delete"),
     path('extract/', ResumeUploadView.as_view(), name='resume-data-extract'),
+    path('extract/stream/', ResumeExtractStreamView.as_view(), name='resume-extract-stream'),
+    path('extract/<str:job_id>/', ExtractionJobStatusView.as_view(), name='resume-extract-job'),
     path('image/<str:image_id>/', ResumeImageView.as_view(), name='resume-data-upload'),   
+    path('bulk-import/', ResumeBulkImportView.as_view(), name='resume-bulk-import'),
+    path('score/', ResumeScoreView.as_view(), name='resume-score'),
+    path('similar/<str:id>/', ResumeSimilarView.as_view(), name='resume-similar'),
+    path('metrics/', ResumeMetricsView.as_view(), name='resume-metrics'),
 ]
\ No newline at end of file
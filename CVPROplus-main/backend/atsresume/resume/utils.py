@@ -1,48 +1,182 @@
+import atexit
 import pdfplumber
-import docx
 import re
 import spacy
-import google.generativeai as genai
 import phonenumbers
 import json
+import logging
 import os
+import io
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
 from dotenv import load_dotenv
+from .docx_text import extract_docx_text
+from .llm import get_llm_client
+from .metrics import counters
+from .pdf_engines import ENGINES as PDF_ENGINES, fast_pages, plumber_page_text
+from .prompts import build_prompt
+from .streaming import SectionScanner
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
-gemini_api_key = os.getenv("REACT_APP_GEMINI_API_KEY")
+# Bump whenever the Gemini prompt or output schema changes so cached parses
+# produced by an older prompt are not served.
+PROMPT_VERSION = "2"
+
+def _open_pdf_source(source):
+    """pdfplumber accepts paths and file objects; raw bytes come from worker processes."""
+    return pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+def _extract_page_list(source, pages):
+    """
+    Extract `pages`, a list of (page index, column starts), with pdfplumber.
+    Runs inside a worker process.
+    """
+    with _open_pdf_source(source) as pdf:
+        return [plumber_page_text(pdf.pages[index], columns) for index, columns in pages]
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+def _get_pdf_pool():
+    """
+    Process pool shared by every parallel extraction in this process, shut
+    down when the process exits. Each web worker process has its own pool,
+    so RESUME_PDF_WORKERS is sized per web worker (see settings).
+    """
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=_pdf_workers())
+            atexit.register(_pdf_pool.shutdown, wait=False, cancel_futures=True)
+        return _pdf_pool
+
+def _pdf_workers():
+    return getattr(settings, "RESUME_PDF_WORKERS", None) or 1
+
+def _page_ranges(page_count, parts):
+    """Split [0, page_count) into at most `parts` contiguous, ordered ranges."""
+    size = -(-page_count // parts)
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+def _rewind(pdf_file):
+    if hasattr(pdf_file, "seek"):
+        pdf_file.seek(0)
+    return pdf_file
+
+def _plumber_pages(pdf_file, pages, parallel_min_pages):
+    """
+    Extract `pages` (a list of (page index, column starts), or None for all
+    pages) with pdfplumber. At least `parallel_min_pages` pages are split
+    into chunks that are extracted in a process pool, so short resumes
+    never pay the pool overhead.
+    """
+    with _open_pdf_source(_rewind(pdf_file)) as pdf:
+        if pages is None:
+            pages = [(index, []) for index in range(len(pdf.pages))]
+        workers = _pdf_workers()
+        if not parallel_min_pages or len(pages) < parallel_min_pages or workers < 2:
+            return [plumber_page_text(pdf.pages[index], columns) for index, columns in pages]
+
+    # Worker processes cannot share an open file object, so hand them bytes
+    source = pdf_file
+    if hasattr(pdf_file, "read"):
+        source = _rewind(pdf_file).read()
+
+    pool = _get_pdf_pool()
+    futures = [
+        pool.submit(_extract_page_list, source, pages[start:end])
+        for start, end in _page_ranges(len(pages), workers)
+    ]
+    texts = []
+    for future in futures:
+        texts.extend(future.result())
+    return texts
 
-# Configure Gemini API with hardcoded key
-genai.configure(api_key=gemini_api_key)
+def extract_pdf_pages(pdf_file, parallel_min_pages=None, engine=None):
+    """
+    Extract the text of every page of a PDF, in page order.
+
+    `engine` (RESUME_PDF_ENGINE by default) is "pdfplumber", "pypdf" or
+    "auto". "auto" reads every page with the fast PyPDF2 engine and
+    re-extracts with pdfplumber only the pages whose fast output is empty,
+    garbled, out of order or multi-column; multi-column pages are read one
+    column at a time. pdfplumber work on at least `parallel_min_pages` pages
+    (RESUME_PDF_PARALLEL_MIN_PAGES by default) runs in a process pool.
+    """
+    if parallel_min_pages is None:
+        parallel_min_pages = getattr(settings, "RESUME_PDF_PARALLEL_MIN_PAGES", 8)
+    engine = engine or getattr(settings, "RESUME_PDF_ENGINE", "auto")
+    if engine not in PDF_ENGINES:
+        raise ValueError(f"Unknown PDF engine: {engine}")
+
+    if engine == "pdfplumber":
+        texts = _plumber_pages(pdf_file, None, parallel_min_pages)
+        counters.incr("pdf.pdfplumber_pages", len(texts))
+        return texts
+
+    try:
+        fast = fast_pages(_rewind(pdf_file))
+    except Exception as e:
+        if engine == "pypdf":
+            raise
+        # PyPDF2 is stricter about malformed files than pdfminer
+        logger.warning(f"Fast PDF engine failed, using pdfplumber: {str(e)}")
+        counters.incr("pdf.fast_engine_errors")
+        texts = _plumber_pages(pdf_file, None, parallel_min_pages)
+        counters.incr("pdf.pdfplumber_pages", len(texts))
+        return texts
+
+    texts = [page.text for page in fast]
+    counters.incr("pdf.pypdf_pages", len(texts))
+    if engine == "pypdf":
+        return texts
+
+    poor = [(index, page) for index, page in enumerate(fast) if page.problem]
+    if poor:
+        for _, page in poor:
+            counters.incr(f"pdf.fallback.{page.problem}")
+        counters.incr("pdf.pdfplumber_pages", len(poor))
+        redone = _plumber_pages(pdf_file, [(index, page.columns) for index, page in poor], parallel_min_pages)
+        for (index, _), text in zip(poor, redone):
+            texts[index] = text
+    logger.info(
+        f"PDF extraction: {len(texts)} pages, {len(poor)} re-extracted with pdfplumber"
+        + (f" ({', '.join(sorted({page.problem for _, page in poor}))})" if poor else "")
+    )
+    return texts
 
 def extract_text_from_pdf(pdf_file):
     """
-    Extract text from a PDF file using pdfplumber
+    Extract the text of a PDF file with extract_pdf_pages, using the engine
+    chosen by RESUME_PDF_ENGINE, and join its non-empty pages
     """
     try:
-        text = ""
-        with pdfplumber.open(pdf_file) as pdf:
-            for i, page in enumerate(pdf.pages):
-                print(f"Processing page {i+1} of {len(pdf.pages)}")
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-                else:
-                    print(f"Warning: No text extracted from page {i+1}")
-        
+        pages = extract_pdf_pages(pdf_file)
+        for i, page_text in enumerate(pages):
+            if not page_text:
+                print(f"Warning: No text extracted from page {i+1}")
+
+        text = "\n".join(page_text for page_text in pages if page_text)
         if not text.strip():
             print("Warning: No text extracted from the entire PDF")
-            
+
         return text.strip()
     except Exception as e:
         print(f"Error extracting text from PDF: {str(e)}")
         raise Exception(f"Failed to extract text from PDF: {str(e)}")
 
 def extract_text_from_docx(docx_file):
-    doc = docx.Document(docx_file)
-    text = "\n".join([para.text for para in doc.paragraphs])
-    return text.strip()
+    """
+    Extract text from a DOCX file, including tables, text boxes and page
+    headers/footers, by streaming its XML parts.
+    """
+    return extract_docx_text(docx_file)
 
 def parse_resume_text(text):
     """Basic parsing to extract resume fields (can be improved with NLP)"""
@@ -73,20 +207,22 @@ def parse_resume_text(text):
     
     return resume_data
 
-nlp = spacy.load("en_core_web_sm")  # Load NLP model for text processing
+NLP_MODEL_NAME = "en_core_web_sm"
+# extract_name only reads entities, and the small English pipeline's NER has
+# its own tok2vec layer, so every other component is left out.
+NLP_EXCLUDE = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "senter"]
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from a PDF file"""
-    text = ""
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() + "\n"
-    return text
+_nlp = None
+_nlp_lock = threading.Lock()
 
-def extract_text_from_docx(docx_path):
-    """Extract text from a DOCX file"""
-    doc = docx.Document(docx_path)
-    return "\n".join([para.text for para in doc.paragraphs])
+def get_nlp():
+    """Load the spaCy model on first use and share it across threads."""
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                _nlp = spacy.load(NLP_MODEL_NAME, exclude=NLP_EXCLUDE)
+    return _nlp
 
 def extract_email(text):
     """Extract email from text using regex"""
@@ -105,14 +241,24 @@ def extract_phone(text):
             continue
     return None
 
-def extract_name(text):
-    """Extract the most probable name using NLP"""
-    doc = nlp(text)
+def _first_person(doc):
     for ent in doc.ents:
         if ent.label_ == "PERSON":
             return ent.text
     return None
 
+def extract_name(text):
+    """Extract the most probable name using NLP"""
+    return _first_person(get_nlp()(text))
+
+def extract_names(texts, batch_size=32, n_process=1):
+    """
+    Batch version of extract_name over nlp.pipe. Returns one name (or None)
+    per text, in order. `n_process` > 1 runs NER in worker processes.
+    """
+    docs = get_nlp().pipe(texts, batch_size=batch_size, n_process=n_process)
+    return [_first_person(doc) for doc in docs]
+
 def extract_sections(text):
     """Extract structured sections from resume"""
     sections = {
@@ -138,81 +284,118 @@ def extract_sections(text):
 
     return sections
 
+EMAIL_RE = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+# Seven or more digits joined by phone punctuation: worth asking phonenumbers about
+PHONE_HINT_RE = re.compile(r"\d(?:[\s().+-]*\d){6}")
+SECTION_KEYWORDS = ("experience", "skills", "projects")
+# Names sit in the first lines of a resume; NER never needs to see more
+NAME_SCAN_LINES = 8
+
+def _phone_region(region):
+    return region or getattr(settings, "RESUME_PHONE_REGION", "US")
+
+def scan_fields(text, region=None, split=None):
+    """
+    Find the email, phone number, sections and header lines of a resume in
+    a single pass over its lines. Same results as extract_email and
+    extract_sections; phone numbers are found with PhoneNumberMatcher,
+    numbers without a country code being read in `region`
+    (RESUME_PHONE_REGION by default), and only on lines that hold enough
+    digits to be one.
+
+    `split`, a function from a stripped line to a section name or None,
+    splits sections on header lines instead of keywords: blank lines are
+    skipped, lines before the first header go to the "header" section and
+    only those are kept as the header lines.
+    """
+    email = None
+    phone_lines = []
+    header = []
+    if split:
+        sections = {"header": []}
+        current_section = "header"
+    else:
+        sections = {keyword: [] for keyword in SECTION_KEYWORDS}
+        current_section = None
+
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if stripped and len(header) < NAME_SCAN_LINES and not split:
+            header.append(stripped)
+        if email is None:
+            match = EMAIL_RE.search(line)
+            if match:
+                email = match.group(0)
+        if PHONE_HINT_RE.search(line):
+            phone_lines.append(line)
+
+        if split:
+            section = split(stripped) if stripped else None
+            if section:
+                current_section = section
+                sections.setdefault(section, [])
+            elif stripped:
+                sections.setdefault(current_section, []).append(stripped)
+            continue
+        line_lower = stripped.lower()
+        keyword = next((keyword for keyword in SECTION_KEYWORDS if keyword in line_lower), None)
+        if keyword:
+            current_section = keyword
+        elif current_section:
+            sections[current_section].append(stripped)
+    if split:
+        header = sections["header"][:NAME_SCAN_LINES]
+
+    phone = None
+    # Strict grouping keeps date ranges such as "03/2015 - 02/2024" from
+    # being read as phone numbers
+    matcher = phonenumbers.PhoneNumberMatcher(
+        "\n".join(phone_lines), _phone_region(region), leniency=phonenumbers.Leniency.STRICT_GROUPING
+    )
+    for match in matcher:
+        phone = phonenumbers.format_number(match.number, phonenumbers.PhoneNumberFormat.INTERNATIONAL)
+        break
+
+    return {"email": email, "phone": phone, "header": "\n".join(header), "sections": sections}
+
+def _fields(scan, name):
+    return {"name": name, "email": scan["email"], "phone": scan["phone"], **scan["sections"]}
+
+def extract_fields(text, region=None, split=None):
+    """parse_resume in one scan, with NER limited to the first lines."""
+    scan = scan_fields(text, region, split)
+    return _fields(scan, extract_name(scan["header"]) if scan["header"] else None)
+
+def extract_fields_batch(texts, region=None, split=None, batch_size=32, n_process=1):
+    """extract_fields over many texts, running NER once per batch through nlp.pipe."""
+    scans = [scan_fields(text, region, split) for text in texts]
+    names = extract_names([scan["header"] for scan in scans], batch_size=batch_size, n_process=n_process)
+    return [_fields(scan, name if scan["header"] else None) for scan, name in zip(scans, names)]
+
 def parse_resume(text):
-    return {
-        "name": extract_name(text),
-        "email": extract_email(text),
-        "phone": extract_phone(text),
-        **extract_sections(text),
-    }
+    return extract_fields(text)
 
 def normalize_spaces(text):
     """Normalize spaces in the text to ensure proper formatting."""
     return " ".join(text.split())
 
-def parse_resume_with_gemini(text):
-    """Uses Gemini AI to extract structured data from the resume."""
-    model = genai.GenerativeModel("gemini-2.0-flash")  # Ensure correct model usage
-    chat = model.start_chat()  # Start a conversation
-
-    normalized_text = normalize_spaces(text)
-
-    prompt = f"""
-    Extract the following details from this resume:
-    - Name
-    - Email
-    - Phone Number only in 10 digits
-    - Address
-    - Summary (Ensure it's extracted properly. If missing, return null.)
-    - Skills (as a list)
-    - Experience (Job Title, Company, Start Date, End Date, Location, Description as separate tasks)
-    - Projects (Title, Description as separate tasks, Technologies used)
-    - Education (Institution, Graduation Date, Course, Location)
-
-    Structure it in **valid JSON** format:
-    {json.dumps({
-        "personal":{
-                    "name": "string",
-                    "email": "string",
-                    "phone": "string",
-                    "address": "string",
-                    "summary": "string or null",
-                    },
-        "skills": ["string"],
-        "experience": [
-            {
-                "jobTitle": "string",
-                "company": "string",
-                "startDate": "MM/YYYY",
-                "endDate": "MM/YYYY or null (if current)",
-                "location": "string",
-                "tasks": ["string"]  
-            }
-        ],
-        "projects": [
-            {
-                "name": "string",
-                "tasks": ["string"],  
-                "technologies": ["string"]
-            }
-        ],
-        "education": [
-            {
-                "institution": "string",
-                "graduation_date": "MM/YYYY",
-                "course": "string",
-                "location": "string"
-            }
-        ]
-    }, indent=5)}
-
-    Resume Text:
-    {normalized_text}
-    """
-
-    response = chat.send_message(prompt)
-    response_text = response.text.strip()
+def _build_gemini_prompt(text, sections):
+    prompt = build_prompt(text, sections, getattr(settings, "RESUME_PROMPT_TOKEN_BUDGET", None))
+    counters.incr("gemini.requests")
+    counters.incr("gemini.prompt_tokens", prompt.tokens)
+    if prompt.trimmed:
+        counters.incr("gemini.prompts_trimmed")
+    return prompt
 
+def _log_gemini_parse(prompt, elapsed, first_section=None):
+    first = f", first section after {first_section:.2f}s" if first_section is not None else ""
+    logger.info(
+        f"Gemini parse: {prompt.tokens} prompt tokens (resume {prompt.original_tokens} before compaction, "
+        f"trimmed: {', '.join(prompt.trimmed) or 'nothing'}) in {elapsed:.2f}s{first}"
+    )
+
+def _load_gemini_json(response_text):
+    response_text = response_text.strip()
     if response_text.startswith("```json") and response_text.endswith("```"):
         response_text = response_text[7:-3].strip()  
 
@@ -222,3 +405,58 @@ def parse_resume_with_gemini(text):
     except json.JSONDecodeError as e:
         print(f"Error parsing JSON response: {e}")
         return None
+
+def parse_resume_with_gemini(text, sections=None):
+    """
+    Uses Gemini AI to extract structured data from the resume.
+    `sections` limits the request to some top-level keys of RESUME_SCHEMA.
+    Raises LLMError when the backend fails or its circuit breaker is open.
+    """
+    prompt = _build_gemini_prompt(text, sections)
+
+    started = time.perf_counter()
+    response_text = get_llm_client().complete(prompt)
+    _log_gemini_parse(prompt, time.perf_counter() - started)
+
+    return _load_gemini_json(response_text)
+
+def stream_resume_with_gemini(text, sections=None):
+    """
+    Streaming variant of parse_resume_with_gemini. Yields `(section, value)`
+    for each top-level key as soon as the model has finished generating it;
+    together they make up the same dict parse_resume_with_gemini returns.
+    Raises LLMError like parse_resume_with_gemini, and ValueError when the
+    response is not valid JSON.
+    """
+    prompt = _build_gemini_prompt(text, sections)
+    scanner = SectionScanner()
+    scanning = True
+    chunks = []
+    emitted = set()
+    first_section = None
+
+    started = time.perf_counter()
+    for chunk in get_llm_client().stream(prompt):
+        chunks.append(chunk)
+        if not scanning:
+            continue
+        try:
+            members = scanner.feed(chunk)
+        except json.JSONDecodeError:
+            # Leave odd output to the whole-response parse below
+            scanning = False
+            continue
+        for section, value in members:
+            if first_section is None:
+                first_section = time.perf_counter() - started
+            emitted.add(section)
+            yield section, value
+
+    if not scanner.complete:
+        response = _load_gemini_json("".join(chunks))
+        if not isinstance(response, dict):
+            raise ValueError("Could not parse the LLM response")
+        for section, value in response.items():
+            if section not in emitted:
+                yield section, value
+    _log_gemini_parse(prompt, time.perf_counter() - started, first_section)
@@ -1,34 +1,66 @@
 import json
+import logging
+import mimetypes
+import zipfile
+from datetime import datetime, timezone
+
+import gridfs
 from bson import ObjectId
-from rest_framework.views import APIView
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views import View
+from pymongo import ReturnDocument
+from pymongo.errors import WriteError
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
-from rest_framework.parsers import FormParser,MultiPartParser
-from .utils import extract_text_from_pdf, extract_text_from_docx, parse_resume, parse_resume_with_gemini
-from bson import ObjectId
-from rest_framework.permissions import IsAuthenticated
-from django.views import View   
-from bson import ObjectId
-from django.http import HttpResponse
-from rest_framework.decorators import api_view, permission_classes
-import PyPDF2
-import io
-from datetime import datetime
+from rest_framework.views import APIView
 
 from db_connection import get_mongo_connection
-import gridfs
-# Get MongoDB collection
-
-#imports for resume upload
-import tempfile
-import os
-import pdfplumber
-import docx
-from .utils import parse_resume_with_gemini  # Import LLM function
+from pagination import InvalidPage, fetch_page, is_paged, page_params
+from .admission import UploadRejected, admit_upload, check_request_size
+from .bulk_import import BulkImporter, iter_archive_entries, iter_uploaded_files
+from .dedup import flag_duplicates, signature_fields
+from .docx_text import extract_docx_text
+from .jobs import ExtractionJobQueue
+from .llm import LLMError, get_llm_client
+from .metrics import counters
+from .parse_cache import ParseCache, make_cache_key
+from .patch import JsonPatchParser, PatchError, patch_to_update
+from .scoring import score_resumes
+from .search import get_search_index, index_resume_safely, remove_resume_safely
+from .similar import get_similarity_matrix, remove_similar_safely, upsert_similar_safely
+from .singleflight import MongoLease
+from .streaming import sse_event
+from .tiered import (
+    TieredResult, escalated_tier, low_confidence_sections, merge_escalated, parse_locally, parse_locally_batch,
+    parse_tiered,
+)
+from .utils import extract_pdf_pages, parse_resume_with_gemini, stream_resume_with_gemini
+
+logger = logging.getLogger(__name__)
 
 db = get_mongo_connection()
 fs = gridfs.GridFS(db)
 
 resume_collection = db["resumes"]  # Using "resumes" collection
+# Duplicate-detection fields are internal and left out of API responses. They change
+# without a version bump, so returning them would let a 304 serve stale values.
+HIDDEN_FIELDS = {"minhash": 0, "lsh_bands": 0, "duplicate_of": 0}
+# `?view=summary` listings: what the dashboard shows, served from the (user_id | email, updated_at) indexes
+SUMMARY_FIELDS = {"title": 1, "image_id": 1, "created_at": 1, "updated_at": 1}
+SUMMARY_SORT = [("updated_at", -1), ("_id", -1)]
+# What a conditional GET reads to answer 304 without loading resume_details
+VALIDATOR_FIELDS = {"version": 1, "updated_at": 1, "created_at": 1}
+
+parse_cache = ParseCache(
+    db["parse_cache"],
+    max_entries=getattr(settings, "RESUME_PARSE_CACHE_SIZE", 256),
+    ttl_seconds=getattr(settings, "RESUME_PARSE_CACHE_TTL", 7 * 24 * 3600),
+    leases=MongoLease(db["parse_leases"]) if getattr(settings, "RESUME_PARSE_LEASES", False) else None,
+    lease_wait=getattr(settings, "RESUME_PARSE_LEASE_WAIT", 60),
+)
 
 class ResumeCreateView(APIView):
     parser_classes = (MultiPartParser, FormParser)  # Allow file uploads
@@ -46,27 +78,61 @@ class ResumeCreateView(APIView):
         if "image" in request.FILES:
             uploaded_image = request.FILES["image"]
             print(uploaded_image)
-            image_id = fs.put(uploaded_image, filename=uploaded_image.name)
+            image_id = fs.put(uploaded_image, filename=uploaded_image.name, contentType=uploaded_image.content_type)
 
         # Prepare resume data
+        now = datetime.now(timezone.utc)
         resume_data = {
             "_id": resume_id,
             "user_id": user_id,
             "title":"",
             "resume_details": json.loads(data.get("resumeData", {})),
             "email": data.get("email", ""),
-            "image_id": str(image_id) if image_id else None
+            "image_id": str(image_id) if image_id else None,
+            "created_at": now,
+            "updated_at": now,
+            "version": 1,
         }
+        resume_data.update(signature_fields(resume_data["resume_details"]))
+        resume_data["duplicate_of"] = flag_duplicates(resume_collection, resume_data)
 
         # Save to database
         resume_collection.insert_one(resume_data)
-        return Response({"message": "Resume saved successfully", "resume_id": resume_id}, status=201)
+        index_resume_safely(resume_id, resume_data["resume_details"])
+        upsert_similar_safely(resume_id, resume_data["resume_details"])
+        return Response({
+            "message": "Resume saved successfully",
+            "resume_id": resume_id,
+            "possible_duplicates": resume_data["duplicate_of"],
+        }, status=201)
+
+def expected_version(request):
+    """
+    The resume version a write is conditional on, from an `If-Match: "<version>"`
+    header; None when there is no header or it is `*`.
+    """
+    header = request.META.get("HTTP_IF_MATCH", "").strip()
+    if not header or header == "*":
+        return None
+    try:
+        return int(header.removeprefix("W/").strip('"'))
+    except ValueError:
+        raise PatchError("If-Match must be a resume version", 400)
+
+def version_filter(version):
+    # Resumes saved before versions were recorded are version 0
+    return {"$in": [0, None]} if version == 0 else version
 
 class ResumeUpdateView(APIView):
     """
     API to update an existing resume by ID, including updating the image.
+
+    PUT replaces the given fields. PATCH edits `resume_details` in place
+    with a JSON Patch (see resume/patch.py) in one atomic update. Both
+    bump the resume's `version`; with `If-Match: "<version>"` the write
+    only applies to that version and answers 409 otherwise.
     """
-    parser_classes = (MultiPartParser, FormParser)  # Allow file uploads
+    parser_classes = (MultiPartParser, FormParser, JSONParser, JsonPatchParser)  # Allow file uploads and JSON Patch
 
     def put(self, request, id):
         updated_data = request.data
@@ -77,7 +143,16 @@ class ResumeUpdateView(APIView):
         if not resume:
             return Response({"error": "Resume not found"}, status=404)
 
+        try:
+            version = expected_version(request)
+        except PatchError as e:
+            return Response({"error": str(e)}, status=e.status)
+        if version is not None and resume.get("version", 0) != version:
+            counters.incr("update.conflicts")
+            return Response({"error": "Resume was changed by another request", "version": resume.get("version", 0)}, status=409)
+
         update_fields = {}  # Store only provided fields
+        derived_fields = {}  # Computed from resume_details; not a change by themselves
 
         if "title" in updated_data:
             update_fields["title"] = updated_data.get("title")
@@ -93,11 +168,13 @@ class ResumeUpdateView(APIView):
                 update_fields["resume_details"] = resume_details  # Only update if provided
             except json.JSONDecodeError:
                 return Response({"error": "Invalid JSON format in resumeData"}, status=400)
+            derived_fields.update(signature_fields(resume_details))
+            derived_fields["duplicate_of"] = flag_duplicates(resume_collection, derived_fields, exclude_id=id)
 
         # Handle image update if new image is uploaded
         if "image" in request.FILES:
             uploaded_image = request.FILES["image"]
-            image_id = fs.put(uploaded_image, filename=uploaded_image.name)  # Save new image to GridFS
+            image_id = fs.put(uploaded_image, filename=uploaded_image.name, contentType=uploaded_image.content_type)  # Save new image to GridFS
 
             # Remove old image if exists
             if resume.get("image_id"):
@@ -112,35 +189,188 @@ class ResumeUpdateView(APIView):
 
         # Only update if there are changes
         if update_fields:
+            # Only a change to a field the client sent bumps the timestamp and version, so an
+            # identical resubmission is still "No changes made" and keeps its ETag; derived
+            # fields (e.g. signatures missing from older resumes) are written either way.
+            changed = any(resume.get(field) != value for field, value in update_fields.items())
             print(update_fields)
-            result = resume_collection.update_one({"_id": id}, {"$set": update_fields})
-            if result.modified_count:
+            update = {"$set": dict(update_fields, **derived_fields)}
+            if changed:
+                update["$set"]["updated_at"] = datetime.now(timezone.utc)
+                update["$inc"] = {"version": 1}
+            query = {"_id": id}
+            if version is not None:
+                query["version"] = version_filter(version)
+            result = resume_collection.update_one(query, update)
+            if not result.matched_count:
+                # Deleted, or changed by another request since the If-Match check above
+                current = resume_collection.find_one({"_id": id}, {"version": 1})
+                if not current:
+                    return Response({"error": "Resume not found"}, status=404)
+                counters.incr("update.conflicts")
+                return Response({"error": "Resume was changed by another request", "version": current.get("version", 0)}, status=409)
+            if changed and result.modified_count:
+                if "resume_details" in update_fields:
+                    index_resume_safely(id, update_fields["resume_details"])
+                    upsert_similar_safely(id, update_fields["resume_details"])
                 return Response({"message": "Resume updated successfully"}, status=200)
             return Response({"error": "No changes made"}, status=400)
 
         return Response({"error": "No valid fields provided to update"}, status=400)
+
+    def patch(self, request, id):
+        try:
+            version = expected_version(request)
+            conditions, update = patch_to_update(
+                request.data, max_operations=getattr(settings, "RESUME_PATCH_MAX_OPERATIONS", 100)
+            )
+        except PatchError as e:
+            return Response({"error": str(e)}, status=e.status)
+
+        query = {"_id": id, **conditions}
+        if version is not None:
+            query["version"] = version_filter(version)
+        update.setdefault("$set", {})["updated_at"] = datetime.now(timezone.utc)
+        update["$inc"] = {"version": 1}
+        try:
+            resume = resume_collection.find_one_and_update(
+                query, update, projection={"resume_details": 1, "version": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+        except WriteError as e:
+            message = (e.details or {}).get("errmsg", str(e))
+            return Response({"error": f"Patch could not be applied: {message}"}, status=422)
+
+        if resume is None:
+            # Nothing matched: tell a missing resume from a stale version or a patch that does not apply
+            current = resume_collection.find_one({"_id": id}, {"version": 1})
+            if not current:
+                return Response({"error": "Resume not found"}, status=404)
+            current_version = current.get("version", 0)
+            if version is not None and current_version != version:
+                counters.incr("update.conflicts")
+                return Response({"error": "Resume was changed by another request", "version": current_version}, status=409)
+            return Response({"error": "Patch does not apply to the current resume", "version": current_version}, status=409)
+
+        counters.incr("patch.applied")
+        details = resume.get("resume_details")
+        # Derived fields follow the patch; the version condition keeps a slower request from overwriting newer ones
+        fields = signature_fields(details)
+        fields["duplicate_of"] = flag_duplicates(resume_collection, fields, exclude_id=id)
+        resume_collection.update_one({"_id": id, "version": resume["version"]}, {"$set": fields})
+        index_resume_safely(id, details)
+        upsert_similar_safely(id, details)
+        return Response({"message": "Resume updated successfully", "version": resume["version"]}, status=200)
     
 
+def resume_summary(resume):
+    """The listing entry of a resume read with SUMMARY_FIELDS."""
+    resume["_id"] = str(resume["_id"])
+    if resume.get("image_id"):
+        resume["image_url"] = f"{resume['image_id']}"
+    # Resumes saved before timestamps were recorded were created when their id was
+    # (stored datetimes come back from Mongo as naive UTC)
+    if not resume.get("created_at") and ObjectId.is_valid(resume["_id"]):
+        resume["created_at"] = ObjectId(resume["_id"]).generation_time.replace(tzinfo=None)
+    resume.setdefault("updated_at", resume.get("created_at"))
+    return resume
+
+def _epoch(moment):
+    # Mongo returns naive UTC datetimes. Whole seconds, as HTTP dates are:
+    # stored milliseconds would make every If-Modified-Since look stale.
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+def resume_validators(resume):
+    """
+    The strong ETag (the resume's version, which every write bumps) and
+    the Last-Modified time in epoch seconds, or None if unknown, of a resume.
+    """
+    modified = resume.get("updated_at") or resume.get("created_at")
+    if not modified and ObjectId.is_valid(str(resume["_id"])):
+        modified = ObjectId(str(resume["_id"])).generation_time
+    return f'"{resume.get("version", 0)}"', _epoch(modified) if modified else None
+
+def with_validators(response, etag, last_modified):
+    """Set caching headers so clients revalidate with If-None-Match / If-Modified-Since."""
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+def is_conditional(request):
+    return "HTTP_IF_NONE_MATCH" in request.META or "HTTP_IF_MODIFIED_SINCE" in request.META
+
 class ResumeRetrieveView(APIView):
     """
     API to retrieve resumes, including the associated image.
+
+    Listings by `user_id` or `email` return full resumes; with
+    `?view=summary` they return only each resume's id, title, image and
+    timestamps, most recently updated first. With `limit` and/or `cursor`
+    a listing is paged, most recently updated first, and returns
+    `{"resumes": [...], "next_cursor": ...}`.
+
+    A single resume (`?id=`) carries an ETag and Last-Modified; a request
+    with a matching If-None-Match or If-Modified-Since gets a 304 after
+    reading only the resume's version and timestamps.
     """
     def get(self, request):
         email = request.query_params.get("email")
         resume_id = request.query_params.get("id")
         user_id = request.query_params.get("user_id")
+        summary = request.query_params.get("view") == "summary"
+
+        if not resume_id and (user_id or email) and is_paged(request.query_params):
+            query = {"user_id": user_id} if user_id else {"email": email}
+            try:
+                limit, cursor = page_params(request.query_params)
+                page, next_cursor = fetch_page(
+                    resume_collection, query, SUMMARY_FIELDS if summary else HIDDEN_FIELDS, SUMMARY_SORT, limit, cursor
+                )
+            except InvalidPage as e:
+                return Response({"error": str(e)}, status=400)
+            for resume in page:
+                if summary:
+                    resume_summary(resume)
+                    continue
+                resume["_id"] = str(resume["_id"])
+                if "image_id" in resume and resume["image_id"]:
+                    resume["image_url"] = f"{resume['image_id']}"
+            return Response({"resumes": page, "next_cursor": next_cursor}, status=200)
+
+        if not resume_id and summary and (user_id or email):
+            query = {"user_id": user_id} if user_id else {"email": email}
+            resumes = [
+                resume_summary(resume)
+                for resume in resume_collection.find(query, SUMMARY_FIELDS).sort(SUMMARY_SORT)
+            ]
+            return Response(resumes, status=200)
 
         if resume_id:
-            resume = resume_collection.find_one({"_id": resume_id})
+            if is_conditional(request):
+                current = resume_collection.find_one({"_id": resume_id}, VALIDATOR_FIELDS)
+                if not current:
+                    return Response({"error": "Resume not found"}, status=404)
+                etag, last_modified = resume_validators(current)
+                conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if conditional is not None:
+                    counters.incr("retrieve.not_modified")
+                    return with_validators(conditional, etag, last_modified)
+
+            resume = resume_collection.find_one({"_id": resume_id}, HIDDEN_FIELDS)
             if resume:
+                validators = resume_validators(resume)
                 resume["_id"] = str(resume["_id"])
                 if "image_id" in resume and resume["image_id"]:
                     resume["image_url"] = f"{resume['image_id']}"
-                return Response(resume, status=200)
+                return with_validators(Response(resume, status=200), *validators)
             return Response({"error": "Resume not found"}, status=404)
 
         if user_id:
-            resumes = list(resume_collection.find({"user_id": user_id}))
+            resumes = list(resume_collection.find({"user_id": user_id}, HIDDEN_FIELDS))
             for resume in resumes:
                 resume["_id"] = str(resume["_id"])
                 if "image_id" in resume and resume["image_id"]:
@@ -148,7 +378,7 @@ class ResumeRetrieveView(APIView):
             return Response(resumes, status=200)
 
         if email:
-            resumes = list(resume_collection.find({"email": email}))
+            resumes = list(resume_collection.find({"email": email}, HIDDEN_FIELDS))
             for resume in resumes:
                 resume["_id"] = str(resume["_id"])
                 if "image_id" in resume and resume["image_id"]:
@@ -181,66 +411,563 @@ class ResumeDeleteView(APIView):
         result = resume_collection.delete_one({"_id": id})
 
         if result.deleted_count:
+            remove_resume_safely(id)
+            remove_similar_safely(id)
             return Response({"message": "Resume deleted successfully"}, status=200)
         return Response({"error": "Failed to delete resume"}, status=400)
 
+class RangeNotSatisfiable(Exception):
+    pass
+
+def byte_range(header, length):
+    """
+    The inclusive `(start, end)` of a single-range `Range: bytes=...`
+    header for a body of `length` bytes, or None to send the whole body
+    (no header, a malformed one, or several ranges, which servers may
+    ignore). Raises RangeNotSatisfiable for ranges past the end.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0 or length == 0:
+                raise RangeNotSatisfiable()
+            return max(length - suffix, 0), length - 1
+        start = int(first)
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    if end is not None and start > end:
+        return None
+    if start >= length:
+        raise RangeNotSatisfiable()
+    return start, length - 1 if end is None else min(end, length - 1)
+
+def iter_gridfs(file_data, start, length):
+    """Yield `length` bytes of a GridFS file from `start`, one stored chunk at a time."""
+    file_data.seek(start)
+    remaining = length
+    while remaining > 0:
+        chunk = file_data.read(min(file_data.chunk_size, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
+
 class ResumeImageView(View):
     """
     API to serve images stored in GridFS.
+
+    An image id always names the same bytes (a new upload gets a new id),
+    so the id is the image's strong ETag and responses may be cached for
+    good. `fs.get` reads only the file's metadata document; a matching
+    If-None-Match or If-Modified-Since gets a 304 without reading any
+    chunks. The body is streamed one GridFS chunk at a time with its
+    stored content type and length, and a single `Range` (honoured
+    unless an If-Range no longer matches) is answered with 206.
     """
     def get(self, request, image_id):
         try:
             file_data = fs.get(ObjectId(image_id))  # Get file from GridFS
-            response = HttpResponse(file_data, content_type="image/png")  # ✅ Ensure binary response
-            response["Content-Disposition"] = f'inline; filename="{file_data.filename}"'
-            return response
         except gridfs.errors.NoFile:
             return HttpResponse("Image not found", status=404)
         except Exception as e:
             return HttpResponse(f"Error loading image: {str(e)}", status=500)
 
+        etag, last_modified = f'"{image_id}"', _epoch(file_data.upload_date)
+        if is_conditional(request):
+            conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if conditional is not None:
+                counters.incr("image.not_modified")
+                return self._cacheable(conditional, etag, last_modified)
+
+        length = file_data.length
+        if_range = request.META.get("HTTP_IF_RANGE")
+        try:
+            span = None
+            if not if_range or if_range in (etag, http_date(last_modified)):
+                span = byte_range(request.META.get("HTTP_RANGE"), length)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{length}"
+            return response
+
+        content_type = (
+            file_data.content_type or mimetypes.guess_type(file_data.filename or "")[0] or "image/png"
+        )
+        start, end = span if span else (0, length - 1)
+        response = StreamingHttpResponse(
+            iter_gridfs(file_data, start, end - start + 1),
+            status=206 if span else 200, content_type=content_type,
+        )
+        response["Content-Length"] = str(end - start + 1)
+        if span:
+            response["Content-Range"] = f"bytes {start}-{end}/{length}"
+            counters.incr("image.partial")
+        response["Accept-Ranges"] = "bytes"
+        response["Content-Disposition"] = f'inline; filename="{file_data.filename}"'
+        return self._cacheable(response, etag, last_modified)
+
+    def _cacheable(self, response, etag, last_modified):
+        with_validators(response, etag, last_modified)
+        response["Cache-Control"] = "private, max-age=31536000, immutable"
+        return response
+
+
+def upload_source(uploaded_file):
+    """
+    Return something pdfplumber/python-docx can open without another copy.
+
+    Uploads up to FILE_UPLOAD_MAX_MEMORY_SIZE are kept in memory by Django and
+    their buffer is handed over directly. Larger uploads were already spilled
+    to a temporary file by Django, so its path is used instead of writing the
+    file out a second time.
+    """
+    if hasattr(uploaded_file, "temporary_file_path"):
+        return uploaded_file.temporary_file_path()
+    buffer = uploaded_file.file
+    buffer.seek(0)
+    return buffer
+
+
+def admitted_upload(request):
+    """
+    Return `(uploaded_file, file_format)` for the request's `file`, or raise
+    UploadRejected. The declared request size is checked before the body is
+    read; the format comes from the file's content, not its name.
+    """
+    check_request_size(request)
+    if 'file' not in request.FILES:
+        raise UploadRejected("No file uploaded", 400, "missing")
+    uploaded_file = request.FILES['file']
+    return uploaded_file, admit_upload(uploaded_file)
+
+
+def extract_upload_text(source, file_extension):
+    """Extract text from a PDF/DOCX file given as a path or file object."""
+    if file_extension == "pdf":
+        return extract_text_from_pdf(source)
+    if file_extension in ["doc", "docx"]:
+        return extract_text_from_docx(source)
+    raise ValueError("Unsupported file format")
+
+
+def _llm_parse_sections(extracted_text, sections):
+    try:
+        return parse_cache.get_or_parse(
+            extracted_text,
+            lambda text: parse_resume_with_gemini(text, sections=sections),
+            variant=",".join(sections),
+        )
+    except LLMError as e:
+        # parse_tiered keeps the local result when escalation returns nothing
+        logger.warning(f"LLM escalation unavailable: {str(e)}")
+        return None
+
+
+def parse_with_strategy(extracted_text, strategy=None, local=None):
+    """
+    Parse extracted text into structured resume data.
+
+    "llm" always asks Gemini for the whole resume. "tiered" runs the local
+    parser first and asks Gemini only for low-confidence sections.
+    RESUME_PARSE_STRATEGY decides when no strategy is given. `local` is a
+    local parse already made for the text, e.g. by parse_locally_batch.
+    """
+    strategy = strategy or getattr(settings, "RESUME_PARSE_STRATEGY", "llm")
+    if strategy == "tiered":
+        return parse_tiered(
+            extracted_text,
+            _llm_parse_sections,
+            thresholds=getattr(settings, "RESUME_TIERED_THRESHOLDS", None),
+            local=local,
+        )
+
+    # Call LLM function for structured resume parsing, reusing the
+    # cached result when the same resume was parsed recently
+    try:
+        data = parse_cache.get_or_parse(extracted_text, parse_resume_with_gemini)
+    except LLMError as e:
+        # Gemini is failing or its circuit breaker is open: answer from the
+        # local parser rather than failing the upload
+        logger.warning(f"LLM parse unavailable, using the local parser: {str(e)}")
+        counters.incr("parse_tier.local_fallback")
+        return TieredResult((local or parse_locally(extracted_text))[0], "local")
+    counters.incr("parse_tier.llm")
+    return TieredResult(data, "llm")
+
+
+def parse_extracted_text(extracted_text, local=None):
+    return parse_with_strategy(extracted_text, local=local).data
+
+
+def stream_tiered_events(extracted_text):
+    """
+    stream_parse_events for the "tiered" strategy, with the same result as
+    parse_with_strategy: confident local sections are sent at once, then
+    Gemini streams only the low-confidence ones, each merged into the local
+    parse as it arrives. If Gemini fails, the remaining sections come from
+    the local parse.
+    """
+    thresholds = getattr(settings, "RESUME_TIERED_THRESHOLDS", None)
+    data, confidence = parse_locally(extracted_text)
+    escalate = low_confidence_sections(confidence, thresholds)
+    for section, value in data.items():
+        if section not in escalate:
+            yield sse_event("section", {"section": section, "data": value})
+    if not escalate:
+        counters.incr("parse_tier.local")
+        yield sse_event("done", data)
+        return
+
+    # Same cache entries as _llm_parse_sections
+    key = make_cache_key(extracted_text, ",".join(escalate))
+    cached = parse_cache.get(key) if extracted_text.strip() else None
+    streamed = {}
+    try:
+        members = cached.items() if isinstance(cached, dict) else stream_resume_with_gemini(extracted_text, escalate)
+        for section, value in members:
+            if section not in escalate or section in streamed:
+                continue
+            streamed[section] = value
+            merge_escalated(data, confidence, {section: value}, [section], thresholds)
+            yield sse_event("section", {"section": section, "data": data[section]})
+    except Exception as e:
+        # LLMError, or a response that is not valid JSON
+        logger.warning(f"LLM escalation unavailable, using the local parse: {str(e)}")
+        counters.incr("parse_tier.local_fallback")
+    else:
+        if cached is None and streamed and extracted_text.strip():
+            parse_cache.set(key, streamed)
+        counters.incr(f"parse_tier.{escalated_tier(escalate)}")
+    # Escalated sections Gemini did not return keep their local parse
+    for section in escalate:
+        if section not in streamed:
+            yield sse_event("section", {"section": section, "data": data[section]})
+    yield sse_event("done", data)
+
+
+def stream_parse_events(extracted_text, strategy=None):
+    """
+    Yield Server-Sent Events for parsing `extracted_text`: one `section`
+    event per top-level section as soon as it is available, then a `done`
+    event with the merged document. Shares the parse cache with the
+    non-streaming path. `strategy` is as for parse_with_strategy.
+    """
+    strategy = strategy or getattr(settings, "RESUME_PARSE_STRATEGY", "llm")
+    if strategy == "tiered":
+        yield from stream_tiered_events(extracted_text)
+        return
+
+    key = make_cache_key(extracted_text)
+    cached = parse_cache.get(key) if extracted_text.strip() else None
+    if cached is not None:
+        for section, value in cached.items():
+            yield sse_event("section", {"section": section, "data": value})
+        yield sse_event("done", cached)
+        return
+
+    document = {}
+    try:
+        for section, value in stream_resume_with_gemini(extracted_text):
+            document[section] = value
+            yield sse_event("section", {"section": section, "data": value})
+    except LLMError as e:
+        if document:
+            yield sse_event("error", {"error": str(e)})
+            return
+        logger.warning(f"LLM parse unavailable, using the local parser: {str(e)}")
+        counters.incr("parse_tier.local_fallback")
+        document = parse_locally(extracted_text)[0]
+        for section, value in document.items():
+            yield sse_event("section", {"section": section, "data": value})
+        yield sse_event("done", document)
+        return
+    except Exception as e:
+        yield sse_event("error", {"error": str(e)})
+        return
+
+    counters.incr("parse_tier.llm")
+    if document and extracted_text.strip():
+        parse_cache.set(key, document)
+    yield sse_event("done", document)
+
+
+def run_extraction(source, file_extension):
+    """
+    Extract text from a PDF/DOCX file (path or file object) and parse it into
+    structured resume data. Shared by the synchronous and job-based uploads.
+    """
+    return parse_extracted_text(extract_upload_text(source, file_extension))
+
+
+extraction_jobs = ExtractionJobQueue(
+    db["extraction_jobs"],
+    fs,
+    run_extraction,
+    workers=getattr(settings, "RESUME_EXTRACTION_WORKERS", 2),
+    lease_seconds=getattr(settings, "RESUME_EXTRACTION_JOB_LEASE", 300),
+    max_attempts=getattr(settings, "RESUME_EXTRACTION_JOB_MAX_ATTEMPTS", 3),
+    ttl_seconds=getattr(settings, "RESUME_EXTRACTION_JOB_TTL", 24 * 3600),
+)
 
 
 class ResumeUploadView(APIView):
+    """
+    API to extract structured resume data from an uploaded PDF/DOCX.
+
+    With `mode=async` the file is queued and a job id is returned right away;
+    poll `/resume/extract/<job_id>/` for the result. `mode=sync` parses in the
+    request. RESUME_EXTRACT_DEFAULT_MODE decides when no mode is given.
+
+    `strategy=tiered` tries the local parser before Gemini. The tier that
+    produced the result is returned in the X-Resume-Parse-Tier header.
+
+    Uploads are admitted before any parsing: files that are not PDF/DOCX by
+    content get 400, files over RESUME_UPLOAD_MAX_BYTES 413, and unreadable
+    PDFs or PDFs over RESUME_UPLOAD_MAX_PDF_PAGES pages 422.
+    """
     parser_classes = (MultiPartParser, FormParser)
 
     def post(self, request, *args, **kwargs):
-        if 'file' not in request.FILES:
-            return Response({"error": "No file uploaded"}, status=400)
+        try:
+            uploaded_file, file_extension = admitted_upload(request)
+        except UploadRejected as e:
+            return Response({"error": str(e)}, status=e.status)
+
+        mode = (
+            request.query_params.get("mode")
+            or request.data.get("mode")
+            or getattr(settings, "RESUME_EXTRACT_DEFAULT_MODE", "sync")
+        )
+        if mode == "async":
+            try:
+                job_id = extraction_jobs.submit(uploaded_file.read(), uploaded_file.name, file_extension)
+            except Exception as e:
+                return Response({"error": str(e)}, status=500)
+            return Response(
+                {"job_id": job_id, "status": "queued", "status_url": f"/resume/extract/{job_id}/"},
+                status=202,
+            )
+
+        strategy = request.query_params.get("strategy") or request.data.get("strategy")
+        try:
+            extracted_text = extract_upload_text(upload_source(uploaded_file), file_extension)
+            parsed = parse_with_strategy(extracted_text, strategy)
+            return Response(parsed.data, status=200, headers={
+                "X-Resume-Parse-Tier": parsed.tier,
+                "X-Resume-Parse-Escalated": ",".join(parsed.escalated),
+            })
 
-        uploaded_file = request.FILES['file']
-        file_extension = uploaded_file.name.split('.')[-1].lower()
+        except Exception as e:
+            return Response({"error": str(e)}, status=500)
+
+class ResumeExtractStreamView(APIView):
+    """
+    API to extract structured resume data from an uploaded PDF/DOCX as
+    Server-Sent Events.
+
+    Each top-level section (personal, skills, experience, projects,
+    education) is sent as a `section` event as soon as Gemini has generated
+    it. A final `done` event carries the merged document, the same data
+    `/resume/extract/` returns. Failures after the stream has started are
+    sent as an `error` event. `strategy=tiered` (or RESUME_PARSE_STRATEGY)
+    sends the confident local sections first and streams only the rest
+    from Gemini, as the non-streaming tiered parse does.
+    """
+    parser_classes = (MultiPartParser, FormParser)
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}") as temp_file:
-            for chunk in uploaded_file.chunks():
-                temp_file.write(chunk)
-            temp_file_path = temp_file.name
+    def post(self, request):
+        try:
+            uploaded_file, file_extension = admitted_upload(request)
+        except UploadRejected as e:
+            return Response({"error": str(e)}, status=e.status)
 
         try:
-            if file_extension == "pdf":
-                extracted_text = extract_text_from_pdf(temp_file_path)
-            elif file_extension in ["doc", "docx"]:
-                extracted_text = extract_text_from_docx(temp_file_path)
-            else:
-                return Response({"error": "Unsupported file format"}, status=400)
+            extracted_text = extract_upload_text(upload_source(uploaded_file), file_extension)
+        except Exception as e:
+            return Response({"error": str(e)}, status=500)
 
-            # Call LLM function for structured resume parsing
-            extracted_data = parse_resume_with_gemini(extracted_text)
-            return Response(extracted_data, status=200)
+        strategy = request.query_params.get("strategy") or request.data.get("strategy")
+        response = StreamingHttpResponse(stream_parse_events(extracted_text, strategy), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # Stop nginx from buffering the events
+        response["X-Accel-Buffering"] = "no"
+        return response
 
+class ExtractionJobStatusView(APIView):
+    """
+    API to poll an asynchronous extraction job.
+    """
+    def get(self, request, job_id):
+        try:
+            job = extraction_jobs.get(job_id)
         except Exception as e:
             return Response({"error": str(e)}, status=500)
-        finally:
-            os.remove(temp_file_path)  # Clean up temp file
+
+        if not job:
+            return Response({"error": "Job not found"}, status=404)
+        return Response(job, status=200)
+
+def index_imported_resume(resume_id, details):
+    """Add a bulk-imported resume to the search and similarity indexes."""
+    index_resume_safely(resume_id, details)
+    upsert_similar_safely(resume_id, details)
+
+class ResumeBulkImportView(APIView):
+    """
+    API to import many resumes at once from a ZIP `archive` or several `files`.
+
+    Every file is extracted, parsed and saved to the resumes collection. The
+    response is streamed as newline-delimited JSON: one line per file as soon
+    as it succeeds or fails, then a summary line.
+    """
+    parser_classes = (MultiPartParser, FormParser)
+
+    def post(self, request):
+        max_files = getattr(settings, "RESUME_BULK_MAX_FILES", 500)
+        max_entry_bytes = getattr(settings, "RESUME_BULK_MAX_FILE_BYTES", 10 * 1024 * 1024)
+
+        if "archive" in request.FILES:
+            archive = request.FILES["archive"]
+            if not zipfile.is_zipfile(archive):
+                return Response({"error": "Uploaded archive is not a valid ZIP file"}, status=400)
+            archive.seek(0)
+            entries = iter_archive_entries(archive, max_files, max_entry_bytes)
+        elif request.FILES.getlist("files"):
+            entries = iter_uploaded_files(request.FILES.getlist("files"), max_files, max_entry_bytes)
+        else:
+            return Response({"error": "No archive or files uploaded"}, status=400)
+
+        # The tiered parser starts locally, so run its NER over many resumes per nlp.pipe call
+        tiered = getattr(settings, "RESUME_PARSE_STRATEGY", "llm") == "tiered"
+        importer = BulkImporter(
+            resume_collection,
+            extract_upload_text,
+            parse_extracted_text,
+            extract_concurrency=getattr(settings, "RESUME_BULK_EXTRACT_CONCURRENCY", 4),
+            llm_concurrency=getattr(settings, "RESUME_BULK_LLM_CONCURRENCY", 2),
+            batch_size=getattr(settings, "RESUME_BULK_INSERT_BATCH_SIZE", 50),
+            on_inserted=index_imported_resume,
+            prepare_batch_fn=parse_locally_batch if tiered else None,
+            prepare_batch_size=getattr(settings, "RESUME_BULK_LOCAL_BATCH_SIZE", 32),
+        )
+        results = importer.run(entries, user_id=request.data.get("user_id"), email=request.data.get("email", ""))
+        return StreamingHttpResponse(
+            (json.dumps(result, default=str) + "\n" for result in results),
+            content_type="application/x-ndjson",
+        )
+
+class ResumeScoreView(APIView):
+    """
+    API to score stored resumes against a pasted job description, without
+    an LLM call.
+
+    `{"job_description": ..., "resume_id": ...}` scores one resume;
+    `{"job_description": ..., "user_id": ...}` scores all of a user's
+    resumes in one pass and returns them best first. Each result has a
+    0-100 score, its keyword coverage and similarity components, and the
+    job description's keywords the resume matches and misses.
+    """
+    def post(self, request):
+        job_description = (request.data.get("job_description") or "").strip()
+        resume_id = request.data.get("resume_id")
+        user_id = request.data.get("user_id")
+
+        if not job_description:
+            return Response({"error": "Please provide a job description"}, status=400)
+        max_chars = getattr(settings, "RESUME_SCORE_MAX_JD_CHARS", 20000)
+        if len(job_description) > max_chars:
+            return Response({"error": f"Job description is longer than {max_chars} characters"}, status=400)
+
+        projection = {"title": 1, "resume_details": 1}
+        if resume_id:
+            resume = resume_collection.find_one({"_id": resume_id}, projection)
+            if not resume:
+                return Response({"error": "Resume not found"}, status=404)
+            resumes = [resume]
+        elif user_id:
+            resumes = list(resume_collection.find({"user_id": user_id}, projection))
+        else:
+            return Response({"error": "Please provide a resume ID or user ID"}, status=400)
+
+        results = score_resumes(job_description, [resume.get("resume_details") for resume in resumes])
+        counters.incr("score.resumes", len(results))
+        for resume, result in zip(resumes, results):
+            result["resume_id"] = str(resume["_id"])
+            result["title"] = resume.get("title", "")
+
+        if resume_id:
+            return Response(results[0], status=200)
+        results.sort(key=lambda result: result["score"], reverse=True)
+        return Response({"results": results}, status=200)
+
+class ResumeSimilarView(APIView):
+    """
+    API to find the resumes most like a stored resume ("more like this").
+
+    Resumes are compared by the cosine similarity of their hashed n-gram
+    vectors, held in a memory-mapped matrix shared by all workers.
+    `?limit=` sets the number of results, up to RESUME_SIMILAR_MAX_RESULTS.
+    """
+    def get(self, request, id):
+        max_results = getattr(settings, "RESUME_SIMILAR_MAX_RESULTS", 50)
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), max_results)
+        except ValueError:
+            return Response({"error": "limit must be a number"}, status=400)
+        if limit < 1:
+            return Response({"error": "limit must be positive"}, status=400)
+
+        resume = resume_collection.find_one({"_id": id}, {"resume_details": 1})
+        if not resume:
+            return Response({"error": "Resume not found"}, status=404)
+
+        try:
+            matches = get_similarity_matrix().most_similar(resume.get("resume_details"), limit=limit, exclude_id=id)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Similarity matrix unavailable: {str(e)}")
+            counters.incr("similar.query_errors")
+            return Response({"error": "Similar resumes are unavailable right now"}, status=503)
+        counters.incr("similar.queries")
+        found = {
+            str(match["_id"]): match
+            for match in resume_collection.find(
+                {"_id": {"$in": [resume_id for resume_id, _ in matches]}}, {"title": 1, "user_id": 1}
+            )
+        } if matches else {}
+        # Rows of resumes deleted by another process since the last rebuild are skipped
+        results = [
+            {
+                "resume_id": resume_id,
+                "similarity": score,
+                "title": found[resume_id].get("title", ""),
+                "user_id": found[resume_id].get("user_id"),
+            }
+            for resume_id, score in matches if resume_id in found
+        ]
+        return Response({"results": results}, status=200)
+
+class ResumeMetricsView(APIView):
+    """
+    API to expose the resume pipeline counters, including parse cache hits and
+    misses, the LLM circuit breaker state, the search index size and the
+    similarity matrix size.
+    """
+    def get(self, request):
+        snapshot = counters.snapshot()
+        snapshot["parse_cache"] = parse_cache.stats()
+        snapshot.setdefault("llm", {}).update(get_llm_client().stats())
+        snapshot.setdefault("search", {}).update(get_search_index().stats())
+        snapshot.setdefault("similar", {}).update(get_similarity_matrix().stats())
+        return Response(snapshot, status=200)
 
 def extract_text_from_pdf(pdf_path):
     """Extract text from a PDF file"""
-    text = ""
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() or ""
-        return text.strip()
+        return "\n".join(extract_pdf_pages(pdf_path)).strip()
     except Exception as e:
         print(f"Error extracting text from PDF: {e}")
         return ""
@@ -248,8 +975,7 @@ def extract_text_from_pdf(pdf_path):
 def extract_text_from_docx(docx_path):
     """Extract text from a DOCX file"""
     try:
-        doc = docx.Document(docx_path)
-        return "\n".join([para.text for para in doc.paragraphs]).strip()
+        return extract_docx_text(docx_path)
     except Exception as e:
         print(f"Error extracting text from DOCX: {e}")
         return ""
\ No newline at end of file
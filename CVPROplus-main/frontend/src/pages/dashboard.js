@@ -19,7 +19,7 @@ const Dashboard = () => {
   const fetchResumes = async (userId) => {
     try {
       const response = await axios.get("http://loacalhost/resume/retrieve/", {
-        params: { user_id: userId },
+        params: { user_id: userId, view: "summary" },
       });
       console.log("API Response:", response.data);
       setUserResumes(response.data);